@@ -0,0 +1,133 @@
+"""
+Cluster launcher: runs the bot as several worker processes.
+
+Each worker is a normal ``main.py`` process owning a contiguous range of shards.
+The launcher hosts the IPC coordinator and the web server, which reports the
+aggregated health of every worker.
+
+Environment:
+    CLUSTER_WORKERS - number of worker processes (default: CPU count)
+    SHARD_COUNT     - total shards across all workers (default: one per worker)
+    CLUSTER_SOCKET  - Unix socket path used for IPC
+"""
+import asyncio
+import logging
+import os
+import signal
+import subprocess
+import sys
+import threading
+from typing import Dict, List
+
+from web_server import run_web_server, apply_cluster_health
+from utils.cluster import ClusterCoordinator, DEFAULT_SOCKET_PATH
+from utils.logging_config import setup_logging, shutdown_logging
+
+setup_logging()
+logger = logging.getLogger(__name__)
+
+
+def split_shards(shard_count: int, workers: int) -> List[List[int]]:
+    """Split shard ids into contiguous ranges, one per worker."""
+    workers = max(1, min(workers, shard_count))
+    base, extra = divmod(shard_count, workers)
+    ranges = []
+    start = 0
+    for index in range(workers):
+        size = base + (1 if index < extra else 0)
+        ranges.append(list(range(start, start + size)))
+        start += size
+    return ranges
+
+
+def spawn_worker(cluster_id: int, shard_ids: List[int], shard_count: int, socket_path: str) -> subprocess.Popen:
+    """Start a worker process for a shard range."""
+    env = dict(os.environ)
+    env.update({
+        'CLUSTER_ID': str(cluster_id),
+        'CLUSTER_SOCKET': socket_path,
+        'SHARD_COUNT': str(shard_count),
+        'SHARD_IDS': f"{shard_ids[0]}-{shard_ids[-1]}",
+        'DISABLE_WEB_SERVER': '1',  # The launcher serves /health for the whole cluster
+        'LOG_FILE': env.get('LOG_FILE', 'bot.log').replace('.log', f'.cluster{cluster_id}.log')
+    })
+    logger.info(f"Starting cluster {cluster_id} with shards {shard_ids[0]}-{shard_ids[-1]}")
+    return subprocess.Popen([sys.executable, 'main.py'], env=env)
+
+
+async def publish_health(coordinator: ClusterCoordinator):
+    """Copy the aggregated worker health into the web server status."""
+    while True:
+        try:
+            apply_cluster_health(coordinator.aggregate_health())
+        except Exception as e:
+            logger.error(f"Error aggregating cluster health: {e}")
+        await asyncio.sleep(15)
+
+
+async def supervise(workers: Dict[int, subprocess.Popen], ranges: List[List[int]], shard_count: int,
+                    socket_path: str, stop_event: asyncio.Event):
+    """Restart workers that exit unexpectedly, with a growing delay."""
+    restarts = {cluster_id: 0 for cluster_id in workers}
+    while not stop_event.is_set():
+        for cluster_id, process in list(workers.items()):
+            code = process.poll()
+            if code is None:
+                continue
+
+            restarts[cluster_id] += 1
+            delay = min(5 * restarts[cluster_id], 60)
+            logger.warning(f"Cluster {cluster_id} exited with code {code}, restarting in {delay}s")
+            await asyncio.sleep(delay)
+            if stop_event.is_set():
+                return
+            workers[cluster_id] = spawn_worker(cluster_id, ranges[cluster_id], shard_count, socket_path)
+
+        try:
+            await asyncio.wait_for(stop_event.wait(), timeout=5)
+        except asyncio.TimeoutError:
+            pass
+
+
+async def main():
+    """Run the coordinator, the web server and the worker processes."""
+    worker_count = int(os.getenv('CLUSTER_WORKERS', os.cpu_count() or 1))
+    shard_count = int(os.getenv('SHARD_COUNT', worker_count))
+    socket_path = os.getenv('CLUSTER_SOCKET', DEFAULT_SOCKET_PATH)
+
+    coordinator = ClusterCoordinator(socket_path)
+    await coordinator.start()
+
+    web_thread = threading.Thread(target=run_web_server, daemon=True)
+    web_thread.start()
+
+    ranges = split_shards(shard_count, worker_count)
+    workers = {
+        cluster_id: spawn_worker(cluster_id, shard_ids, shard_count, socket_path)
+        for cluster_id, shard_ids in enumerate(ranges)
+    }
+
+    stop_event = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop_event.set)
+
+    health_task = asyncio.create_task(publish_health(coordinator))
+    try:
+        await supervise(workers, ranges, shard_count, socket_path, stop_event)
+    finally:
+        health_task.cancel()
+        for process in workers.values():
+            if process.poll() is None:
+                process.terminate()
+        for process in workers.values():
+            try:
+                process.wait(timeout=30)
+            except subprocess.TimeoutExpired:
+                process.kill()
+        await coordinator.close()
+        shutdown_logging()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
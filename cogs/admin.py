@@ -12,9 +12,14 @@ import traceback
 import json
 
 from config import COLORS, EMOJIS, get_server_config, update_server_config, user_has_permission, is_module_enabled
-from utils.helpers import create_embed, format_duration, format_number
+from utils.helpers import create_embed, format_duration, format_number, send_to_all_guilds
 from utils.database import get_user_rpg_data, update_user_rpg_data, get_guild_data, update_guild_data, get_user_data, update_user_data
 from utils.constants import WEAPONS, ARMOR, SHOP_ITEMS, PLAYER_CLASSES, SPECIAL_BOSSES
+from utils.sharding import get_shard_stats
+from utils.cluster import broadcast_event
+from utils.content_registry import publish_content_change
+from utils.inventory import store_items, total_items, format_overflow_notice
+from utils.storage import db
 
 logger = logging.getLogger(__name__)
 
@@ -287,18 +292,15 @@ class GiveItemsModal(discord.ui.Modal):
                 await interaction.response.send_message("❌ Player not found!", ephemeral=True)
                 return
                 
-            # Give items
-            inventory = player_data.get('inventory', [])
-            for _ in range(quantity):
-                inventory.append(item_name)
-            player_data['inventory'] = inventory
+            # Give items (anything that doesn't fit goes to the player's stash)
+            overflow = store_items(user_id, player_data, {item_name: quantity})
             update_user_rpg_data(user_id, player_data)
-            
+
             embed = create_embed(
                 "🎁 Items Given Successfully",
                 f"**Player:** <@{user_id}>\n"
                 f"**Item:** {item_name}\n"
-                f"**Quantity:** {quantity}",
+                f"**Quantity:** {quantity}" + format_overflow_notice(overflow),
                 COLORS['success']
             )
             await interaction.response.send_message(embed=embed, ephemeral=True)
@@ -357,7 +359,7 @@ class ViewPlayerModal(discord.ui.Modal):
             embed.add_field(
                 name="💰 Economy",
                 value=f"**Coins:** {format_number(player_data.get('coins', 0))}\n"
-                      f"**Items:** {len(player_data.get('inventory', []))}\n"
+                      f"**Items:** {total_items(player_data)}\n"
                       f"**Class:** {player_data.get('player_class', 'None')}\n"
                       f"**Profession:** {player_data.get('profession', 'None')}",
                 inline=True
@@ -464,10 +466,10 @@ class CreateWeaponModal(discord.ui.Modal):
             }
             
             # Save to dynamic weapons storage
-            from replit import db
             dynamic_weapons = db.get("dynamic_weapons", {})
             dynamic_weapons[weapon_name] = weapon_data
             db["dynamic_weapons"] = dynamic_weapons
+            publish_content_change()
             
             embed = create_embed(
                 "⚔️ Weapon Created Successfully",
@@ -535,10 +537,10 @@ class CreateArmorModal(discord.ui.Modal):
                 "special": special
             }
             
-            from replit import db
             dynamic_armor = db.get("dynamic_armor", {})
             dynamic_armor[armor_name] = armor_data
             db["dynamic_armor"] = dynamic_armor
+            publish_content_change()
             
             embed = create_embed(
                 "🛡️ Armor Created Successfully",
@@ -617,10 +619,10 @@ class CreateBossModal(discord.ui.Modal):
                 "location": "custom_arena"
             }
             
-            from replit import db
             dynamic_bosses = db.get("dynamic_bosses", {})
             dynamic_bosses[boss_name.lower().replace(" ", "_")] = boss_data
             db["dynamic_bosses"] = dynamic_bosses
+            publish_content_change()
             
             embed = create_embed(
                 "🐲 Boss Created Successfully",
@@ -691,10 +693,10 @@ class CreateClassModal(discord.ui.Modal):
                 }
             }
             
-            from replit import db
             dynamic_classes = db.get("dynamic_classes", {})
             dynamic_classes[class_name.lower().replace(" ", "_")] = class_data
             db["dynamic_classes"] = dynamic_classes
+            publish_content_change()
             
             embed = create_embed(
                 "🎭 Class Created Successfully",
@@ -759,19 +761,17 @@ class AnnouncementModal(discord.ui.Modal):
             )
             embed.set_footer(text="Official Plagg Bot Announcement")
             
-            # Send to all guilds
-            sent_count = 0
-            for guild in interaction.client.guilds:
-                try:
-                    # Find a suitable channel
-                    channel = guild.system_channel or guild.text_channels[0] if guild.text_channels else None
-                    if channel:
-                        await channel.send(embed=embed)
-                        sent_count += 1
-                except:
-                    continue
+            # Send to all guilds, and ask other cluster workers to do the same for theirs
+            sent_count = await send_to_all_guilds(interaction.client.guilds, embed)
+            clustered = await broadcast_event('guild_broadcast', {
+                'title': f"📢 {title}",
+                'description': message,
+                'color': COLORS['warning'],
+                'footer': "Official Plagg Bot Announcement"
+            })
                     
-            await interaction.response.send_message(f"✅ Announcement sent to {sent_count} servers!", ephemeral=True)
+            note = " (other clusters notified)" if clustered else ""
+            await interaction.response.send_message(f"✅ Announcement sent to {sent_count} servers{note}!", ephemeral=True)
             
         except Exception as e:
             await interaction.response.send_message(f"❌ Error: {e}", ephemeral=True)
@@ -803,7 +803,6 @@ class ReminderModal(discord.ui.Modal):
             minutes = int(self.time_input.value)
             
             # Store reminder in database
-            from replit import db
             reminders = db.get("scheduled_reminders", [])
             reminder_time = datetime.now() + timedelta(minutes=minutes)
             
@@ -862,7 +861,6 @@ class GameSettingsModal(discord.ui.Modal):
             difficulty = int(self.difficulty_input.value)
             xp_multiplier = float(self.xp_multiplier_input.value)
             
-            from replit import db
             game_settings = db.get("game_settings", {})
             game_settings.update({
                 "difficulty": difficulty,
@@ -871,6 +869,7 @@ class GameSettingsModal(discord.ui.Modal):
                 "updated_at": datetime.now().isoformat()
             })
             db["game_settings"] = game_settings
+            publish_content_change()
             
             embed = create_embed(
                 "⚙️ Game Settings Updated",
@@ -903,7 +902,6 @@ class WelcomeMessageModal(discord.ui.Modal):
         try:
             message = self.message_input.value
             
-            from replit import db
             db["welcome_message"] = message
             
             await interaction.response.send_message("✅ Welcome message updated!", ephemeral=True)
@@ -1031,7 +1029,6 @@ class AdminCog(commands.Cog):
         if ctx.author.id != BOT_OWNER_ID:
             return
             
-        from replit import db
         reminders = db.get("scheduled_reminders", [])
         current_time = datetime.now()
         
@@ -1067,6 +1064,45 @@ class AdminCog(commands.Cog):
         if sent_reminders:
             await ctx.send(f"✅ Sent {len(sent_reminders)} scheduled reminders!")
         
+    @commands.command(name='reload', help='Reload a cog or content module in place (Owner only)')
+    async def reload_command(self, ctx, target: str):
+        """Reload a cog or content module without reconnecting."""
+        if ctx.author.id != BOT_OWNER_ID:
+            await ctx.send("❌ This command is restricted to the bot owner!")
+            return
+
+        from utils.hot_reload import reload_target
+
+        try:
+            reloaded, cleared = await reload_target(self.bot, target)
+        except Exception as e:
+            logger.error(f"Error reloading {target}: {e}")
+            embed = create_embed("❌ Reload Failed", f"Could not reload `{target}`: {e}", COLORS['error'])
+            await ctx.send(embed=embed)
+            return
+
+        embed = create_embed(
+            "🔄 Reload Complete",
+            f"**Reloaded:** {', '.join(f'`{name}`' for name in reloaded)}\n"
+            f"**Caches Rebuilt:** {len(cleared)}",
+            COLORS['success']
+        )
+        await ctx.send(embed=embed)
+        
+    @commands.command(name='sync', help='Sync slash commands with Discord (Owner only)')
+    async def sync_command(self, ctx):
+        """Register slash and hybrid commands with Discord."""
+        if ctx.author.id != BOT_OWNER_ID:
+            await ctx.send("❌ This command is restricted to the bot owner!")
+            return
+
+        try:
+            synced = await self.bot.tree.sync()
+            await ctx.send(f"✅ Synced {len(synced)} slash commands!")
+        except Exception as e:
+            logger.error(f"Error syncing slash commands: {e}")
+            await ctx.send(f"❌ Failed to sync slash commands: {e}")
+        
     @commands.command(name='config', help='Interactive server configuration')
     @commands.has_permissions(administrator=True)
     async def config_command(self, ctx):
@@ -1143,6 +1179,18 @@ class AdminCog(commands.Cog):
                       f"**Cached Messages:** {len(self.bot.cached_messages)}",
                 inline=True
             )
+
+            # Per-shard breakdown for sharded bots
+            shard_stats = get_shard_stats(self.bot)
+            if len(shard_stats) > 1:
+                shard_lines = [
+                    f"{'🟢' if shard['online'] else '🔴'} **Shard {shard['id']}:** "
+                    f"{shard['latency'] if shard['latency'] is not None else '?'}ms, {shard['guilds']} servers"
+                    for shard in shard_stats[:20]
+                ]
+                if len(shard_stats) > 20:
+                    shard_lines.append(f"...and {len(shard_stats) - 20} more shards")
+                embed.add_field(name="🧩 Shards", value="\n".join(shard_lines), inline=False)
             
             embed.set_footer(text=f"Bot ID: {self.bot.user.id}")
             embed.timestamp = datetime.now()
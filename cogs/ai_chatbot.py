@@ -7,30 +7,39 @@ import os
 from datetime import datetime
 from typing import Optional, Dict, Any
 
-from google import genai
-from google.genai import types
-
 from config import COLORS, EMOJIS, get_server_config, is_module_enabled, get_ai_api_key
 from utils.helpers import create_embed
-from replit import db
+from utils.storage import db
 
 logger = logging.getLogger(__name__)
 
 class AIChatbotCog(commands.Cog):
     """AI Chatbot using Google Gemini."""
 
+    # In-memory state kept across a hot reload
+    __reload_state__ = ('conversation_history',)
+
     def __init__(self, bot):
         self.bot = bot
-        self.client = None
+        self._client = None
+        self._client_initialized = False  # The genai client is created on first use
         self.conversation_history = {}  # Store conversation history per user
-        self.initialize_ai()
+
+    @property
+    def client(self):
+        """Get the AI client, initializing it on first access."""
+        if not self._client_initialized:
+            self.initialize_ai()
+        return self._client
 
     def initialize_ai(self):
         """Initialize the AI client."""
+        self._client_initialized = True
         try:
             api_key = get_ai_api_key()
             if api_key:
-                self.client = genai.Client(api_key=api_key)
+                from google import genai
+                self._client = genai.Client(api_key=api_key)
                 logger.info("✅ AI client initialized successfully")
             else:
                 logger.warning("⚠️ GEMINI_API_KEY not found in environment variables")
@@ -148,6 +157,7 @@ Answer game questions helpfully but in your sarcastic Plagg style. Always sugges
             full_prompt = f"{system_prompt}\n\nConversation history:\n" + "\n".join(conversation_parts)
 
             # Generate response
+            from google.genai import types
             response = self.client.models.generate_content(
                 model="gemini-2.5-flash",
                 contents=full_prompt,
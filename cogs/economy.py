@@ -8,10 +8,11 @@ import logging
 
 from config import COLORS, EMOJIS, get_server_config, is_module_enabled, user_has_permission
 from utils.helpers import create_embed, format_number, get_random_work_job, format_time_remaining, get_time_until_next_use
+from utils.cooldowns import persistent_cooldown
 from utils.database import get_user_rpg_data, update_user_rpg_data, ensure_user_exists
-from utils.constants import RPG_CONSTANTS, SHOP_ITEMS, DAILY_REWARDS
+from utils.constants import SHOP_ITEMS, DAILY_REWARDS
 from utils.rng_system import generate_loot_with_luck
-from replit import db
+from utils.storage import db
 
 logger = logging.getLogger(__name__)
 
@@ -125,7 +126,7 @@ class EconomyCog(commands.Cog):
         await interaction.response.send_message(embed=embed)
 
     @commands.command(name='daily', help='Claim your daily reward')
-    @commands.cooldown(1, RPG_CONSTANTS['daily_cooldown'], commands.BucketType.user)
+    @persistent_cooldown('daily')
     async def daily_command(self, ctx):
         """Claim daily reward."""
         if not is_module_enabled("economy", ctx.guild.id):
@@ -90,6 +90,7 @@ class HelpView(discord.ui.View):
                       "• **Reality Stone** - Grants any item except World Ender\n\n"
                       "**📋 Equipment Commands:**\n"
                       "• `$inventory` - View all items\n"
+                      "• `$stash [claim]` - Items that didn't fit in your inventory\n"
                       "• `$equip <item>` - Equip weapons/armor\n"
                       "• `$rarity <item>` - Check item details & rarity\n"
                       "• `$use <item>` - Use consumables\n"
@@ -102,8 +103,13 @@ class HelpView(discord.ui.View):
                       "• `$work` - Earn coins through jobs\n"
                       "• `$battle` - Fight monsters with strategy\n"
                       "• `$dungeon` - Multi-floor dungeon raids\n"
+                      "• `$dungeon party <name>` - Lead your party into a shared dungeon\n"
                       "• `$pvp <user> <arena>` - Player vs Player combat\n"
+                      "• `$pvp queue [open]` - Ranked match against a player near your rating (open: other servers too)\n"
+                      "• `$pvp ladder [global]` - Top PvP ratings\n"
                       "• `$party create/invite/leave` - Form raid groups\n"
+                      "• `$party loot fair/leader/roll` - How party dungeon loot is shared\n"
+                      "• `$worldevent [attack]` - World events and world bosses\n"
                       "• `$daily` - Claim daily streak rewards\n"
                       "• `$balance` - Check your coin balance\n"
                       "• `$pay <user> <amount>` - Transfer coins",
@@ -126,7 +132,9 @@ class HelpView(discord.ui.View):
                 value="`$shop` - View the shop\n"
                       "`$buy <item>` - Purchase an item\n"
                       "`$inventory` - View your items\n"
-                      "`$sell <item>` - Sell an item\n"
+                      "`$sell <rarity|category|item>` - Sell items in bulk\n"
+                      "`$discard <rarity|category|item>` - Discard items in bulk\n"
+                      "`$stash [claim]` - View or claim overflow items\n"
                       "`$work` - Work for coins\n"
                       "`$reload_shop` - Reload shop data (Admin)",
                 inline=False
@@ -10,12 +10,15 @@ from typing import Optional, Dict, List, Any
 from config import COLORS, EMOJIS, user_has_permission, is_module_enabled, get_server_config, update_server_config
 from utils.helpers import create_embed, format_duration
 from utils.database import get_user_data, update_user_data
-from replit import db
+from utils.storage import db
 
 logger = logging.getLogger(__name__)
 
 class ModerationCog(commands.Cog):
     """Enhanced moderation commands with auto-moderation."""
+
+    # In-memory state kept across a hot reload
+    __reload_state__ = ('muted_users', 'spam_tracker', 'warned_users')
     
     def __init__(self, bot):
         self.bot = bot
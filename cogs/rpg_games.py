@@ -4,15 +4,45 @@ from discord import app_commands
 import random
 import asyncio
 from datetime import datetime, timedelta
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Tuple, Callable
 import logging
 
 from config import COLORS, EMOJIS, get_server_config, is_module_enabled
-from utils.helpers import create_embed, format_number, create_progress_bar
+from utils.helpers import create_embed, format_number, create_progress_bar, format_time_remaining
+from utils.cooldowns import persistent_cooldown, get_retry_after, set_cooldown
+from utils.game_events import emit, merge_results, format_event_rewards
+from utils.unlock_conditions import check_class_unlock
+from utils.combat import Combatant, combatant_from_profile, combatant_from_enemy, play_turn, resolve, format_hit
+from utils.battle_sessions import (
+    BattleSession, PvPChallenge, start_battle, open_challenge, get_session, save_session, end_session,
+    load_active_sessions
+)
+from utils.pvp_rating import (
+    DEFAULT_RATING, record_result, get_rating, get_ladder, join_queue, leave_queue, get_queue_entry, pair_waiting,
+    queue_scope, OPEN_SCOPE
+)
+from utils.world_events import (
+    FLUSH_INTERVAL, tick as tick_world_events, schedule_event, active_events, upcoming_events, active_boss_event,
+    attack_boss, boss_hp, top_contributors
+)
+from utils.status_effects import apply_status_effect, start_expiry
+from utils.dungeons import (
+    DungeonRun, LOOT_MODES, get_dungeons, get_run, check_entry, start_run, start_party_run, current_floor, cast_vote, play_floor,
+    finish_run
+)
+from utils.modifiers import get_modifiers, apply_rewards, roll_item, invalidate_modifiers, format_modifiers
 from utils.database import get_user_rpg_data, update_user_rpg_data, ensure_user_exists, create_user_profile, get_leaderboard
-from utils.constants import RPG_CONSTANTS, WEAPONS, ARMOR, RARITY_COLORS, RARITY_WEIGHTS, PVP_ARENAS, OMNIPOTENT_ITEM
-from utils.rng_system import roll_with_luck, check_rare_event, get_luck_status, generate_loot_with_luck, weighted_random_choice
-from replit import db
+from utils.item_catalog import get_catalog
+from utils.content_registry import get_registry
+from utils.inventory import (
+    add_item, remove_item, has_item, has_room, total_items, used_slots, get_capacity, item_names, format_inventory_lines,
+    item_display_name, store_items, format_overflow_notice, list_stash, claim_stash, select_items, remove_items,
+    sell_value
+)
+from utils.item_search import ItemSearchIndex, get_search_index, resolve_name, format_suggestions
+from utils.constants import RPG_CONSTANTS, RARITY_COLORS, RARITY_WEIGHTS, PVP_ARENAS
+from utils.rng_system import check_rare_event, get_luck_status, weighted_random_choice
+from utils.storage import db
 
 logger = logging.getLogger(__name__)
 
@@ -46,6 +76,12 @@ def level_up_player(player_data):
     player_data['max_xp'] = xp_needed
     return None
 
+def add_event_field(embed, events):
+    """Add unlocked achievements and completed quests to a result embed."""
+    rewards_text = format_event_rewards(events)
+    if rewards_text:
+        embed.add_field(name="🏆 Progress", value=rewards_text, inline=False)
+
 def get_random_adventure_outcome():
     """Get a random adventure outcome."""
     outcomes = [
@@ -76,13 +112,6 @@ def get_random_adventure_outcome():
     ]
     return random.choice(outcomes)
 
-def calculate_battle_damage(attack, defense):
-    """Calculate battle damage."""
-    base_damage = max(1, attack - defense)
-    # Add some randomness
-    damage = random.randint(int(base_damage * 0.8), int(base_damage * 1.2))
-    return max(1, damage)
-
 class ProfileView(discord.ui.View):
     """Interactive profile view."""
 
@@ -185,7 +214,6 @@ class ProfileView(discord.ui.View):
 
     def create_inventory_embed(self) -> discord.Embed:
         """Create inventory embed."""
-        inventory = self.player_data.get('inventory', [])
         equipped = self.player_data.get('equipped', {})
 
         embed = discord.Embed(
@@ -206,15 +234,8 @@ class ProfileView(discord.ui.View):
             inline=False
         )
 
-        # Inventory items
-        if inventory:
-            items_text = ""
-            for item in inventory[:10]:  # Show first 10 items
-                items_text += f"• {item}\n"
-            if len(inventory) > 10:
-                items_text += f"... and {len(inventory) - 10} more items"
-        else:
-            items_text = "Your inventory is empty!"
+        # Inventory items (first 10 stacks)
+        items_text = format_inventory_lines(self.player_data, 10)
 
         embed.add_field(
             name="📦 Items",
@@ -255,21 +276,12 @@ def generate_random_item():
 
     chosen_rarity = random.choice(rarity_list)
 
-    # Get items of chosen rarity
-    if item_type == "weapon":
-        items = {k: v for k, v in WEAPONS.items() if v["rarity"] == chosen_rarity}
-    else:
-        items = {k: v for k, v in ARMOR.items() if v["rarity"] == chosen_rarity}
-
-    if not items:
-        # Fallback to common items
-        if item_type == "weapon":
-            items = {k: v for k, v in WEAPONS.items() if v["rarity"] == "common"}
-        else:
-            items = {k: v for k, v in ARMOR.items() if v["rarity"] == "common"}
+    # Get items of chosen rarity (falling back to common items)
+    catalog = get_catalog()
+    names = catalog.get_names_by_rarity(item_type, chosen_rarity) or catalog.get_names_by_rarity(item_type, "common")
 
-    item_name = random.choice(list(items.keys()))
-    return item_name, items[item_name]
+    item_name = random.choice(names)
+    return item_name, catalog.get_by_name(item_name)
 
 def get_rarity_emoji(rarity):
     """Get emoji for rarity."""
@@ -343,33 +355,34 @@ class AdventureView(discord.ui.View):
             # Get adventure outcome
             outcome = get_random_adventure_outcome()
 
-            # Calculate rewards with luck
-            base_coins = random.randint(*outcome['coins'])
-            base_xp = random.randint(*outcome['xp'])
-
-            enhanced_rewards = generate_loot_with_luck(self.user_id, {
-                'coins': base_coins,
-                'xp': base_xp
-            })
-
-            coins_earned = enhanced_rewards['coins']
-            xp_earned = enhanced_rewards['xp']
+            # Calculate rewards with luck, events and effects
+            modifiers = get_modifiers(player_data, self.user_id)
+            coins_earned, xp_earned = apply_rewards(
+                player_data, random.randint(*outcome['coins']), random.randint(*outcome['xp'])
+            )
 
             # Random item reward
             items_found = []
-            if roll_with_luck(self.user_id, 0.3):  # 30% chance for item
+            if roll_item(player_data, 0.3):  # 30% chance for item
                 items_found = [random.choice(outcome['items'])]
 
+            # World events can bring rare encounters with an extra item
+            rare_encounter = random.random() < modifiers.rare_chance
+            if rare_encounter:
+                items_found.append(generate_random_item()[0])
+
             # Update player data
             player_data['coins'] = player_data.get('coins', 0) + coins_earned
             player_data['xp'] = player_data.get('xp', 0) + xp_earned
             player_data['adventure_count'] = player_data.get('adventure_count', 0) + 1
 
-            # Add items to inventory
-            if items_found:
-                inventory = player_data.get('inventory', [])
-                inventory.extend(items_found)
-                player_data['inventory'] = inventory
+            # Add items to inventory (overflow goes to the stash)
+            overflow = store_items(self.user_id, player_data, items_found)
+
+            events = merge_results(
+                emit(player_data, 'adventure_completed', location=location),
+                emit(player_data, 'item_found', len(items_found))
+            )
 
             # Check for level up
             level_up_msg = level_up_player(player_data)
@@ -390,10 +403,13 @@ class AdventureView(discord.ui.View):
                 inline=True
             )
 
+            if rare_encounter:
+                embed.add_field(name="✨ Rare Encounter!", value="Something unusual crossed your path...", inline=True)
+
             if items_found:
                 embed.add_field(
                     name="📦 Items Found",
-                    value="\n".join([f"• {item}" for item in items_found]),
+                    value="\n".join([f"• {item}" for item in items_found]) + format_overflow_notice(overflow),
                     inline=True
                 )
 
@@ -404,6 +420,10 @@ class AdventureView(discord.ui.View):
                     inline=False
                 )
 
+            add_event_field(embed, events)
+            if modifiers.sources:
+                embed.set_footer(text=f"Active bonuses: {format_modifiers(modifiers)}")
+
             await interaction.followup.send(embed=embed)
 
         except Exception as e:
@@ -562,14 +582,7 @@ class ShopView(discord.ui.View):
 
     def get_category_items(self) -> Dict[str, Any]:
         """Get items for the current category."""
-        from utils.constants import SHOP_ITEMS
-        
-        category_items = {}
-        for item_id, item_data in SHOP_ITEMS.items():
-            if item_data.get('category') == self.current_category:
-                category_items[item_id] = item_data
-        
-        return category_items
+        return get_catalog().get_shop_category(self.current_category)
 
     async def category_callback(self, interaction: discord.Interaction):
         """Handle category selection."""
@@ -726,12 +739,10 @@ class ShopView(discord.ui.View):
 
     def create_item_detail_embed(self) -> discord.Embed:
         """Create detailed item view embed."""
-        from utils.constants import SHOP_ITEMS
-        
-        if not self.selected_item or self.selected_item not in SHOP_ITEMS:
+        item_data = get_catalog().get_shop_item(self.selected_item) if self.selected_item else None
+        if not item_data:
             return self.create_shop_embed()
 
-        item_data = SHOP_ITEMS[self.selected_item]
         rarity = item_data.get('rarity', 'common')
         color = RARITY_COLORS.get(rarity, COLORS['primary'])
         emoji = get_rarity_emoji(rarity)
@@ -817,22 +828,27 @@ class ShopView(discord.ui.View):
 
     async def process_purchase(self, interaction: discord.Interaction):
         """Process the item purchase."""
-        from utils.constants import SHOP_ITEMS
-        
         try:
             player_data = get_user_rpg_data(self.user_id)
             if not player_data:
                 await interaction.response.send_message("❌ Could not retrieve your data!", ephemeral=True)
                 return
 
-            if self.selected_item not in SHOP_ITEMS:
+            item_data = get_catalog().get_shop_item(self.selected_item)
+            if not item_data:
                 await interaction.response.send_message("❌ Invalid item selected!", ephemeral=True)
                 return
 
-            item_data = SHOP_ITEMS[self.selected_item]
             price = item_data.get('price', 0)
             coins = player_data.get('coins', 0)
 
+            if not has_room(player_data, item_data['id']):
+                await interaction.response.send_message(
+                    "❌ **Inventory full!** Sell or discard some items first.",
+                    ephemeral=True
+                )
+                return
+
             if coins < price:
                 await interaction.response.send_message(
                     f"❌ **Insufficient funds!**\n"
@@ -844,14 +860,8 @@ class ShopView(discord.ui.View):
 
             # Process purchase
             player_data['coins'] = coins - price
-            inventory = player_data.get('inventory', [])
-            inventory.append(item_data['name'])
-            player_data['inventory'] = inventory
-
-            # Update stats if needed
-            stats = player_data.get('stats', {})
-            stats['items_purchased'] = stats.get('items_purchased', 0) + 1
-            player_data['stats'] = stats
+            add_item(player_data, item_data['id'])
+            events = emit(player_data, 'item_purchased', item=item_data['id'])
 
             update_user_rpg_data(self.user_id, player_data)
 
@@ -880,6 +890,7 @@ class ShopView(discord.ui.View):
                       "• Use `$use <item>` for consumables",
                 inline=True
             )
+            add_event_field(embed, events)
 
             embed.set_footer(text="💡 Thanks for shopping at Plagg's Chaos Shop!")
 
@@ -908,40 +919,33 @@ class LootboxView(discord.ui.View):
             await interaction.response.send_message("❌ Could not retrieve your data!", ephemeral=True)
             return
 
-        inventory = player_data.get('inventory', [])
-        if "Lootbox" not in inventory:
+        # Remove lootbox from inventory
+        if not remove_item(player_data, "Lootbox"):
             await interaction.response.send_message("❌ You don't have any lootboxes!", ephemeral=True)
             return
 
-        # Remove lootbox from inventory
-        inventory.remove("Lootbox")
-        player_data['inventory'] = inventory
-
         # Generate loot
         rewards = []
         coins_reward = 0
 
-        # Always get coins
-        coins_reward = random.randint(100, 1000)
+        # Always get coins (world events such as the Cheese Storm multiply them)
+        coins_reward = int(random.randint(100, 1000) * get_modifiers(player_data, self.user_id).coins)
 
         # Chance for items
         for _ in range(3):  # 3 chances for items
-            if roll_with_luck(self.user_id, 0.4):  # 40% chance per roll
+            if roll_item(player_data, 0.4):  # 40% chance per roll
                 item_name, item_data = generate_random_item()
                 rewards.append(item_name)
-                inventory.append(item_name)
 
         # Super rare chance for omnipotent items
-        if roll_with_luck(self.user_id, 0.001):  # 0.1% chance
+        if roll_item(player_data, 0.001):  # 0.1% chance
             if random.choice([True, False]):
                 rewards.append("World Ender")
-                inventory.append("World Ender")
             else:
                 rewards.append("Reality Stone")
-                inventory.append("Reality Stone")
 
+        overflow = store_items(self.user_id, player_data, rewards)
         player_data['coins'] = player_data.get('coins', 0) + coins_reward
-        player_data['inventory'] = inventory
         update_user_rpg_data(self.user_id, player_data)
 
         # Create result embed
@@ -953,49 +957,62 @@ class LootboxView(discord.ui.View):
 
         if rewards:
             items_text = ""
+            catalog = get_catalog()
             for item in rewards:
-                if item in WEAPONS:
-                    rarity = WEAPONS[item]["rarity"]
-                elif item in ARMOR:
-                    rarity = ARMOR[item]["rarity"]
-                elif item == "Reality Stone":
-                    rarity = "omnipotent"
-                else:
-                    rarity = "common"
+                rarity = catalog.get_rarity(item)
 
                 emoji = get_rarity_emoji(rarity)
                 items_text += f"{emoji} **{item}** ({rarity})\n"
 
-            embed.add_field(name="🎯 Items Found", value=items_text, inline=False)
+            embed.add_field(name="🎯 Items Found", value=items_text + format_overflow_notice(overflow), inline=False)
 
         button.disabled = True
         await interaction.response.edit_message(embed=embed, view=self)
 
 class PvPView(discord.ui.View):
-    """PvP battle view."""
-
-    def __init__(self, challenger_id: str, target_id: str, arena: str):
-        super().__init__(timeout=300)
-        self.challenger_id = challenger_id
-        self.target_id = target_id
-        self.arena = arena
+    """PvP battle view, rebuilt from its challenge session after a restart."""
+
+    def __init__(self, challenge: PvPChallenge):
+        super().__init__(timeout=None)
+        self.session_id = challenge.session_id
+        self.challenger_id = challenge.challenger_id
+        self.target_id = challenge.target_id
+        self.arena = challenge.arena
         self.accepted = False
+        for item in self.children:
+            item.custom_id = f"pvp:{challenge.session_id}:{item.custom_id}"
 
-    @discord.ui.button(label="⚔️ Accept Challenge", style=discord.ButtonStyle.success)
-    async def accept_challenge(self, interaction: discord.Interaction, button: discord.ui.Button):
-        """Accept the PvP challenge."""
+    async def claim_challenge(self, interaction: discord.Interaction) -> bool:
+        """Check the target is responding to a live challenge, and close it."""
         if str(interaction.user.id) != self.target_id:
             await interaction.response.send_message("❌ This challenge is not for you!", ephemeral=True)
+            return False
+
+        challenge = get_session(self.session_id)
+        for item in self.children:
+            item.disabled = True
+        self.stop()
+
+        if not challenge:
+            await interaction.response.edit_message(content="⌛ This challenge has expired.", view=self)
+            return False
+
+        end_session(challenge)
+        return True
+
+    @discord.ui.button(label="⚔️ Accept Challenge", style=discord.ButtonStyle.success, custom_id="accept")
+    async def accept_challenge(self, interaction: discord.Interaction, button: discord.ui.Button):
+        """Accept the PvP challenge."""
+        if not await self.claim_challenge(interaction):
             return
 
         self.accepted = True
         await self.start_pvp_battle(interaction)
 
-    @discord.ui.button(label="❌ Decline", style=discord.ButtonStyle.danger)
+    @discord.ui.button(label="❌ Decline", style=discord.ButtonStyle.danger, custom_id="decline")
     async def decline_challenge(self, interaction: discord.Interaction, button: discord.ui.Button):
         """Decline the PvP challenge."""
-        if str(interaction.user.id) != self.target_id:
-            await interaction.response.send_message("❌ This challenge is not for you!", ephemeral=True)
+        if not await self.claim_challenge(interaction):
             return
 
         embed = discord.Embed(
@@ -1011,96 +1028,74 @@ class PvPView(discord.ui.View):
 
     async def start_pvp_battle(self, interaction):
         """Start the actual PvP battle."""
-        challenger_data = get_user_rpg_data(self.challenger_id)
-        target_data = get_user_rpg_data(self.target_id)
-
-        if not challenger_data or not target_data:
+        embed = run_pvp_match(self.challenger_id, self.target_id, self.arena)
+        if embed is None:
             await interaction.response.send_message("❌ Could not retrieve player data!", ephemeral=True)
             return
 
-        # Calculate battle stats
-        challenger_attack = challenger_data.get('attack', 10)
-        challenger_hp = challenger_data.get('hp', 100)
-        challenger_defense = challenger_data.get('defense', 5)
-
-        target_attack = target_data.get('attack', 10)
-        target_hp = target_data.get('hp', 100)
-        target_defense = target_data.get('defense', 5)
+        for item in self.children:
+            item.disabled = True
 
-        # Check for super rare weapons
-        challenger_inventory = challenger_data.get('inventory', [])
-        target_inventory = target_data.get('inventory', [])
+        await interaction.response.edit_message(embed=embed, view=self)
 
-        if "World Ender" in challenger_inventory:
-            challenger_attack = 999999
-        if "World Ender" in target_inventory:
-            target_attack = 999999
 
-        # Battle simulation
-        battle_log = []
-        turn = 1
+def run_pvp_match(challenger_id: str, target_id: str, arena: Optional[str] = None) -> Optional[discord.Embed]:
+    """Fight a PvP match, applying the rating change and any arena stakes. Returns the result embed."""
+    challenger_data = get_user_rpg_data(challenger_id)
+    target_data = get_user_rpg_data(target_id)
 
-        while challenger_hp > 0 and target_hp > 0 and turn <= 10:
-            # Challenger attacks
-            damage = calculate_battle_damage(challenger_attack, target_defense)
-            target_hp -= damage
-            battle_log.append(f"Round {turn}: Challenger deals {damage} damage!")
+    if not challenger_data or not target_data:
+        return None
 
-            if target_hp <= 0:
-                break
+    # Battle simulation (up to 10 rounds, replayable from the seed)
+    result = resolve(
+        combatant_from_profile(challenger_data, "Challenger", challenger_id),
+        combatant_from_profile(target_data, "Target", target_id)
+    )
+    battle_log = [f"Round {hit.turn}: {format_hit(hit)}" for hit in result.hits]
 
-            # Target attacks
-            damage = calculate_battle_damage(target_attack, challenger_defense)
-            challenger_hp -= damage
-            battle_log.append(f"Round {turn}: Target deals {damage} damage!")
+    # Determine winner
+    if result.winner.combatant_id == challenger_id:
+        winner, loser = challenger_id, target_id
+        winner_data, loser_data = challenger_data, target_data
+    else:
+        winner, loser = target_id, challenger_id
+        winner_data, loser_data = target_data, challenger_data
 
-            turn += 1
+    # Rate the result before the events count it as a played match
+    winner_delta, loser_delta = record_result(winner, winner_data, loser, loser_data)
 
-        # Determine winner
-        arena_data = PVP_ARENAS[self.arena]
+    # Ranked matches have no arena and only stake rating
+    description = f"**Winner:** <@{winner}>"
+    if arena:
+        arena_data = PVP_ARENAS[arena]
         entry_fee = arena_data["entry_fee"]
-        winner_reward = entry_fee * arena_data["winner_multiplier"]
-
-        if challenger_hp > target_hp:
-            winner = self.challenger_id
-            loser = self.target_id
-            winner_data = challenger_data
-            loser_data = target_data
-        else:
-            winner = self.target_id
-            loser = self.challenger_id
-            winner_data = target_data
-            loser_data = challenger_data
-
-        # Update winner's data
+        winner_reward = int(entry_fee * arena_data["winner_multiplier"])
         winner_data['coins'] = winner_data.get('coins', 0) + winner_reward
-        winner_stats = winner_data.get('stats', {})
-        winner_stats['pvp_wins'] = winner_stats.get('pvp_wins', 0) + 1
-        winner_data['stats'] = winner_stats
-
-        # Update loser's data
         loser_data['coins'] = max(0, loser_data.get('coins', 0) - entry_fee)
-        loser_stats = loser_data.get('stats', {})
-        loser_stats['pvp_losses'] = loser_stats.get('pvp_losses', 0) + 1
-        loser_data['stats'] = loser_stats
-
-        update_user_rpg_data(winner, winner_data)
-        update_user_rpg_data(loser, loser_data)
+        description += f"\n**Reward:** {format_number(winner_reward)} coins"
 
-        # Create result embed
-        embed = discord.Embed(
-            title=f"⚔️ PvP Battle Complete - {self.arena}",
-            description=f"**Winner:** <@{winner}>\n**Reward:** {format_number(winner_reward)} coins",
-            color=COLORS['success']
-        )
+    winner_events = emit(winner_data, 'pvp_won', opponent=loser)
+    emit(loser_data, 'pvp_lost', opponent=winner)
 
-        battle_text = "\n".join(battle_log[:6])  # Show first 6 rounds
-        embed.add_field(name="🥊 Battle Log", value=battle_text, inline=False)
+    update_user_rpg_data(winner, winner_data)
+    update_user_rpg_data(loser, loser_data)
 
-        for item in self.children:
-            item.disabled = True
+    # Create result embed
+    title = f"⚔️ PvP Battle Complete - {PVP_ARENAS[arena]['name']}" if arena else "⚔️ Ranked PvP Match Complete"
+    embed = discord.Embed(title=title, description=description, color=COLORS['success'])
 
-        await interaction.response.edit_message(embed=embed, view=self)
+    battle_text = "\n".join(battle_log[:6])  # Show first 6 rounds
+    embed.add_field(name="🥊 Battle Log", value=battle_text, inline=False)
+    embed.add_field(
+        name="📈 Rating",
+        value=f"<@{winner}>: {winner_data['pvp_rating']} (+{winner_delta})\n"
+              f"<@{loser}>: {loser_data['pvp_rating']} ({loser_delta})",
+        inline=False
+    )
+    add_event_field(embed, winner_events)
+    embed.set_footer(text=f"Battle seed: {result.seed}")
+    return embed
 
 class TradeView(discord.ui.View):
     """Trading system view."""
@@ -1192,24 +1187,26 @@ class TradeView(discord.ui.View):
         await interaction.response.edit_message(embed=embed, view=self)
 
 class BattleView(discord.ui.View):
-    """Interactive battle view."""
+    """Interactive battle view, rebuilt from its session after a restart."""
 
-    def __init__(self, user_id: str, enemy_data: Dict[str, Any]):
-        super().__init__(timeout=300)
-        self.user_id = user_id
-        self.enemy_data = enemy_data
+    def __init__(self, session: BattleSession):
+        super().__init__(timeout=None)
+        self.session_id = session.session_id
+        # Persistent views need a custom_id per button; the session ID routes presses back here
+        for item in self.children:
+            item.custom_id = f"battle:{session.session_id}:{item.custom_id}"
 
-    @discord.ui.button(label="⚔️ Attack", style=discord.ButtonStyle.danger)
+    @discord.ui.button(label="⚔️ Attack", style=discord.ButtonStyle.danger, custom_id="attack")
     async def attack_button(self, interaction: discord.Interaction, button: discord.ui.Button):
         """Attack the enemy."""
         await self.process_battle_action(interaction, "attack")
 
-    @discord.ui.button(label="🛡️ Defend", style=discord.ButtonStyle.secondary)
+    @discord.ui.button(label="🛡️ Defend", style=discord.ButtonStyle.secondary, custom_id="defend")
     async def defend_button(self, interaction: discord.Interaction, button: discord.ui.Button):
         """Defend against enemy attack."""
         await self.process_battle_action(interaction, "defend")
 
-    @discord.ui.button(label="🧪 Use Item", style=discord.ButtonStyle.success)
+    @discord.ui.button(label="🧪 Use Item", style=discord.ButtonStyle.success, custom_id="item")
     async def item_button(self, interaction: discord.Interaction, button: discord.ui.Button):
         """Use an item."""
         await self.process_battle_action(interaction, "item")
@@ -1217,109 +1214,435 @@ class BattleView(discord.ui.View):
     async def process_battle_action(self, interaction: discord.Interaction, action: str):
         """Process battle action."""
         try:
-            player_data = get_user_rpg_data(self.user_id)
-            if not player_data:
-                await interaction.response.send_message("❌ Could not retrieve your data!", ephemeral=True)
+            session = get_session(self.session_id)
+            if not session:
+                for item in self.children:
+                    item.disabled = True
+                self.stop()
+                await interaction.response.edit_message(content="⌛ This battle has expired.", view=self)
                 return
 
-            player_hp = player_data.get('hp', 100)
-            player_attack = player_data.get('attack', 10)
-            player_defense = player_data.get('defense', 5)
+            if str(interaction.user.id) != session.user_id:
+                await interaction.response.send_message("❌ This is not your battle!", ephemeral=True)
+                return
 
-            enemy_hp = self.enemy_data.get('hp', 50)
-            enemy_attack = self.enemy_data.get('attack', 8)
+            if action == "item":
+                await interaction.response.send_message("🧪 Items can't be used mid-battle yet!", ephemeral=True)
+                return
 
-            battle_result = ""
+            player, enemy = session.combatants()
+            session.turn += 1
+            hits = play_turn(player, enemy, session.seed, session.turn, action)
+            session.set_combatants(player, enemy)
 
-            if action == "attack":
-                # Player attacks
-                damage = calculate_battle_damage(player_attack, 0)
-                enemy_hp -= damage
-                battle_result += f"You dealt {damage} damage to {self.enemy_data['name']}!\n"
+            battle_result = "You defended!\n" if action == "defend" else ""
+            battle_result += "\n".join(format_hit(hit) for hit in hits) + "\n"
 
-                # Enemy attacks back if still alive
-                if enemy_hp > 0:
-                    enemy_damage = calculate_battle_damage(enemy_attack, player_defense)
-                    player_hp -= enemy_damage
-                    battle_result += f"{self.enemy_data['name']} dealt {enemy_damage} damage to you!\n"
+            if not player.alive or not enemy.alive:
+                embed = self.finish_battle(session, player, enemy, battle_result)
 
-            elif action == "defend":
-                # Reduced damage when defending
-                enemy_damage = calculate_battle_damage(enemy_attack, player_defense * 2)
-                player_hp -= enemy_damage
-                battle_result += f"You defended! {self.enemy_data['name']} dealt {enemy_damage} damage!\n"
+                # Disable all buttons
+                for item in self.children:
+                    item.disabled = True
+                self.stop()
+            else:
+                # Battle continues; only the session record changes until the end
+                save_session(session)
 
-            # Check battle outcome
-            if enemy_hp <= 0:
-                # Victory
-                coins_reward = random.randint(50, 150)
-                xp_reward = random.randint(20, 50)
+                embed = discord.Embed(
+                    title=f"⚔️ Battle vs {enemy.name}",
+                    description=f"{battle_result}\n\n"
+                               f"**Your HP:** {player.hp}/{player.max_hp}\n"
+                               f"**{enemy.name} HP:** {enemy.hp}/{enemy.max_hp}",
+                    color=COLORS['warning']
+                )
 
-                player_data['coins'] = player_data.get('coins', 0) + coins_reward
-                player_data['xp'] = player_data.get('xp', 0) + xp_reward
+            await interaction.response.edit_message(embed=embed, view=self)
 
-                stats = player_data.get('stats', {})
-                stats['battles_won'] = stats.get('battles_won', 0) + 1
-                player_data['stats'] = stats
+        except Exception as e:
+            logger.exception(f"Battle error: {e}")
+            if not interaction.response.is_done():
+                await interaction.response.send_message("❌ Battle error! Please try again.", ephemeral=True)
 
-                embed = discord.Embed(
-                    title="🎉 Victory!",
-                    description=f"{battle_result}\n**You defeated {self.enemy_data['name']}!**\n\n"
-                               f"**Rewards:**\n"
-                               f"Coins: {format_number(coins_reward)}\n"
-                               f"XP: {xp_reward}",
-                    color=COLORS['success']
-                )
+    def finish_battle(self, session: BattleSession, player: Combatant, enemy: Combatant,
+                      battle_result: str) -> discord.Embed:
+        """Commit the battle's outcome to the profile and end the session."""
+        end_session(session)
 
-                # Disable all buttons
-                for item in self.children:
-                    item.disabled = True
+        player_data = get_user_rpg_data(session.user_id)
+        if not player_data:
+            return create_embed("❌ Battle Error", "Could not retrieve your data!", COLORS['error'])
 
-            elif player_hp <= 0:
-                # Defeat
-                player_data['hp'] = 0
-                stats = player_data.get('stats', {})
-                stats['battles_lost'] = stats.get('battles_lost', 0) + 1
-                player_data['stats'] = stats
+        if not enemy.alive:
+            # Victory
+            coins_reward = random.randint(50, 150)
+            xp_reward = random.randint(20, 50)
 
-                embed = discord.Embed(
-                    title="💀 Defeat!",
-                    description=f"{battle_result}\n**You were defeated by {self.enemy_data['name']}!**\n\n"
-                               f"You need to heal before your next battle.",
-                    color=COLORS['error']
-                )
+            player_data['hp'] = player.hp
+            player_data['coins'] = player_data.get('coins', 0) + coins_reward
+            player_data['xp'] = player_data.get('xp', 0) + xp_reward
+            events = emit(player_data, 'battle_won', enemy=enemy.name, in_battle=True,
+                          hp_percent=player.hp_percent)
 
-                # Disable all buttons
-                for item in self.children:
-                    item.disabled = True
+            embed = discord.Embed(
+                title="🎉 Victory!",
+                description=f"{battle_result}\n**You defeated {enemy.name}!**\n\n"
+                           f"**Rewards:**\n"
+                           f"Coins: {format_number(coins_reward)}\n"
+                           f"XP: {xp_reward}",
+                color=COLORS['success']
+            )
+            add_event_field(embed, events)
+        else:
+            # Defeat
+            player_data['hp'] = 0
+            emit(player_data, 'battle_lost', enemy=enemy.name)
 
-            else:
-                # Battle continues
-                self.enemy_data['hp'] = enemy_hp
-                player_data['hp'] = player_hp
+            embed = discord.Embed(
+                title="💀 Defeat!",
+                description=f"{battle_result}\n**You were defeated by {enemy.name}!**\n\n"
+                           f"You need to heal before your next battle.",
+                color=COLORS['error']
+            )
 
-                embed = discord.Embed(
-                    title=f"⚔️ Battle vs {self.enemy_data['name']}",
-                    description=f"{battle_result}\n\n"
-                               f"**Your HP:** {player_hp}/{player_data.get('max_hp', 100)}\n"
-                               f"**{self.enemy_data['name']} HP:** {enemy_hp}/{self.enemy_data.get('max_hp', enemy_hp)}",
-                    color=COLORS['warning']
-                )
+        update_user_rpg_data(session.user_id, player_data)
+        return embed
 
-            # Update player data
-            update_user_rpg_data(self.user_id, player_data)
 
+class DungeonAnswerModal(discord.ui.Modal, title="🧩 Solve the Puzzle"):
+    """Modal for typing a dungeon puzzle's answer."""
+
+    answer = discord.ui.TextInput(label="Your answer", max_length=100)
+
+    def __init__(self, dungeon_view: 'DungeonView', index: int):
+        super().__init__()
+        self.dungeon_view = dungeon_view
+        self.index = index
+
+    async def on_submit(self, interaction: discord.Interaction):
+        await self.dungeon_view.play(interaction, self.index, str(self.answer))
+
+
+class DungeonButton(discord.ui.Button):
+    """One option on a dungeon floor."""
+
+    def __init__(self, run: DungeonRun, index: int, option):
+        super().__init__(
+            label=option.label[:80],
+            style=discord.ButtonStyle.danger if option.outcome.enemy else discord.ButtonStyle.primary,
+            custom_id=f"dungeon:{run.session_id}:{run.floor}:{index}"
+        )
+        self.index = index
+        self.needs_answer = bool(option.outcome.answer)
+
+    async def callback(self, interaction: discord.Interaction):
+        if self.needs_answer:
+            if await self.view.check_run(interaction):
+                await interaction.response.send_modal(DungeonAnswerModal(self.view, self.index))
+            return
+        await self.view.play(interaction, self.index)
+
+
+class DungeonView(discord.ui.View):
+    """The options of a dungeon run's current floor, rebuilt from the run after a restart."""
+
+    def __init__(self, run: DungeonRun):
+        super().__init__(timeout=None)
+        self.session_id = run.session_id
+        self.floor = run.floor
+        floor = current_floor(run)
+        for index, option in enumerate(floor.options if floor else ()):
+            self.add_item(DungeonButton(run, index, option))
+
+    async def check_run(self, interaction: discord.Interaction) -> Optional[DungeonRun]:
+        """Get the run if it is still on this floor and the presser can act in it."""
+        run = get_session(self.session_id)
+        if not isinstance(run, DungeonRun) or run.floor != self.floor:
+            for item in self.children:
+                item.disabled = True
+            self.stop()
+            await interaction.response.edit_message(content="⌛ This dungeon floor is no longer active.", view=self)
+            return None
+
+        user_id = str(interaction.user.id)
+        if user_id not in run.members:
+            await interaction.response.send_message("❌ This is not your dungeon run!", ephemeral=True)
+            return None
+        if run.members[user_id][0] <= 0:
+            await interaction.response.send_message("💀 You are knocked out! Your party fights on without you.",
+                                                    ephemeral=True)
+            return None
+        return run
+
+    async def play(self, interaction: discord.Interaction, index: int, answer: Optional[str] = None):
+        """Vote for an option, and once the vote closes play it and show the next floor or the result."""
+        try:
+            run = await self.check_run(interaction)
+            if not run:
+                return
+
+            choice = cast_vote(run, str(interaction.user.id), index, answer)
+            if choice is None:
+                # Party members pressing around the same time share one edit of the message
+                await interaction.response.defer()
+                shared_edits.schedule(run.session_id, interaction.message, lambda: live_dungeon_embed(run, self.floor))
+                return
+            shared_edits.cancel(run.session_id)
+
+            profiles = {user_id: get_user_rpg_data(user_id) for user_id in run.members}
+            if not all(profiles.values()):
+                await interaction.response.send_message("❌ Could not retrieve player data!", ephemeral=True)
+                return
+
+            # Only the run record is saved per floor; each profile is written once at the end
+            option_index, answers = choice
+            lines, state = play_floor(run, option_index, profiles, answers)
+            self.stop()
+            if state == 'continue':
+                await interaction.response.edit_message(embed=dungeon_embed(run, lines), view=DungeonView(run))
+                return
+
+            embed = self.finish_dungeon(run, profiles, state, lines)
+            for item in self.children:
+                item.disabled = True
             await interaction.response.edit_message(embed=embed, view=self)
 
         except Exception as e:
-            logger.error(f"Battle error: {e}")
-            await interaction.response.send_message("❌ Battle error! Please try again.", ephemeral=True)
+            logger.exception(f"Dungeon error: {e}")
+            if not interaction.response.is_done():
+                await interaction.response.send_message("❌ Dungeon error! Please try again.", ephemeral=True)
+
+    def finish_dungeon(self, run: DungeonRun, profiles: Dict[str, Dict[str, Any]], state: str,
+                       lines: List[str]) -> discord.Embed:
+        """Commit the run's outcome to every member's profile."""
+        table = get_dungeons()[run.dungeon]
+        results = finish_run(run, profiles, state)
+
+        if state == 'cleared' and not run.party_id:
+            player_data, result = profiles[run.user_id], results[run.user_id]
+            level_up_msg = level_up_player(player_data)
+            embed = discord.Embed(
+                title=f"🏆 {table.name} Cleared!",
+                description="\n".join(lines) + f"\n\n**You conquered all {len(table.floors)} floors!**",
+                color=COLORS['success']
+            )
+            rewards = f"💰 {format_number(result['coins'])} coins\n⭐ {format_number(result['xp'])} XP"
+            if result['items']:
+                rewards += "\n🎁 " + ", ".join(item_display_name(item) for item in result['items'])
+            embed.add_field(name="Rewards", value=rewards + format_overflow_notice(result['overflow']), inline=False)
+            if level_up_msg:
+                embed.add_field(name="Level Up!", value=level_up_msg, inline=False)
+            add_event_field(embed, result['events'])
+            bonuses = format_modifiers(get_modifiers(player_data, run.user_id))
+            if bonuses:
+                embed.set_footer(text=f"Active bonuses: {bonuses}")
+        elif state == 'cleared':
+            embed = discord.Embed(
+                title=f"🏆 {table.name} Cleared!",
+                description="\n".join(lines) + f"\n\n**Your party conquered all {len(table.floors)} floors!**",
+                color=COLORS['success']
+            )
+            shares, progress = [], []
+            for user_id, result in results.items():
+                share = f"<@{user_id}>: 💰 {format_number(result['coins'])} • ⭐ {format_number(result['xp'])} XP"
+                if result['items']:
+                    share += " • 🎁 " + ", ".join(item_display_name(item) for item in result['items'])
+                level_up_msg = level_up_player(profiles[user_id])
+                if level_up_msg:
+                    share += f"\n{level_up_msg}"
+                shares.append(share + format_overflow_notice(result['overflow']))
+                rewards_text = format_event_rewards(result['events'])
+                if rewards_text:
+                    progress.append(f"<@{user_id}>\n{rewards_text}")
+            embed.add_field(name=f"Rewards ({run.loot_mode} loot)", value="\n".join(shares)[:1024], inline=False)
+            if progress:
+                embed.add_field(name="🏆 Progress", value="\n".join(progress)[:1024], inline=False)
+        else:
+            who = "Your party" if run.party_id else "You"
+            embed = discord.Embed(
+                title=f"💀 Defeated in {table.name}",
+                description="\n".join(lines) + f"\n\n**{who} fell on floor {run.floor + 1}** and lost the loot "
+                            f"gathered.\nHeal before your next adventure.",
+                color=COLORS['error']
+            )
+
+        for user_id, player_data in profiles.items():
+            update_user_rpg_data(user_id, player_data)
+
+        if run.party_id:
+            from utils.database import get_party_data, update_party_data
+            party_data = get_party_data(run.party_id)
+            if party_data and party_data.get('active_dungeon') == run.dungeon:
+                party_data['active_dungeon'] = None
+                update_party_data(run.party_id, party_data)
+        return embed
+
+
+class SharedMessageEditor:
+    """Coalesces edits of messages shared by several players.
+
+    A press that doesn't change the floor is acknowledged straight away, and
+    every such press within EDIT_DELAY seconds is shown by one edit of the
+    latest state, so a party costs about as many edits as a solo player.
+    """
+
+    EDIT_DELAY = 1.5
+
+    def __init__(self):
+        self.pending: Dict[str, Tuple[discord.Message, Callable[[], Optional[discord.Embed]]]] = {}
+        self.tasks: set = set()
+
+    def schedule(self, key: str, message: discord.Message, render: Callable[[], Optional[discord.Embed]]):
+        """Queue an edit of a message, replacing any edit already queued for it.
+
+        render is called when the edit is made and may return None to skip it.
+        """
+        queued = key in self.pending
+        self.pending[key] = (message, render)
+        if not queued:
+            task = asyncio.create_task(self.edit_later(key))
+            self.tasks.add(task)
+            task.add_done_callback(self.tasks.discard)
+
+    def cancel(self, key: str):
+        """Drop a queued edit (the message is being edited directly)."""
+        self.pending.pop(key, None)
+
+    async def edit_later(self, key: str):
+        """Make the queued edit once the delay has passed."""
+        await asyncio.sleep(self.EDIT_DELAY)
+        entry = self.pending.pop(key, None)
+        if entry is None:
+            return
+        message, render = entry
+        try:
+            embed = render()
+            if embed is not None:
+                await message.edit(embed=embed)
+        except Exception as e:
+            logger.error(f"Error updating shared message {message.id}: {e}")
+
+
+shared_edits = SharedMessageEditor()
+
+
+def live_dungeon_embed(run: DungeonRun, floor: int) -> Optional[discord.Embed]:
+    """Show a run's floor, or None if the run has ended or moved on since."""
+    if get_session(run.session_id) is not run or run.floor != floor:
+        return None
+    return dungeon_embed(run)
+
+
+def dungeon_embed(run: DungeonRun, lines: Optional[List[str]] = None) -> discord.Embed:
+    """Show a dungeon run's current floor."""
+    table = get_dungeons()[run.dungeon]
+    floor = table.floors[run.floor]
+    description = "\n".join(lines) + "\n\n" if lines else ""
+    embed = discord.Embed(
+        title=f"{'👥' if run.party_id else '🏰'} {table.name} - Floor {run.floor + 1}/{len(table.floors)}",
+        description=f"{description}**{floor.title}**\n{floor.description}",
+        color=COLORS['error'] if floor.boss else COLORS['primary']
+    )
+    if run.party_id:
+        party_hp = "\n".join(f"{'💀' if hp <= 0 else '❤️'} <@{user_id}> {max(0, hp)}/{max_hp}"
+                             for user_id, (hp, max_hp) in run.members.items())
+        embed.add_field(name="👥 Party", value=party_hp, inline=True)
+    else:
+        embed.add_field(name="❤️ HP",
+                        value=f"{run.hp}/{run.max_hp}\n{create_progress_bar(100 * run.hp / run.max_hp)}", inline=True)
+    loot = f"💰 {format_number(run.coins)} coins\n⭐ {format_number(run.xp)} XP"
+    if run.items:
+        loot += f"\n🎁 {len(run.items)} items"
+    embed.add_field(name="🎒 Gathered", value=loot, inline=True)
+    if run.effects:
+        embed.add_field(name="✨ Boons", value=", ".join(effect.replace('_', ' ').title() for effect in run.effects),
+                        inline=True)
+    if run.votes:
+        counts = {}
+        for choice, _ in run.votes.values():
+            counts[choice] = counts.get(choice, 0) + 1
+        votes = "\n".join(f"{floor.options[choice].label}: {count}" for choice, count in counts.items())
+        embed.add_field(name=f"🗳️ Votes ({len(run.votes)}/{len(run.standing())})", value=votes, inline=False)
+    if run.party_id:
+        embed.set_footer(text="Every standing member votes; the most popular choice is played. "
+                              "Clear the final floor to keep your loot!")
+    else:
+        embed.set_footer(text="Clear the final floor to keep your loot. Falling loses it!")
+    return embed
+
 
 class RPGGamesCog(commands.Cog):
     """RPG Games system for the bot."""
 
+    MATCHMAKING_INTERVAL = 10  # Seconds between pairing passes over the ranked queues
+
     def __init__(self, bot):
         self.bot = bot
+        self.matchmaking_task = None
+        self.world_event_task = None
+
+    async def cog_load(self):
+        """Re-attach the views of battles, challenges and dungeon runs in progress, and start the background loops."""
+        for session in load_active_sessions():
+            if isinstance(session, BattleSession):
+                view = BattleView(session)
+            elif isinstance(session, DungeonRun):
+                view = DungeonView(session)
+            else:
+                view = PvPView(session)
+            self.bot.add_view(view, message_id=session.message_id)
+        start_expiry()
+        self.matchmaking_task = asyncio.create_task(self.matchmaking_loop())
+        self.world_event_task = asyncio.create_task(self.world_event_loop())
+
+    async def cog_unload(self):
+        """Stop matchmaking and the world event loop."""
+        for task in (self.matchmaking_task, self.world_event_task):
+            if task:
+                task.cancel()
+
+    async def matchmaking_loop(self):
+        """Pair queued players as their rating windows widen, and drop those who waited too long."""
+        while True:
+            await asyncio.sleep(self.MATCHMAKING_INTERVAL)
+            try:
+                pairs, expired = pair_waiting()
+                for first, second in pairs:
+                    await self.play_ranked_match(first, second)
+                for entry in expired:
+                    channel = self.bot.get_channel(entry.channel_id)
+                    if channel:
+                        await channel.send(f"⌛ <@{entry.user_id}> no opponent was found, you have left the ranked queue.")
+            except Exception as e:
+                logger.error(f"Error in PvP matchmaking: {e}")
+
+    async def world_event_loop(self):
+        """Flush raid damage and advance world events, announcing starts, ends and payouts."""
+        messages = {
+            "started": "🌍 **{name}** has begun! Use `$worldevent` to see how to take part.",
+            "ended": "🏁 **{name}** is over ({outcome}). Rewards are on their way!",
+            "rewarded": "🎁 Rewards for **{name}** have been handed out. Check `$inventory`!"
+        }
+        while True:
+            try:
+                for change, event in await tick_world_events():
+                    channel = self.bot.get_channel(event.channel_id) if event.channel_id else None
+                    if channel:
+                        await channel.send(messages[change].format(name=event.name, outcome=event.outcome))
+            except Exception as e:
+                logger.error(f"Error in world event loop: {e}")
+            await asyncio.sleep(FLUSH_INTERVAL)
+
+    async def play_ranked_match(self, first, second):
+        """Fight a ranked match between two queue entries and post the result to their channels."""
+        embed = run_pvp_match(first.user_id, second.user_id)
+        if embed is None:
+            return
+
+        for channel_id in dict.fromkeys((first.channel_id, second.channel_id)):
+            channel = self.bot.get_channel(channel_id)
+            if channel:
+                await channel.send(content=f"<@{first.user_id}> vs <@{second.user_id}>", embed=embed)
 
     # Slash command versions
     @app_commands.command(name="profile", description="View your character profile")
@@ -1411,7 +1734,8 @@ class RPGGamesCog(commands.Cog):
             await ctx.send("❌ Could not retrieve your data.")
             return
 
-        from utils.constants import PLAYER_CLASSES
+        # Static and admin-created classes
+        classes = get_registry().classes
 
         if not class_name:
             # Show available classes
@@ -1421,7 +1745,7 @@ class RPGGamesCog(commands.Cog):
                 color=COLORS['primary']
             )
 
-            for class_key, class_data in PLAYER_CLASSES.items():
+            for class_key, class_data in classes.items():
                 stats = class_data['base_stats']
                 embed.add_field(
                     name=f"{class_data['name']} ({class_key})",
@@ -1435,7 +1759,7 @@ class RPGGamesCog(commands.Cog):
             return
 
         class_name = class_name.lower()
-        if class_name not in PLAYER_CLASSES:
+        if class_name not in classes:
             await ctx.send(f"❌ Invalid class! Use `$class` to see available classes.")
             return
 
@@ -1443,9 +1767,15 @@ class RPGGamesCog(commands.Cog):
             await ctx.send("❌ You already have a class! You cannot change classes.")
             return
 
+        can_unlock, missing = check_class_unlock(player_data, class_name)
+        if not can_unlock:
+            await ctx.send("🔒 This class is still locked:\n" + "\n".join(f"• {reason}" for reason in missing))
+            return
+
         # Assign class
-        class_data = PLAYER_CLASSES[class_name]
+        class_data = classes[class_name]
         player_data['player_class'] = class_name
+        events = emit(player_data, 'class_selected', player_class=class_name)
 
         # Update base stats
         base_stats = class_data['base_stats']
@@ -1468,6 +1798,7 @@ class RPGGamesCog(commands.Cog):
             f"Mana: {base_stats['mana']}",
             COLORS['success']
         )
+        add_event_field(embed, events)
 
         await ctx.send(embed=embed)
 
@@ -1492,8 +1823,10 @@ class RPGGamesCog(commands.Cog):
             await ctx.send("❌ You haven't chosen a class yet! Use `$class` to choose one.")
             return
 
-        from utils.constants import PLAYER_CLASSES
-        class_data = PLAYER_CLASSES[player_class]
+        class_data = get_registry().classes.get(player_class)
+        if not class_data:
+            await ctx.send("❌ Your class is no longer available. Please contact an administrator.")
+            return
 
         embed = discord.Embed(
             title=f"⚡ {class_data['name']} Skills",
@@ -1612,7 +1945,7 @@ class RPGGamesCog(commands.Cog):
         await ctx.send(embed=embed)
 
     @commands.command(name='craft', help='Craft items using materials')
-    @commands.cooldown(1, RPG_CONSTANTS['craft_cooldown'], commands.BucketType.user)
+    @persistent_cooldown('craft')
     async def craft_command(self, ctx, *, recipe_name: str = None):
         """Craft items."""
         if not is_module_enabled("rpg", ctx.guild.id):
@@ -1623,7 +1956,7 @@ class RPGGamesCog(commands.Cog):
             await ctx.send("❌ You need to start your adventure first!")
             return
 
-        player_data = get_user_rpg_data(user_id)
+        player_data = get_user_rpg_data(user_id, sections=('collections',))
         if not player_data:
             await ctx.send("❌ Could not retrieve your data.")
             return
@@ -1701,28 +2034,24 @@ class RPGGamesCog(commands.Cog):
                 player_materials[material] = player_materials.get(material, 0) - needed
 
             # Add crafted item to inventory
-            inventory = player_data.get('inventory', [])
-            inventory.append(recipe['result']['name'])
-            player_data['inventory'] = inventory
+            overflow = store_items(user_id, player_data, [recipe['result']['name']])
             player_data['materials'] = player_materials
 
             # Add profession XP
             prof_xp_gained = recipe['level_required'] * 20  # XP based on recipe difficulty
             level_up_msg = level_up_profession(player_data, profession, prof_xp_gained)
 
-            # Update stats
-            stats = player_data.get('stats', {})
-            stats['items_crafted'] = stats.get('items_crafted', 0) + 1
-            player_data['stats'] = stats
+            events = emit(player_data, 'item_crafted', item=recipe['result']['name'])
 
             update_user_rpg_data(user_id, player_data)
 
             embed = create_embed(
                 "🔨 Crafting Successful!",
                 f"You crafted **{recipe['result']['name']}**!\n"
-                f"Profession XP gained: {prof_xp_gained}",
+                f"Profession XP gained: {prof_xp_gained}" + format_overflow_notice(overflow),
                 COLORS['success']
             )
+            add_event_field(embed, events)
 
             if level_up_msg:
                 embed.add_field(name="Level Up!", value=level_up_msg, inline=False)
@@ -1745,7 +2074,7 @@ class RPGGamesCog(commands.Cog):
         await ctx.send(embed=embed)
 
     @commands.command(name='gather', help='Gather crafting materials')
-    @commands.cooldown(1, RPG_CONSTANTS['gather_cooldown'], commands.BucketType.user)
+    @persistent_cooldown('gather')
     async def gather_command(self, ctx, location: str = None):
         """Gather materials from locations."""
         if not is_module_enabled("rpg", ctx.guild.id):
@@ -1756,7 +2085,7 @@ class RPGGamesCog(commands.Cog):
             await ctx.send("❌ You need to start your adventure first!")
             return
 
-        player_data = get_user_rpg_data(user_id)
+        player_data = get_user_rpg_data(user_id, sections=('collections',))
         if not player_data:
             await ctx.send("❌ Could not retrieve your data.")
             return
@@ -1814,10 +2143,7 @@ class RPGGamesCog(commands.Cog):
 
         player_data['materials'] = player_materials
 
-        # Update stats
-        stats = player_data.get('stats', {})
-        stats['materials_gathered'] = stats.get('materials_gathered', 0) + len(materials_found)
-        player_data['stats'] = stats
+        events = emit(player_data, 'material_gathered', len(materials_found), location=location)
 
         update_user_rpg_data(user_id, player_data)
 
@@ -1832,6 +2158,7 @@ class RPGGamesCog(commands.Cog):
 
             if level_up_msg:
                 embed.add_field(name="Level Up!", value=level_up_msg, inline=False)
+            add_event_field(embed, events)
         else:
             embed = create_embed(
                 f"🌾 Gathering Complete - {location.replace('_', ' ').title()}",
@@ -1852,7 +2179,7 @@ class RPGGamesCog(commands.Cog):
             await ctx.send("❌ You need to start your adventure first!")
             return
 
-        player_data = get_user_rpg_data(user_id)
+        player_data = get_user_rpg_data(user_id, sections=('collections',))
         if not player_data:
             await ctx.send("❌ Could not retrieve your data.")
             return
@@ -1890,7 +2217,7 @@ class RPGGamesCog(commands.Cog):
             await ctx.send("❌ You need to start your adventure first!")
             return
 
-        player_data = get_user_rpg_data(user_id)
+        player_data = get_user_rpg_data(user_id, sections=('history',))
         if not player_data:
             await ctx.send("❌ Could not retrieve your data.")
             return
@@ -1923,7 +2250,7 @@ class RPGGamesCog(commands.Cog):
         await ctx.send(embed=embed)
 
     @commands.command(name='quest', help='Quest management (new, abandon, complete)')
-    @commands.cooldown(1, RPG_CONSTANTS['quest_cooldown'], commands.BucketType.user)
+    @persistent_cooldown('quest')
     async def quest_command(self, ctx, action: str = None, *, quest_name: str = None):
         """Quest management."""
         if not is_module_enabled("rpg", ctx.guild.id):
@@ -2073,8 +2400,9 @@ class RPGGamesCog(commands.Cog):
 
     # ============= PARTY SYSTEM =============
 
-    @commands.command(name='party', help='Party management (create, invite, leave, disband)')
-    async def party_command(self, ctx, action: str = None, member: discord.Member = None):
+    @commands.command(name='party', help='Party management (create, invite, leave, disband, loot)')
+    async def party_command(self, ctx, action: str = None, member: Optional[discord.Member] = None,
+                            mode: Optional[str] = None):
         """Party system for multiplayer adventures."""
         if not is_module_enabled("rpg", ctx.guild.id):
             return
@@ -2123,6 +2451,11 @@ class RPGGamesCog(commands.Cog):
                 value=members_text,
                 inline=False
             )
+            embed.add_field(name="Loot", value=party_data.get('loot_distribution') or "fair", inline=True)
+            active = party_data.get('active_dungeon')
+            if active:
+                table = get_dungeons().get(active)
+                embed.add_field(name="Dungeon", value=table.name if table else active, inline=True)
 
             await ctx.send(embed=embed)
             return
@@ -2197,8 +2530,28 @@ class RPGGamesCog(commands.Cog):
 
             await ctx.send("✅ You left the party!")
 
+        elif action.lower() == 'loot':
+            party_id = player_data.get('party_id')
+            party_data = get_party_data(party_id) if party_id else None
+            if not party_data:
+                await ctx.send("❌ You're not in a party!")
+                return
+
+            if mode not in LOOT_MODES:
+                await ctx.send(f"❌ Choose a loot mode: {', '.join(LOOT_MODES)}")
+                return
+
+            if party_data['leader_id'] != user_id:
+                await ctx.send("❌ Only the party leader can change the loot mode!")
+                return
+
+            party_data['loot_distribution'] = mode
+            update_party_data(party_id, party_data)
+            await ctx.send(f"✅ Party loot is now shared by **{mode}** ({LOOT_MODES[mode]}). "
+                           f"It applies from the next dungeon.")
+
         else:
-            await ctx.send("❌ Invalid action! Use: create, invite, leave, disband")
+            await ctx.send("❌ Invalid action! Use: create, invite, leave, disband, loot")
 
     # ============= LEGACY SYSTEM =============
 
@@ -2213,7 +2566,7 @@ class RPGGamesCog(commands.Cog):
             await ctx.send("❌ You need to start your adventure first!")
             return
 
-        player_data = get_user_rpg_data(user_id)
+        player_data = get_user_rpg_data(user_id, sections=('achievements',))
         if not player_data:
             await ctx.send("❌ Could not retrieve your data.")
             return
@@ -2271,7 +2624,7 @@ class RPGGamesCog(commands.Cog):
             await ctx.send("❌ You need to start your adventure first!")
             return
 
-        player_data = get_user_rpg_data(user_id)
+        player_data = get_user_rpg_data(user_id, sections=('achievements',))
         if not player_data:
             await ctx.send("❌ Could not retrieve your data.")
             return
@@ -2348,6 +2701,7 @@ class RPGGamesCog(commands.Cog):
                 })
 
                 update_user_rpg_data(user_id, player_data)
+                invalidate_modifiers(user_id)
 
                 embed = create_embed(
                     f"⭐ Prestige {prestige_level} Achieved!",
@@ -2398,6 +2752,7 @@ class RPGGamesCog(commands.Cog):
         player_data['coins'] = coins - cost
 
         results = []
+        caught = []
 
         # Multiple fishing attempts
         for _ in range(3):
@@ -2405,10 +2760,9 @@ class RPGGamesCog(commands.Cog):
                 fish_types = ['cheese_trout', 'camembert_bass', 'gouda_goldfish', 'rare_brie_shark']
                 caught_fish = random.choice(fish_types)
                 results.append(caught_fish)
+                caught.append(caught_fish)
 
-                inventory = player_data.get('inventory', [])
-                inventory.append(caught_fish)
-                player_data['inventory'] = inventory
+        overflow = store_items(user_id, player_data, caught)
 
         # Rare pet chance
         if roll_with_luck(user_id, 0.05):  # 5% chance for pet
@@ -2427,7 +2781,7 @@ class RPGGamesCog(commands.Cog):
             embed = create_embed(
                 "🎣 Fishing Complete!",
                 f"You cast your line into the magical cheese pond...\n\n"
-                f"**Caught:**\n{results_text}",
+                f"**Caught:**\n{results_text}" + format_overflow_notice(overflow),
                 COLORS['success']
             )
         else:
@@ -2600,23 +2954,18 @@ class RPGGamesCog(commands.Cog):
                 return
 
             player_data = get_user_rpg_data(user_id)
-            inventory = player_data.get('inventory', [])
 
-            if item_name not in inventory:
+            # Remove item from inventory and add to auction
+            if not remove_item(player_data, item_name):
                 await ctx.send(f"❌ You don't have **{item_name}** in your inventory!")
                 return
-
-            # Remove item from inventory and add to auction
-            inventory.remove(item_name)
-            player_data['inventory'] = inventory
             update_user_rpg_data(user_id, player_data)
 
             if add_auction_listing(user_id, item_name, price):
                 await ctx.send(f"✅ Listed **{item_name}** for {format_number(price)} coins!")
             else:
                 # Return item if listing failed
-                inventory.append(item_name)
-                player_data['inventory'] = inventory
+                store_items(user_id, player_data, [item_name])
                 update_user_rpg_data(user_id, player_data)
                 await ctx.send("❌ Failed to list item!")
 
@@ -2665,12 +3014,11 @@ class RPGGamesCog(commands.Cog):
             await ctx.send("❌ Could not retrieve your data.")
             return
 
-        inventory = player_data.get('inventory', [])
         equipped = player_data.get('equipped', {})
 
         embed = create_embed(
             f"🎒 {ctx.author.display_name}'s Inventory",
-            f"Items: {len(inventory)}/50",
+            f"Slots: {used_slots(player_data)}/{get_capacity()} • Items: {total_items(player_data)}",
             COLORS['secondary']
         )
 
@@ -2685,15 +3033,8 @@ class RPGGamesCog(commands.Cog):
             inline=False
         )
 
-        # Show inventory items
-        if inventory:
-            items_text = ""
-            for i, item in enumerate(inventory[:20]):  # Show first 20 items
-                items_text += f"• {item}\n"
-            if len(inventory) > 20:
-                items_text += f"... and {len(inventory) - 20} more items"
-        else:
-            items_text = "Your inventory is empty!"
+        # Show inventory items (first 20 stacks)
+        items_text = format_inventory_lines(player_data, 20)
 
         embed.add_field(
             name="📦 Items",
@@ -2703,6 +3044,151 @@ class RPGGamesCog(commands.Cog):
 
         await ctx.send(embed=embed)
 
+    @commands.command(name='stash', help='View or claim items that overflowed your inventory')
+    async def stash_command(self, ctx, action: str = None):
+        """View or claim the overflow stash."""
+        if not is_module_enabled("rpg", ctx.guild.id):
+            return
+
+        user_id = str(ctx.author.id)
+
+        if not ensure_user_exists(user_id):
+            await ctx.send("❌ You need to start your adventure first!")
+            return
+
+        if action and action.lower() == 'claim':
+            player_data = get_user_rpg_data(user_id)
+            if not player_data:
+                await ctx.send("❌ Could not retrieve your data.")
+                return
+
+            claimed, remaining = claim_stash(user_id, player_data)
+            if not claimed:
+                if remaining:
+                    await ctx.send("❌ Your inventory is full! Use `$sell` or `$discard` to make room.")
+                else:
+                    await ctx.send("📦 Your stash is empty!")
+                return
+
+            update_user_rpg_data(user_id, player_data)
+
+            claimed_text = "\n".join(f"• {name} x{quantity}" if quantity > 1 else f"• {name}"
+                                     for name, quantity in claimed.items())
+            if remaining:
+                claimed_text += f"\n\n{remaining} items are still waiting in your stash."
+            await ctx.send(embed=create_embed("📦 Stash Claimed", claimed_text, COLORS['success']))
+            return
+
+        items = list_stash(user_id)
+        if not items:
+            await ctx.send("📦 Your stash is empty!")
+            return
+
+        lines = [f"• {name} x{quantity}" if quantity > 1 else f"• {name}" for name, quantity in items[:20]]
+        if len(items) > 20:
+            lines.append(f"... and {len(items) - 20} more items")
+
+        embed = create_embed(
+            f"📦 {ctx.author.display_name}'s Stash",
+            "\n".join(lines),
+            COLORS['secondary']
+        )
+        embed.set_footer(text="Use $stash claim to move items into your inventory")
+        await ctx.send(embed=embed)
+
+    @commands.command(name='sell', help='Sell items by rarity, category or name')
+    async def sell_command(self, ctx, *, selector: str = None):
+        """Sell all inventory items matching a rarity, category or name."""
+        await self.bulk_remove(ctx, selector, sell=True)
+
+    @commands.command(name='discard', help='Discard items by rarity, category or name')
+    async def discard_command(self, ctx, *, selector: str = None):
+        """Discard all inventory items matching a rarity, category or name."""
+        await self.bulk_remove(ctx, selector, sell=False)
+
+    async def bulk_remove(self, ctx, selector: Optional[str], sell: bool):
+        """Sell or discard matching items with a single profile write."""
+        if not is_module_enabled("rpg", ctx.guild.id):
+            return
+
+        action = "sell" if sell else "discard"
+        if not selector:
+            await ctx.send(f"❌ Usage: `${action} <rarity|category|item name>`\n"
+                           f"Examples: `${action} common`, `${action} consumables`, `${action} Iron Sword`")
+            return
+
+        user_id = str(ctx.author.id)
+
+        if not ensure_user_exists(user_id):
+            await ctx.send("❌ You need to start your adventure first!")
+            return
+
+        player_data = get_user_rpg_data(user_id)
+        if not player_data:
+            await ctx.send("❌ Could not retrieve your data.")
+            return
+
+        def pick(data):
+            selected = select_items(data, selector)
+            if sell:
+                # Priceless items are never sold in bulk
+                selected = {key: quantity for key, quantity in selected.items() if sell_value(key) > 0}
+            return selected
+
+        selected = pick(player_data)
+        if not selected:
+            await ctx.send(f"❌ You don't have any items matching **{selector}** to {action}!")
+            return
+
+        count = sum(selected.values())
+        coins = sum(sell_value(key) * quantity for key, quantity in selected.items())
+        preview = "\n".join(f"• {item_display_name(key)} x{quantity}" if quantity > 1 else f"• {item_display_name(key)}"
+                            for key, quantity in list(selected.items())[:15])
+        if len(selected) > 15:
+            preview += f"\n... and {len(selected) - 15} more items"
+
+        summary = f"**{count}** items"
+        if sell:
+            summary += f" for **{format_number(coins)}** coins"
+
+        embed = create_embed(
+            f"{'💰' if sell else '🗑️'} Confirm {action.title()}",
+            f"You are about to {action} {summary}:\n\n{preview}",
+            COLORS['warning']
+        )
+        await ctx.send(embed=embed)
+        await ctx.send("Type `yes` to confirm or `no` to cancel.")
+
+        def check(m):
+            return m.author == ctx.author and m.channel == ctx.channel
+
+        try:
+            response = await self.bot.wait_for('message', check=check, timeout=30.0)
+        except asyncio.TimeoutError:
+            await ctx.send(f"❌ {action.title()} timed out.")
+            return
+
+        if response.content.lower() != 'yes':
+            await ctx.send(f"❌ {action.title()} cancelled.")
+            return
+
+        # Re-read so nothing gained or spent while confirming is lost
+        player_data = get_user_rpg_data(user_id)
+        if not player_data:
+            await ctx.send("❌ Could not retrieve your data.")
+            return
+
+        selected = pick(player_data)
+        coins = sum(sell_value(key) * quantity for key, quantity in selected.items()) if sell else 0
+        removed = remove_items(player_data, selected)
+        player_data['coins'] = player_data.get('coins', 0) + coins
+        update_user_rpg_data(user_id, player_data)
+
+        if sell:
+            await ctx.send(f"✅ Sold **{removed}** items for **{format_number(coins)}** coins!")
+        else:
+            await ctx.send(f"✅ Discarded **{removed}** items.")
+
     @commands.command(name='battle', help='Battle a monster')
     async def battle_command(self, ctx, *, target: str = None):
         """Battle a monster or player."""
@@ -2734,7 +3220,9 @@ class RPGGamesCog(commands.Cog):
         enemy = random.choice(enemies)
         enemy["max_hp"] = enemy["hp"]
 
-        view = BattleView(user_id, enemy)
+        session = start_battle(user_id, combatant_from_profile(player_data, ctx.author.display_name),
+                               combatant_from_enemy(enemy))
+        view = BattleView(session)
         embed = discord.Embed(
             title=f"⚔️ Battle vs {enemy['name']}",
             description=f"A wild {enemy['name']} appears!",
@@ -2757,7 +3245,9 @@ class RPGGamesCog(commands.Cog):
             inline=True
         )
 
-        await ctx.send(embed=embed, view=view)
+        message = await ctx.send(embed=embed, view=view)
+        session.channel_id, session.message_id = message.channel.id, message.id
+        save_session(session)
 
     @commands.command(name='profile', help='View your character profile')
     async def profile_command(self, ctx, member: Optional[discord.Member] = None):
@@ -2783,7 +3273,7 @@ class RPGGamesCog(commands.Cog):
         await ctx.send(embed=embed, view=view)
 
     @commands.command(name='adventure', help='Go on an adventure')
-    @commands.cooldown(1, RPG_CONSTANTS['adventure_cooldown'], commands.BucketType.user)
+    @persistent_cooldown('adventure')
     async def adventure_command(self, ctx):
         """Go on an adventure."""
         if not is_module_enabled("rpg", ctx.guild.id):
@@ -2806,7 +3296,7 @@ class RPGGamesCog(commands.Cog):
         await ctx.send(embed=embed, view=view)
 
     @commands.command(name='work', help='Work to earn coins')
-    @commands.cooldown(1, RPG_CONSTANTS['work_cooldown'], commands.BucketType.user)
+    @persistent_cooldown('work')
     async def work_command(self, ctx):
         """Work to earn coins."""
         if not is_module_enabled("rpg", ctx.guild.id):
@@ -2835,15 +3325,13 @@ class RPGGamesCog(commands.Cog):
         coins_earned = random.randint(*job['coins'])
         xp_earned = random.randint(*job['xp'])
 
-        # Apply luck bonus
-        enhanced_rewards = generate_loot_with_luck(user_id, {
-            'coins': coins_earned,
-            'xp': xp_earned
-        })
+        # Apply luck, events and effects
+        coins_earned, xp_earned = apply_rewards(player_data, coins_earned, xp_earned)
 
-        player_data['coins'] = player_data.get('coins', 0) + enhanced_rewards['coins']
-        player_data['xp'] = player_data.get('xp', 0) + enhanced_rewards['xp']
+        player_data['coins'] = player_data.get('coins', 0) + coins_earned
+        player_data['xp'] = player_data.get('xp', 0) + xp_earned
         player_data['work_count'] = player_data.get('work_count', 0) + 1
+        events = emit(player_data, 'work_completed', job=job['name'])
 
         # Check for level up
         level_up_msg = level_up_player(player_data)
@@ -2854,13 +3342,17 @@ class RPGGamesCog(commands.Cog):
             f"💼 Work Complete - {job['name']}",
             f"You worked hard and earned rewards!\n\n"
             f"**Rewards:**\n"
-            f"Coins: {format_number(enhanced_rewards['coins'])}\n"
-            f"XP: {enhanced_rewards['xp']}",
+            f"Coins: {format_number(coins_earned)}\n"
+            f"XP: {xp_earned}",
             COLORS['success']
         )
 
         if level_up_msg:
             embed.add_field(name="📊 Level Up!", value=level_up_msg, inline=False)
+        add_event_field(embed, events)
+        modifiers = get_modifiers(player_data, user_id)
+        if modifiers.sources:
+            embed.set_footer(text=f"Active bonuses: {format_modifiers(modifiers)}")
 
         await ctx.send(embed=embed)
 
@@ -2941,7 +3433,7 @@ class RPGGamesCog(commands.Cog):
         await ctx.send(embed=embed, view=view)
 
     @commands.command(name='adventure', help='Go on an adventure')
-    @commands.cooldown(1, RPG_CONSTANTS['adventure_cooldown'], commands.BucketType.user)
+    @persistent_cooldown('adventure')
     async def adventure_command(self, ctx):
         """Go on an adventure."""
         if not is_module_enabled("rpg", ctx.guild.id):
@@ -2964,7 +3456,7 @@ class RPGGamesCog(commands.Cog):
         await ctx.send(embed=embed, view=view)
 
     @commands.command(name='work', help='Work to earn coins')
-    @commands.cooldown(1, RPG_CONSTANTS['work_cooldown'], commands.BucketType.user)
+    @persistent_cooldown('work')
     async def work_command(self, ctx):
         """Work to earn coins."""
         if not is_module_enabled("rpg", ctx.guild.id):
@@ -2993,15 +3485,13 @@ class RPGGamesCog(commands.Cog):
         coins_earned = random.randint(*job['coins'])
         xp_earned = random.randint(*job['xp'])
 
-        # Apply luck bonus
-        enhanced_rewards = generate_loot_with_luck(user_id, {
-            'coins': coins_earned,
-            'xp': xp_earned
-        })
+        # Apply luck, events and effects
+        coins_earned, xp_earned = apply_rewards(player_data, coins_earned, xp_earned)
 
-        player_data['coins'] = player_data.get('coins', 0) + enhanced_rewards['coins']
-        player_data['xp'] = player_data.get('xp', 0) + enhanced_rewards['xp']
+        player_data['coins'] = player_data.get('coins', 0) + coins_earned
+        player_data['xp'] = player_data.get('xp', 0) + xp_earned
         player_data['work_count'] = player_data.get('work_count', 0) + 1
+        events = emit(player_data, 'work_completed', job=job['name'])
 
         # Check for level up
         level_up_msg = level_up_player(player_data)
@@ -3012,19 +3502,24 @@ class RPGGamesCog(commands.Cog):
             f"💼 Work Complete - {job['name']}",
             f"You worked hard and earned rewards!\n\n"
             f"**Rewards:**\n"
-            f"Coins: {format_number(enhanced_rewards['coins'])}\n"
-            f"XP: {enhanced_rewards['xp']}",
+            f"Coins: {format_number(coins_earned)}\n"
+            f"XP: {xp_earned}",
             COLORS['success']
         )
 
         if level_up_msg:
             embed.add_field(name="📊 Level Up!", value=level_up_msg, inline=False)
+        add_event_field(embed, events)
+        modifiers = get_modifiers(player_data, user_id)
+        if modifiers.sources:
+            embed.set_footer(text=f"Active bonuses: {format_modifiers(modifiers)}")
 
         await ctx.send(embed=embed)
 
     
 
-    @commands.command(name='buy', help='Buy an item from the shop by name')
+    @commands.hybrid_command(name='buy', help='Buy an item from the shop by name')
+    @app_commands.describe(item_name="The item to buy")
     async def buy_command(self, ctx, *, item_name: str):
         """Buy an item directly by name."""
         if not is_module_enabled("rpg", ctx.guild.id):
@@ -3041,27 +3536,16 @@ class RPGGamesCog(commands.Cog):
             await ctx.send("❌ Could not retrieve your data.")
             return
 
-        from utils.constants import SHOP_ITEMS
-
-        # Find item in shop
-        item_data = None
-        item_id = None
-        for shop_id, shop_item in SHOP_ITEMS.items():
-            if shop_item.get('name', '').lower() == item_name.lower():
-                item_data = shop_item
-                item_id = shop_id
-                break
+        # Find item in shop (exact name, ID, or an unambiguous prefix)
+        catalog = get_catalog()
+        shop_index = get_search_index('shop')
+        item_data = catalog.get_shop_item(item_name) or catalog.get_shop_item(shop_index.resolve(item_name) or '')
+        item_id = item_data['id'] if item_data else None
 
         if not item_data:
             # Show available items with similar names
-            similar_items = []
-            for shop_item in SHOP_ITEMS.values():
-                if item_name.lower() in shop_item.get('name', '').lower():
-                    similar_items.append(shop_item['name'])
-            
             error_msg = f"❌ **{item_name}** is not available in the shop!"
-            if similar_items:
-                error_msg += f"\n\n**Did you mean:**\n" + "\n".join([f"• {item}" for item in similar_items[:5]])
+            error_msg += format_suggestions(shop_index.search(item_name, 5))
             error_msg += f"\n\n💡 Use `$shop` for the interactive shop interface!"
             
             await ctx.send(error_msg)
@@ -3070,6 +3554,10 @@ class RPGGamesCog(commands.Cog):
         price = item_data.get('price', 0)
         coins = player_data.get('coins', 0)
 
+        if not has_room(player_data, item_id):
+            await ctx.send("❌ **Inventory full!** Use `$sell` or `$discard` to make room.")
+            return
+
         if coins < price:
             await ctx.send(f"❌ **Insufficient funds!**\n"
                           f"You need **{format_number(price)}** coins but only have **{format_number(coins)}**.\n"
@@ -3078,14 +3566,8 @@ class RPGGamesCog(commands.Cog):
 
         # Purchase item
         player_data['coins'] = coins - price
-        inventory = player_data.get('inventory', [])
-        inventory.append(item_data['name'])
-        player_data['inventory'] = inventory
-
-        # Update stats
-        stats = player_data.get('stats', {})
-        stats['items_purchased'] = stats.get('items_purchased', 0) + 1
-        player_data['stats'] = stats
+        add_item(player_data, item_id)
+        events = emit(player_data, 'item_purchased', item=item_id)
 
         update_user_rpg_data(user_id, player_data)
 
@@ -3128,11 +3610,13 @@ class RPGGamesCog(commands.Cog):
                   "• Use `$use <item>` for consumables",
             inline=False
         )
+        add_event_field(embed, events)
 
         embed.set_footer(text="💡 Use $shop for the interactive shopping experience!")
         await ctx.send(embed=embed)
 
-    @commands.command(name='use', help='Use a consumable item')
+    @commands.hybrid_command(name='use', help='Use a consumable item')
+    @app_commands.describe(item_name="The item to use")
     async def use_command(self, ctx, *, item_name: str):
         """Use a consumable item."""
         if not is_module_enabled("rpg", ctx.guild.id):
@@ -3149,11 +3633,12 @@ class RPGGamesCog(commands.Cog):
             await ctx.send("❌ Could not retrieve your data.")
             return
 
-        inventory = player_data.get('inventory', [])
-
-        if item_name not in inventory:
-            await ctx.send(f"❌ You don't have **{item_name}** in your inventory!")
-            return
+        if not has_item(player_data, item_name):
+            resolved, suggestions = resolve_name(item_names(player_data), item_name)
+            if not resolved:
+                await ctx.send(f"❌ You don't have **{item_name}** in your inventory!" + format_suggestions(suggestions))
+                return
+            item_name = resolved
 
         # Define item effects
         item_effects = {
@@ -3167,12 +3652,7 @@ class RPGGamesCog(commands.Cog):
 
         if item_name not in item_effects:
             # Check if it's equipment
-            from utils.constants import SHOP_ITEMS
-            item_data = None
-            for shop_item in SHOP_ITEMS.values():
-                if shop_item.get('name') == item_name:
-                    item_data = shop_item
-                    break
+            item_data = get_catalog().get_by_name(item_name)
             
             if item_data and item_data.get('category') in ['weapons', 'armor']:
                 await ctx.send(f"❌ **{item_name}** is equipment! Use `$equip {item_name}` instead.")
@@ -3220,26 +3700,28 @@ class RPGGamesCog(commands.Cog):
             await ctx.send(f"🔥 **{item_name}** brought you back to life with {effect['amount']} HP!")
 
         elif effect["type"] == "luck":
-            luck_points = player_data.get('luck_points', 0)
-            player_data['luck_points'] = luck_points + effect["amount"]
-            await ctx.send(f"🍀 You used **{item_name}** and gained {effect['amount']} luck points!")
+            apply_status_effect(player_data, user_id, 'lucky', effect["duration"])
+            await ctx.send(f"🍀 You used **{item_name}** and gained {effect['amount']} luck for the next hour!")
 
         elif effect["type"] == "xp_boost":
-            # Add temporary boost (would need a separate system to track)
+            apply_status_effect(player_data, user_id, 'xp_boost', effect["duration"])
             await ctx.send(f"✨ You used **{item_name}**! XP gain doubled for the next 30 minutes!")
 
         # Remove item from inventory
-        inventory.remove(item_name)
-        player_data['inventory'] = inventory
+        remove_item(player_data, item_name)
 
-        # Update stats
-        stats = player_data.get('stats', {})
-        stats['items_used'] = stats.get('items_used', 0) + 1
-        player_data['stats'] = stats
+        events = emit(player_data, 'item_used', item=item_name)
+        if 'cheese' in item_name.lower() or 'camembert' in item_name.lower():
+            events = merge_results(events, emit(player_data, 'cheese_consumed', item=item_name))
 
         update_user_rpg_data(user_id, player_data)
 
-    @commands.command(name='equip', help='Equip weapons, armor, or accessories')
+        rewards_text = format_event_rewards(events)
+        if rewards_text:
+            await ctx.send(rewards_text)
+
+    @commands.hybrid_command(name='equip', help='Equip weapons, armor, or accessories')
+    @app_commands.describe(item_name="The item to equip")
     async def equip_command(self, ctx, *, item_name: str):
         """Equip weapons, armor, or accessories."""
         if not is_module_enabled("rpg", ctx.guild.id):
@@ -3256,33 +3738,16 @@ class RPGGamesCog(commands.Cog):
             await ctx.send("❌ Could not retrieve your data.")
             return
 
-        inventory = player_data.get('inventory', [])
-
-        if item_name not in inventory:
-            await ctx.send(f"❌ You don't have **{item_name}** in your inventory!")
-            return
-
-        # Find item data
-        from utils.constants import SHOP_ITEMS, WEAPONS, ARMOR
-        item_data = None
-        item_type = None
-
-        # Check shop items first
-        for shop_item in SHOP_ITEMS.values():
-            if shop_item.get('name') == item_name:
-                item_data = shop_item
-                item_type = shop_item.get('category')
-                break
-
-        # Check weapons
-        if not item_data and item_name in WEAPONS:
-            item_data = WEAPONS[item_name]
-            item_type = 'weapons'
+        if not has_item(player_data, item_name):
+            resolved, suggestions = resolve_name(item_names(player_data), item_name)
+            if not resolved:
+                await ctx.send(f"❌ You don't have **{item_name}** in your inventory!" + format_suggestions(suggestions))
+                return
+            item_name = resolved
 
-        # Check armor
-        if not item_data and item_name in ARMOR:
-            item_data = ARMOR[item_name]
-            item_type = 'armor'
+        # Find item data (shop items take precedence over the equipment tables)
+        item_data = get_catalog().get_by_name(item_name)
+        item_type = item_data.get('category') if item_data else None
 
         if not item_data:
             await ctx.send(f"❌ **{item_name}** cannot be equipped!")
@@ -3304,14 +3769,12 @@ class RPGGamesCog(commands.Cog):
         
         slot = slot_mapping.get(item_type, item_type.rstrip('s'))
 
-        # Unequip current item if any
+        # Equip new item, then return the current one to the inventory
+        remove_item(player_data, item_name)
         old_item = equipped.get(slot)
         if old_item and old_item != 'None':
-            inventory.append(old_item)
-
-        # Equip new item
+            store_items(user_id, player_data, [old_item])
         equipped[slot] = item_name
-        inventory.remove(item_name)
 
         # Apply stat bonuses
         old_attack = player_data.get('attack', 10)
@@ -3323,7 +3786,6 @@ class RPGGamesCog(commands.Cog):
             player_data['defense'] = player_data.get('defense', 5) + item_data['defense']
 
         player_data['equipped'] = equipped
-        player_data['inventory'] = inventory
 
         update_user_rpg_data(user_id, player_data)
 
@@ -3439,7 +3901,8 @@ class RPGGamesCog(commands.Cog):
 
         sender_id = str(ctx.author.id)
 
-    @commands.command(name='weapon', help='View detailed weapon information')
+    @commands.hybrid_command(name='weapon', help='View detailed weapon information')
+    @app_commands.describe(weapon_name="The weapon to look up (leave empty to list all)")
     async def weapon_command(self, ctx, *, weapon_name: str = None):
         """View weapon information and unlock conditions."""
         if not is_module_enabled("rpg", ctx.guild.id):
@@ -3453,15 +3916,8 @@ class RPGGamesCog(commands.Cog):
                 color=COLORS['primary']
             )
 
-            from utils.constants import WEAPONS
-
             # Group by rarity
-            rarity_groups = {}
-            for name, data in WEAPONS.items():
-                rarity = data.get('rarity', 'common')
-                if rarity not in rarity_groups:
-                    rarity_groups[rarity] = []
-                rarity_groups[rarity].append(name)
+            rarity_groups = get_catalog().by_rarity.get('weapon', {})
 
             for rarity, weapons in rarity_groups.items():
                 emoji = get_rarity_emoji(rarity)
@@ -3477,18 +3933,26 @@ class RPGGamesCog(commands.Cog):
             return
 
         # Show specific weapon info
-        from utils.constants import WEAPONS, WEAPON_UNLOCK_CONDITIONS
+        from utils.constants import WEAPON_UNLOCK_CONDITIONS
         from utils.helpers import check_weapon_unlock_conditions, format_weapon_info
 
-        if weapon_name not in WEAPONS:
-            await ctx.send(f"❌ Weapon '{weapon_name}' not found! Use `$weapon` to see all weapons.")
+        weapon_index = get_search_index('weapon')
+        weapon = get_catalog().weapons.get(weapon_index.resolve(weapon_name) or '')
+        if not weapon:
+            await ctx.send(f"❌ Weapon '{weapon_name}' not found! Use `$weapon` to see all weapons."
+                           + format_suggestions(weapon_index.search(weapon_name, 5)))
             return
 
-        weapon = WEAPONS[weapon_name]
+        weapon_name = weapon['name']
         user_id = str(ctx.author.id)
 
         # Check unlock conditions
-        can_unlock, unlock_msg = check_weapon_unlock_conditions(user_id, weapon_name)
+        player_data = get_user_rpg_data(user_id) if weapon_name in WEAPON_UNLOCK_CONDITIONS else None
+        if player_data:
+            can_unlock, missing = check_weapon_unlock_conditions(player_data, weapon_name)
+            unlock_msg = "\n".join(missing)
+        else:
+            can_unlock, unlock_msg = False, "Start your adventure with `$start` to track these requirements"
 
         # Create embed
         rarity = weapon.get('rarity', 'common')
@@ -3549,7 +4013,12 @@ class RPGGamesCog(commands.Cog):
 
         from utils.helpers import check_chrono_weave_unlock
 
-        can_unlock, status_msg = check_chrono_weave_unlock(user_id)
+        player_data = get_user_rpg_data(user_id, sections=("history",))
+        if not player_data:
+            await ctx.send("❌ Could not retrieve your data.")
+            return
+
+        can_unlock, status_msg = check_chrono_weave_unlock(player_data)
 
         embed = discord.Embed(
             title="⏰ Chrono Weave Class Unlock",
@@ -3691,12 +4160,18 @@ class RPGGamesCog(commands.Cog):
 
         await ctx.send(embed=embed, view=view)
 
-    @commands.command(name='pvp', help='Challenge another player to PvP')
-    async def pvp_command(self, ctx, member: discord.Member, arena: str = "Colosseum"):
+    @commands.group(name='pvp', help='Challenge another player to PvP, or queue for a ranked match',
+                    invoke_without_command=True)
+    async def pvp_command(self, ctx, member: Optional[discord.Member] = None, arena: str = "cheese_pit"):
         """Challenge another player to PvP."""
         if not is_module_enabled("rpg", ctx.guild.id):
             return
 
+        if member is None:
+            await ctx.send("⚔️ Use `$pvp <user> [arena]` to challenge someone, or `$pvp queue [open]` "
+                           "to find a ranked opponent near your rating.")
+            return
+
         user_id = str(ctx.author.id)
         target_id = str(member.id)
 
@@ -3729,17 +4204,355 @@ class RPGGamesCog(commands.Cog):
             await ctx.send(f"❌ {member.mention} needs {entry_fee} coins to enter {arena}!")
             return
 
-        view = PvPView(user_id, target_id, arena)
+        challenge = open_challenge(user_id, target_id, arena)
+        view = PvPView(challenge)
         embed = discord.Embed(
             title=f"⚔️ PvP Challenge - {arena}",
             description=f"{ctx.author.mention} challenges {member.mention} to battle!\n\n"
                        f"**Arena:** {arena}\n"
                        f"**Entry Fee:** {format_number(entry_fee)} coins\n"
-                       f"**Winner Gets:** {format_number(entry_fee * PVP_ARENAS[arena]['winner_multiplier'])} coins",
+                       f"**Winner Gets:** {format_number(int(entry_fee * PVP_ARENAS[arena]['winner_multiplier']))} coins",
             color=COLORS['warning']
         )
 
-        await ctx.send(embed=embed, view=view)
+        message = await ctx.send(embed=embed, view=view)
+        challenge.channel_id, challenge.message_id = message.channel.id, message.id
+        save_session(challenge)
+
+    @pvp_command.command(name='queue', help='Queue for a ranked match against a player near your rating')
+    async def pvp_queue_command(self, ctx, scope: Optional[str] = None):
+        """Join this server's ranked queue, or the open cross-server one."""
+        if not is_module_enabled("rpg", ctx.guild.id):
+            return
+
+        user_id = str(ctx.author.id)
+        if not ensure_user_exists(user_id):
+            await ctx.send("❌ You need to start your adventure first! Use `$start`")
+            return
+
+        player_data = get_user_rpg_data(user_id)
+        if not player_data:
+            await ctx.send("❌ Could not retrieve your data.")
+            return
+
+        queue = OPEN_SCOPE if scope == "open" else queue_scope(ctx.guild.id)
+        rating = get_rating(player_data)
+        match = join_queue(user_id, rating, queue, ctx.channel.id)
+        if match is None:
+            where = "the open cross-server" if queue == OPEN_SCOPE else "this server's"
+            await ctx.send(f"🔎 {ctx.author.mention} joined {where} ranked queue at **{rating}** rating. "
+                           f"You'll be matched with a player near your rating; use `$pvp leave` to leave.")
+            return
+
+        await self.play_ranked_match(*match)
+
+    @pvp_command.command(name='leave', help='Leave the ranked queue')
+    async def pvp_leave_command(self, ctx):
+        """Leave the ranked queue."""
+        if leave_queue(str(ctx.author.id)):
+            await ctx.send("👋 You left the ranked queue.")
+        else:
+            await ctx.send("❌ You're not in a ranked queue!")
+
+    @pvp_command.command(name='ladder', help='Show the top PvP ratings')
+    async def pvp_ladder_command(self, ctx, scope: Optional[str] = None):
+        """Show the top rated players on this server, or globally."""
+        if not is_module_enabled("rpg", ctx.guild.id):
+            return
+
+        ladder = get_ladder()
+        if scope == "global":
+            top = ladder.top(10)
+            title = "🏆 Global PvP Ladder"
+        else:
+            top = ladder.top(10, lambda user_id: ctx.guild.get_member(int(user_id)) is not None)
+            title = f"🏆 {ctx.guild.name} PvP Ladder"
+
+        if not top:
+            await ctx.send("❌ Nobody has a PvP rating yet! Use `$pvp queue` to play a ranked match.")
+            return
+
+        lines = [f"**{position}.** <@{user_id}> - {rating}" for position, (user_id, rating) in enumerate(top, 1)]
+        embed = discord.Embed(title=title, description="\n".join(lines), color=COLORS['primary'])
+        await ctx.send(embed=embed)
+
+    @pvp_command.command(name='rating', help='Show a PvP rating')
+    async def pvp_rating_command(self, ctx, member: Optional[discord.Member] = None):
+        """Show a player's PvP rating, record and global rank."""
+        if not is_module_enabled("rpg", ctx.guild.id):
+            return
+
+        target = member or ctx.author
+        user_id = str(target.id)
+        if not ensure_user_exists(user_id):
+            await ctx.send(f"❌ {target.display_name} hasn't started their adventure yet!")
+            return
+
+        player_data = get_user_rpg_data(user_id)
+        if not player_data:
+            await ctx.send("❌ Could not retrieve player data.")
+            return
+
+        stats = player_data.get('stats', {})
+        rank = get_ladder().rank(user_id)
+        embed = discord.Embed(title=f"📈 {target.display_name}'s PvP Rating", color=COLORS['primary'])
+        embed.add_field(name="Rating", value=str(player_data.get('pvp_rating', DEFAULT_RATING)), inline=True)
+        embed.add_field(name="Global Rank", value=f"#{rank}" if rank else "Unranked", inline=True)
+        embed.add_field(name="Record", value=f"{stats.get('pvp_wins', 0)}W / {stats.get('pvp_losses', 0)}L",
+                        inline=True)
+        if get_queue_entry(user_id):
+            embed.set_footer(text="Currently in the ranked queue")
+        await ctx.send(embed=embed)
+
+    @commands.group(name='worldevent', aliases=['raid'], help='Show the running world events',
+                    invoke_without_command=True)
+    async def worldevent_command(self, ctx):
+        """Show running and upcoming world events."""
+        if not is_module_enabled("rpg", ctx.guild.id):
+            return
+
+        running, upcoming = active_events(), upcoming_events()
+        if not running and not upcoming:
+            await ctx.send("🌍 No world events are running right now. Keep an eye out!")
+            return
+
+        now = datetime.now().timestamp()
+        embed = discord.Embed(title="🌍 World Events", color=COLORS['warning'])
+        for event in running:
+            value = f"⏳ Ends in {format_time_remaining(int(event.ends_at - now))}\n"
+            if event.boss:
+                hp = boss_hp(event)
+                value += f"❤️ {format_number(hp)}/{format_number(event.max_hp)} HP\n"
+                value += f"{create_progress_bar(100 * hp / event.max_hp)}\n"
+                value += "Attack it with `$worldevent attack`!"
+            else:
+                value += "Adventure, battle and work to contribute!"
+            if event.min_players:
+                value += f"\nNeeds at least {event.min_players} players."
+            embed.add_field(name=event.name, value=value, inline=False)
+
+            top = top_contributors(event.event_id, 5)
+            if top:
+                lines = [f"**{position}.** <@{user_id}> - {format_number(amount)}"
+                         for position, (user_id, amount) in enumerate(top, 1)]
+                embed.add_field(name="🏆 Top Contributors", value="\n".join(lines), inline=False)
+
+        for event in upcoming:
+            embed.add_field(name=f"🔜 {event.name}",
+                            value=f"Starts in {format_time_remaining(int(event.starts_at - now))}", inline=False)
+
+        await ctx.send(embed=embed)
+
+    @worldevent_command.command(name='attack', help='Attack the world boss')
+    @persistent_cooldown('raid')
+    async def worldevent_attack_command(self, ctx):
+        """Attack the running world boss."""
+        if not is_module_enabled("rpg", ctx.guild.id):
+            return
+
+        user_id = str(ctx.author.id)
+        if not ensure_user_exists(user_id):
+            await ctx.send("❌ You need to start your adventure first! Use `$start`")
+            return
+
+        event = active_boss_event()
+        if not event or boss_hp(event) <= 0:
+            await ctx.send("❌ There is no world boss to fight right now!")
+            return
+
+        player_data = get_user_rpg_data(user_id)
+        if not player_data:
+            await ctx.send("❌ Could not retrieve your data.")
+            return
+
+        if player_data.get('hp', 100) <= 0:
+            await ctx.send("❌ You are defeated! Use `$heal` to recover.")
+            return
+
+        hits = attack_boss(event, user_id, player_data)
+        update_user_rpg_data(user_id, player_data)
+
+        hp = boss_hp(event)
+        embed = discord.Embed(
+            title=f"⚔️ {event.name}",
+            description="\n".join(format_hit(hit) for hit in hits),
+            color=COLORS['success'] if hp <= 0 else COLORS['warning']
+        )
+        embed.add_field(name="Boss HP",
+                        value=f"{format_number(hp)}/{format_number(event.max_hp)}\n"
+                              f"{create_progress_bar(100 * hp / event.max_hp)}", inline=False)
+        embed.add_field(name="Your HP", value=f"{player_data['hp']}/{player_data.get('max_hp', 100)}", inline=True)
+        if hp <= 0:
+            embed.add_field(name="🎉 Victory!", value="The boss has fallen! Rewards will be handed out shortly.",
+                            inline=False)
+        await ctx.send(embed=embed)
+
+    @worldevent_command.command(name='start', help='Schedule a world event (Admin only)')
+    @commands.has_permissions(administrator=True)
+    async def worldevent_start_command(self, ctx, event_type: str, delay_minutes: int = 0):
+        """Schedule a world event, announced in this channel."""
+        from utils.constants import WORLD_EVENTS
+
+        if event_type not in WORLD_EVENTS:
+            await ctx.send(f"❌ Unknown event! Choose from: {', '.join(WORLD_EVENTS.keys())}")
+            return
+
+        starts_at = datetime.now().timestamp() + max(0, delay_minutes) * 60
+        event = schedule_event(event_type, starts_at, channel_id=ctx.channel.id)
+        when = f"in {delay_minutes} minutes" if delay_minutes > 0 else "momentarily"
+        await ctx.send(f"📅 **{event.name}** will begin {when}.")
+
+    async def retire_dungeon_message(self, run: DungeonRun):
+        """Stop the views of a run's current message and remove its buttons."""
+        shared_edits.cancel(run.session_id)
+        for view in self.bot.persistent_views:
+            if isinstance(view, DungeonView) and view.session_id == run.session_id:
+                view.stop()
+
+        channel = self.bot.get_channel(run.channel_id) if run.channel_id else None
+        if channel and run.message_id:
+            try:
+                await channel.get_partial_message(run.message_id).edit(view=None)
+            except discord.HTTPException as e:
+                logger.warning(f"Could not clear the buttons of dungeon message {run.message_id}: {e}")
+
+    @commands.group(name='dungeon', help='Explore a multi-floor dungeon, or resume your run',
+                    invoke_without_command=True)
+    async def dungeon_command(self, ctx, *, name: Optional[str] = None):
+        """Enter a dungeon, list the dungeons, or resume the current run."""
+        if not is_module_enabled("rpg", ctx.guild.id):
+            return
+
+        user_id = str(ctx.author.id)
+        if not ensure_user_exists(user_id):
+            await ctx.send("❌ You need to start your adventure first! Use `$start`")
+            return
+
+        player_data = get_user_rpg_data(user_id)
+        if not player_data:
+            await ctx.send("❌ Could not retrieve your data.")
+            return
+
+        dungeons = get_dungeons()
+        run = get_run(user_id, player_data.get('party_id'))
+        if run:
+            # Move the run to a fresh message, retiring the old one's buttons first
+            await self.retire_dungeon_message(run)
+            view = DungeonView(run)
+            message = await ctx.send(content="🏰 Resuming your dungeon run...", embed=dungeon_embed(run), view=view)
+            run.channel_id, run.message_id = message.channel.id, message.id
+            save_session(run)
+            return
+
+        if not name:
+            level = player_data.get('level', 1)
+            embed = discord.Embed(
+                title="🏰 Dungeons",
+                description="Use `$dungeon <name>` to enter, or `$dungeon party <name>` to lead your party in. "
+                            "Clear every floor to keep the loot!",
+                color=COLORS['primary']
+            )
+            for key, table in dungeons.items():
+                locked = "🔒 " if level < table.min_level else ""
+                value = f"{table.description}\n" if table.description else ""
+                value += f"Level {table.min_level}+ • {len(table.floors)} floors • `$dungeon {key}`"
+                if table.required_item:
+                    value += f"\nRequires: {item_display_name(table.required_item)}"
+                if table.event_only:
+                    value += "\nOnly open during world events"
+                embed.add_field(name=f"{locked}{table.name}", value=value, inline=False)
+            await ctx.send(embed=embed)
+            return
+
+        table = self.find_dungeon(name)
+        if table is None:
+            await ctx.send(f"❌ Unknown dungeon! Choose from: {', '.join(dungeons.keys())}")
+            return
+
+        reason = check_entry(player_data, table)
+        if reason:
+            await ctx.send(f"❌ {reason}")
+            return
+
+        retry_after = get_retry_after(user_id, 'dungeon')
+        if retry_after > 0:
+            await ctx.send(f"⏰ You are still recovering from your last dungeon! "
+                           f"Try again in {format_time_remaining(int(retry_after))}.")
+            return
+        set_cooldown(user_id, 'dungeon', RPG_CONSTANTS['dungeon_cooldown'])
+
+        run = start_run(user_id, player_data, table)
+        message = await ctx.send(embed=dungeon_embed(run), view=DungeonView(run))
+        run.channel_id, run.message_id = message.channel.id, message.id
+        save_session(run)
+
+    def find_dungeon(self, name: str):
+        """Find a compiled dungeon by key or display name."""
+        dungeons = get_dungeons()
+        key = name.lower().replace(' ', '_')
+        return dungeons.get(key) or next((table for table in dungeons.values() if table.name.lower() == name.lower()),
+                                         None)
+
+    @dungeon_command.command(name='party', help='Lead your party into a dungeon')
+    async def dungeon_party_command(self, ctx, *, name: str):
+        """Start a shared dungeon run for the whole party."""
+        if not is_module_enabled("rpg", ctx.guild.id):
+            return
+
+        from utils.database import get_party_data, update_party_data
+
+        user_id = str(ctx.author.id)
+        player_data = get_user_rpg_data(user_id)
+        if not player_data:
+            await ctx.send("❌ You need to start your adventure first! Use `$start`")
+            return
+
+        party_id = player_data.get('party_id')
+        party_data = get_party_data(party_id) if party_id else None
+        if not party_data:
+            await ctx.send("❌ You're not in a party! Use `$party create` to create one.")
+            return
+        if party_data['leader_id'] != user_id:
+            await ctx.send("❌ Only the party leader can start a party dungeon!")
+            return
+
+        current = get_run(user_id, party_id)
+        if current and current.party_id:
+            await ctx.send("❌ Your party is already in a dungeon! Use `$dungeon` to resume it.")
+            return
+
+        table = self.find_dungeon(name)
+        if table is None:
+            await ctx.send(f"❌ Unknown dungeon! Choose from: {', '.join(get_dungeons().keys())}")
+            return
+
+        profiles = {}
+        for member_id in party_data['members']:
+            member_data = player_data if member_id == user_id else get_user_rpg_data(member_id)
+            if not member_data:
+                await ctx.send(f"❌ Could not retrieve <@{member_id}>'s data.")
+                return
+            reason = check_entry(member_data, table)
+            if reason is None and get_run(member_id):
+                reason = "You are already in a dungeon! Use `$dungeon` to resume it."
+            if reason is None and get_retry_after(member_id, 'dungeon') > 0:
+                reason = "You are still recovering from your last dungeon!"
+            if reason:
+                await ctx.send(f"❌ <@{member_id}>: {reason}")
+                return
+            profiles[member_id] = member_data
+
+        for member_id in profiles:
+            set_cooldown(member_id, 'dungeon', RPG_CONSTANTS['dungeon_cooldown'])
+        party_data['active_dungeon'] = table.key
+        update_party_data(party_id, party_data)
+
+        run = start_party_run(party_data, profiles, table)
+        mentions = " ".join(f"<@{member_id}>" for member_id in profiles)
+        message = await ctx.send(content=f"👥 {mentions} - {party_data['name']} enters {table.name}!",
+                                 embed=dungeon_embed(run), view=DungeonView(run))
+        run.channel_id, run.message_id = message.channel.id, message.id
+        save_session(run)
 
     @commands.command(name='trade', help='Trade items with another player')
     async def trade_command(self, ctx, member: discord.Member):
@@ -3807,17 +4620,11 @@ class RPGGamesCog(commands.Cog):
         item_data = None
         item_type = None
 
-        if item_name in WEAPONS:
-            item_data = WEAPONS[item_name]
-            item_type = "weapon"
-            item_found = True
-        elif item_name in ARMOR:
-            item_data = ARMOR[item_name]
-            item_type = "armor"
-            item_found = True
-        elif item_name == "Reality Stone":
-            item_data = OMNIPOTENT_ITEM["Reality Stone"]
-            item_type = "accessory"
+        catalog_item = get_catalog().get_by_name(item_name)
+        if catalog_item and catalog_item['source'] in ('weapon', 'armor', 'special'):
+            item_data = catalog_item
+            item_name = catalog_item['name']
+            item_type = {"weapon": "weapon", "armor": "armor", "special": "accessory"}[catalog_item['source']]
             item_found = True
 
         if not item_found:
@@ -3857,7 +4664,12 @@ class RPGGamesCog(commands.Cog):
 
         from utils.helpers import check_chrono_weave_unlock
 
-        can_unlock, status_msg = check_chrono_weave_unlock(user_id)
+        player_data = get_user_rpg_data(user_id, sections=("history",))
+        if not player_data:
+            await ctx.send("❌ Could not retrieve your data.")
+            return
+
+        can_unlock, status_msg = check_chrono_weave_unlock(player_data)
 
         embed = discord.Embed(
             title="⏰ Chrono Weave Class Unlock",
@@ -3891,6 +4703,29 @@ class RPGGamesCog(commands.Cog):
 
         await ctx.send(embed=embed)
 
+    # Slash command autocomplete (served from the prebuilt search indexes)
+    def inventory_choices(self, user_id: int, current: str) -> List[app_commands.Choice[str]]:
+        """Get autocomplete choices from a player's inventory."""
+        player_data = get_user_rpg_data(str(user_id)) or {}
+        names = item_names(player_data)
+        return [app_commands.Choice(name=name, value=name) for name in ItemSearchIndex(names).search(current, 25)]
+
+    @buy_command.autocomplete('item_name')
+    async def buy_autocomplete(self, interaction: discord.Interaction, current: str):
+        return [app_commands.Choice(name=name, value=name) for name in get_search_index('shop').search(current, 25)]
+
+    @use_command.autocomplete('item_name')
+    async def use_autocomplete(self, interaction: discord.Interaction, current: str):
+        return self.inventory_choices(interaction.user.id, current)
+
+    @equip_command.autocomplete('item_name')
+    async def equip_autocomplete(self, interaction: discord.Interaction, current: str):
+        return self.inventory_choices(interaction.user.id, current)
+
+    @weapon_command.autocomplete('weapon_name')
+    async def weapon_autocomplete(self, interaction: discord.Interaction, current: str):
+        return [app_commands.Choice(name=name, value=name) for name in get_search_index('weapon').search(current, 25)]
+
 async def setup(bot):
     """Setup function for the cog."""
     await bot.add_cog(RPGGamesCog(bot))
\ No newline at end of file
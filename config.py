@@ -1,11 +1,22 @@
 import discord
-from replit import db
+from utils.storage import db
 import logging
 import os
+import copy
+import time
 from typing import Dict, Any, Optional
 
+from utils.cluster import register_invalidation_handler, publish_invalidation
+from utils.database import to_plain
+from utils.hot_reload import register_cache_invalidator
+
 logger = logging.getLogger(__name__)
 
+# Server configs are read on nearly every command, so keep them in memory.
+# Entries are dropped on update (locally and on other cluster workers) and expire after the TTL
+SERVER_CONFIG_CACHE_TTL = 300
+_server_config_cache: Dict[int, tuple] = {}
+
 # Bot configuration
 COLORS = {
     'primary': 0x3498db,
@@ -40,11 +51,25 @@ EMOJIS = {
     'luck': '🍀'
 }
 
+def invalidate_server_config(guild_id: Optional[int] = None):
+    """Drop a cached server config (or all of them)."""
+    if guild_id is None:
+        _server_config_cache.clear()
+    else:
+        _server_config_cache.pop(int(guild_id), None)
+
+register_invalidation_handler('server_config', invalidate_server_config)
+register_cache_invalidator('server_config', invalidate_server_config)
+
 def get_server_config(guild_id: int) -> Dict[str, Any]:
     """Get server configuration from database."""
+    cached = _server_config_cache.get(guild_id)
+    if cached and time.monotonic() - cached[0] < SERVER_CONFIG_CACHE_TTL:
+        return copy.deepcopy(cached[1])
+
     try:
         config_key = f"server_config_{guild_id}"
-        config = db.get(config_key, {})
+        config = to_plain(db.get(config_key, {}))
         
         # Ensure default values exist
         default_config = {
@@ -71,8 +96,9 @@ def get_server_config(guild_id: int) -> Dict[str, Any]:
         for key, value in default_config.items():
             if key not in config:
                 config[key] = value
-                
-        return config
+
+        _server_config_cache[guild_id] = (time.monotonic(), config)
+        return copy.deepcopy(config)
     except Exception as e:
         logger.error(f"Error getting server config for {guild_id}: {e}")
         return {}
@@ -82,6 +108,8 @@ def update_server_config(guild_id: int, config: Dict[str, Any]) -> bool:
     try:
         config_key = f"server_config_{guild_id}"
         db[config_key] = config
+        invalidate_server_config(guild_id)
+        publish_invalidation('server_config', guild_id)
         return True
     except Exception as e:
         logger.error(f"Error updating server config for {guild_id}: {e}")
@@ -3,23 +3,29 @@ from discord.ext import commands
 import os
 import logging
 import asyncio
+import signal
 from datetime import datetime
 import threading
-from web_server import run_web_server
+from utils.storage import db
+from web_server import run_web_server, update_bot_status
 from config import COLORS, EMOJIS, get_server_config
-from utils.database import initialize_database
+from utils.database import initialize_database, flush_profile_writes
+from utils.profile_schema import run_background_migration
+from utils.cooldowns import flush_cooldowns
+from utils.battle_sessions import flush_battle_sessions
+from utils.pvp_rating import flush_ladder
+from utils.world_events import flush_shards
+from utils.status_effects import flush_status_timers
 from cogs.help import HelpView
 from utils import create_embed
-
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('bot.log'),
-        logging.StreamHandler()
-    ]
-)
+from utils.logging_config import setup_logging, shutdown_logging
+from utils.startup import startup_timeline, prewarm_imports
+from utils.sharding import create_bot, owns_primary_shard, get_shard_settings
+from utils.cluster import start_cluster_client, stop_cluster_client, register_event_handler, broadcast_event, report_health, is_clustered
+from utils.helpers import send_to_all_guilds
+
+# Configure logging (queue based, rotating, written by a background thread)
+setup_logging()
 logger = logging.getLogger(__name__)
 
 # Bot configuration
@@ -28,7 +34,8 @@ intents.message_content = True
 intents.members = True
 intents.guilds = True
 
-bot = commands.Bot(
+# AutoShardedBot when SHARD_COUNT / SHARD_IDS / BOT_SHARDED are set
+bot = create_bot(
     command_prefix='$',
     intents=intents,
     help_command=None,  # We'll implement our own
@@ -57,16 +64,52 @@ async def on_ready():
         activity=discord.Game(name="AI Chat & RPG Adventures | $help")
     )
 
-    # Start reminder checking task
-    bot.loop.create_task(check_reminders_task())
+    # Start reminder checking task (on_ready fires again after reconnects).
+    # Reminders go to every guild, so only the process owning shard 0 sends them
+    if not getattr(bot, 'reminder_task', None) and owns_primary_shard(bot):
+        bot.reminder_task = bot.loop.create_task(check_reminders_task())
+
+    # Upgrade stored profiles to the current schema in the background (once per cluster)
+    if not getattr(bot, 'migration_task', None) and owns_primary_shard(bot):
+        bot.migration_task = bot.loop.create_task(run_background_migration())
+
+    # Keep the web server's view of the bot and its shards up to date
+    if not getattr(bot, 'status_task', None):
+        bot.status_task = bot.loop.create_task(update_status_task())
+
+    startup_timeline.set_ready()
+    logger.info(f"Startup timeline: {startup_timeline.summary()}")
+
+@bot.event
+async def on_shard_ready(shard_id):
+    """Called when a single shard is ready."""
+    logger.info(f"Shard {shard_id} is ready")
+
+async def update_status_task():
+    """Background task to publish bot and shard status to the web server."""
+    while True:
+        try:
+            update_bot_status(bot)
+            await report_health(bot)
+        except Exception as e:
+            logger.error(f"Error updating bot status: {e}")
+
+        await asyncio.sleep(30)
+
+async def handle_guild_broadcast(payload):
+    """Send an embed broadcast by another cluster worker to this worker's guilds."""
+    embed = create_embed(payload.get('title', ''), payload.get('description', ''), payload.get('color', COLORS['info']))
+    if payload.get('footer'):
+        embed.set_footer(text=payload['footer'])
+    sent_count = await send_to_all_guilds(bot.guilds, embed)
+    logger.info(f"Delivered cluster broadcast to {sent_count} guilds")
+
+register_event_handler('guild_broadcast', handle_guild_broadcast)
 
 async def check_reminders_task():
     """Background task to check and send reminders."""
     while True:
         try:
-            from replit import db
-            from datetime import datetime
-
             reminders = db.get("scheduled_reminders", [])
             current_time = datetime.now()
 
@@ -83,14 +126,13 @@ async def check_reminders_task():
                         COLORS['info']
                     )
 
-                    # Send to all guilds
-                    for guild in bot.guilds:
-                        try:
-                            channel = guild.system_channel or guild.text_channels[0] if guild.text_channels else None
-                            if channel:
-                                await channel.send(embed=embed)
-                        except:
-                            continue
+                    # Send to all guilds (other cluster workers send to theirs)
+                    await send_to_all_guilds(bot.guilds, embed)
+                    await broadcast_event('guild_broadcast', {
+                        'title': "⏰ Scheduled Reminder",
+                        'description': reminder["message"],
+                        'color': COLORS['info']
+                    })
 
                     sent_reminders.append(reminder)
                 else:
@@ -229,7 +271,6 @@ async def on_member_join(member):
         welcome_channel_id = config.get('welcome_channel')
 
         # Get custom welcome message
-        from replit import db
         custom_welcome = db.get("welcome_message", None)
 
         if welcome_channel_id:
@@ -255,31 +296,43 @@ async def on_member_join(member):
     except Exception as e:
         logger.error(f"Error handling member join: {e}")
 
+COGS = [
+    'cogs.admin',
+    'cogs.moderation',
+    'cogs.rpg_games',
+    'cogs.ai_chatbot',
+    'cogs.help'
+]
+
 async def load_cogs():
     """Load all cogs."""
-    cogs = [
-        'cogs.admin',
-        'cogs.moderation',
-        'cogs.rpg_games',
-        'cogs.ai_chatbot',
-        'cogs.help'
-    ]
-
-    for cog in cogs:
+    # Import the cog modules (and their shared dependencies) in parallel threads,
+    # then register them on the event loop, which discord.py requires to be sequential
+    with startup_timeline.phase("prewarm cogs"):
+        await prewarm_imports(COGS)
+
+    for cog in COGS:
         try:
-            await bot.load_extension(cog)
+            with startup_timeline.phase(f"load {cog}"):
+                await bot.load_extension(cog)
             logger.info(f"Loaded cog: {cog}")
         except Exception as e:
             logger.error(f"Failed to load cog {cog}: {e}")
 
 async def main():
     """Main function to run the bot."""
-    # Start web server in a separate thread
-    web_thread = threading.Thread(target=run_web_server, daemon=True)
-    web_thread.start()
+    # Start web server in a separate thread (the cluster launcher serves it in cluster mode)
+    if not os.getenv('DISABLE_WEB_SERVER'):
+        web_thread = threading.Thread(target=run_web_server, daemon=True)
+        web_thread.start()
+
+    # Connect to the cluster coordinator when launched by cluster.py
+    if is_clustered():
+        await start_cluster_client(get_shard_settings()['shard_ids'])
 
     # Load cogs
     await load_cogs()
+    logger.info(f"Cogs loaded: {startup_timeline.summary()}")
 
     # Get token from environment
     token = os.getenv('DISCORD_TOKEN')
@@ -287,6 +340,15 @@ async def main():
         logger.error("DISCORD_TOKEN not found in environment variables!")
         return
 
+    # SIGTERM (cluster launcher, hosts) and SIGINT close the bot, so the flushes below still run
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, lambda: asyncio.ensure_future(bot.close()))
+        except NotImplementedError:
+            # Windows: SIGINT still arrives as KeyboardInterrupt
+            pass
+
     # Run the bot
     try:
         await bot.start(token)
@@ -296,6 +358,14 @@ async def main():
         logger.error(f"Bot error: {e}")
     finally:
         await bot.close()
+        flush_cooldowns()
+        flush_battle_sessions()
+        flush_ladder()
+        flush_shards()
+        flush_status_timers()
+        flush_profile_writes()
+        await stop_cluster_client()
+        shutdown_logging()
 
 if __name__ == "__main__":
     asyncio.run(main())
\ No newline at end of file
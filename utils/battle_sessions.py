@@ -0,0 +1,214 @@
+"""
+Resumable battle sessions for PvE fights and PvP challenges (and other
+multi-step activities registered with register_session_type, like dungeon runs).
+
+A fight's state lives in a small session record rather than on the
+discord.ui.View, so views can be rebuilt from it: the RPG cog re-registers a
+persistent view for every active session when it loads, and buttons keep
+working across restarts. Sessions are stored under ``battle_session_{id}`` as a
+flat list with an expiry time, written behind so a burst of turns costs one
+write, and dropped once they expire.
+
+Both fighters are stored as combat engine Combatant records, resolved from the
+profile when the fight starts, along with the battle's RNG seed and turn. The
+player's HP is committed to the profile once when the fight ends, so a battle
+costs one profile read and one profile write however many turns it lasts.
+"""
+import logging
+import time
+import uuid
+from dataclasses import astuple, dataclass
+from typing import Any, ClassVar, Dict, List, Optional, Tuple, Union
+
+from utils.combat import Combatant, new_seed
+from utils.storage import db
+from utils.write_behind import WriteBehindBuffer
+
+logger = logging.getLogger(__name__)
+
+SESSION_PREFIX = "battle_session_"
+SESSION_TTL = 900  # Seconds an idle session stays resumable
+
+
+@dataclass(slots=True)
+class BattleSession:
+    """An in-progress PvE fight."""
+
+    session_id: str
+    user_id: str
+    player: List[Any]  # Combatant fields
+    enemy: List[Any]
+    seed: int
+    channel_id: int = 0
+    message_id: int = 0
+    turn: int = 0
+    expires_at: int = 0
+
+    kind: ClassVar[str] = "pve"
+
+    def combatants(self) -> Tuple[Combatant, Combatant]:
+        """Get the player and enemy combatants."""
+        return Combatant(*self.player), Combatant(*self.enemy)
+
+    def set_combatants(self, player: Combatant, enemy: Combatant):
+        """Store the combatants' state after a turn."""
+        self.player, self.enemy = list(astuple(player)), list(astuple(enemy))
+
+
+@dataclass(slots=True)
+class PvPChallenge:
+    """A PvP challenge waiting for the target to respond."""
+
+    session_id: str
+    challenger_id: str
+    target_id: str
+    arena: str
+    channel_id: int = 0
+    message_id: int = 0
+    expires_at: int = 0
+
+    kind: ClassVar[str] = "pvp"
+
+
+Session = Union[BattleSession, PvPChallenge]
+SESSION_TYPES = {cls.kind: cls for cls in (BattleSession, PvPChallenge)}
+
+
+def register_session_type(cls: type):
+    """Register another resumable session type (a slots dataclass with session_id, message_id, expires_at and kind)."""
+    SESSION_TYPES[cls.kind] = cls
+
+_sessions: Dict[str, Session] = {}
+
+
+def _session_key(session_id: str) -> str:
+    """Get the database key of a session."""
+    return f"{SESSION_PREFIX}{session_id}"
+
+
+def _write_session(key: str, record: Optional[List[Any]]):
+    """Store a session record, or delete it when the session has ended."""
+    if record is not None:
+        db[key] = record
+    elif key in db:
+        del db[key]
+
+
+_session_writes = WriteBehindBuffer("battle_sessions", _write_session)
+
+
+def _encode(session: Session) -> List[Any]:
+    """Encode a session as [kind, field, ...]."""
+    return [session.kind, *astuple(session)]
+
+
+def _decode(record: List[Any]) -> Optional[Session]:
+    """Decode a stored session record."""
+    cls = SESSION_TYPES.get(record[0]) if record else None
+    if cls is None:
+        return None
+    try:
+        return cls(*record[1:])
+    except TypeError:
+        # Written by an older version with different fields
+        return None
+
+
+def _new_session_id() -> str:
+    """Get a short unique session ID (it ends up in button custom_ids)."""
+    return uuid.uuid4().hex[:16]
+
+
+def start_battle(user_id: str, player: Combatant, enemy: Combatant, seed: Optional[int] = None) -> BattleSession:
+    """Start a PvE battle between a player and an enemy combatant."""
+    sweep_expired_sessions()
+    session = BattleSession(
+        session_id=_new_session_id(),
+        user_id=user_id,
+        player=list(astuple(player)),
+        enemy=list(astuple(enemy)),
+        seed=new_seed() if seed is None else seed
+    )
+    save_session(session)
+    return session
+
+
+def open_challenge(challenger_id: str, target_id: str, arena: str) -> PvPChallenge:
+    """Open a PvP challenge."""
+    sweep_expired_sessions()
+    challenge = PvPChallenge(_new_session_id(), challenger_id, target_id, arena)
+    save_session(challenge)
+    return challenge
+
+
+def get_session(session_id: str) -> Optional[Session]:
+    """Get an active session, or None if it ended or expired."""
+    session = _sessions.get(session_id)
+    if session is None:
+        key = _session_key(session_id)
+        try:
+            record = _session_writes.get(key) if key in _session_writes else db.get(key)
+        except Exception as e:
+            logger.error(f"Error loading battle session {session_id}: {e}")
+            return None
+        session = _decode(record) if record else None
+        if session is None:
+            return None
+
+    if session.expires_at <= time.time():
+        end_session(session)
+        return None
+
+    _sessions[session_id] = session
+    return session
+
+
+def save_session(session: Session):
+    """Record a session change and extend its expiry."""
+    session.expires_at = int(time.time()) + SESSION_TTL
+    _sessions[session.session_id] = session
+    _session_writes.put(_session_key(session.session_id), _encode(session))
+
+
+def end_session(session: Session):
+    """End a session and delete its record."""
+    _sessions.pop(session.session_id, None)
+    _session_writes.put(_session_key(session.session_id), None)
+
+
+def load_active_sessions() -> List[Session]:
+    """Load every unexpired session with a message (for re-registering views), deleting expired ones."""
+    now = time.time()
+    active = []
+    for key in db.prefix(SESSION_PREFIX):
+        try:
+            # A pending write (e.g. across a cog reload) is newer than the stored record
+            record = _session_writes.get(key) if key in _session_writes else db[key]
+            session = _sessions.get(key[len(SESSION_PREFIX):]) or (_decode(record) if record else None)
+        except Exception as e:
+            logger.error(f"Error loading battle session {key}: {e}")
+            continue
+        if session is None or session.expires_at <= now:
+            if record is not None:
+                _session_writes.put(key, None)
+            continue
+        _sessions[session.session_id] = session
+        if session.message_id:
+            active.append(session)
+
+    logger.info(f"Restored {len(active)} battle sessions")
+    return active
+
+
+def sweep_expired_sessions() -> int:
+    """Drop expired sessions from memory and storage. Returns the number dropped."""
+    now = time.time()
+    expired = [session for session in _sessions.values() if session.expires_at <= now]
+    for session in expired:
+        end_session(session)
+    return len(expired)
+
+
+def flush_battle_sessions() -> int:
+    """Write every pending session change now (used at shutdown)."""
+    return _session_writes.flush()
@@ -0,0 +1,323 @@
+"""
+Cluster mode: several bot processes, each owning a range of shards.
+
+``cluster.py`` runs a ClusterCoordinator on a Unix socket and spawns the worker
+processes. Every worker connects with a ClusterClient. Messages are JSON objects,
+one per line:
+
+    {"op": "hello", "cluster_id": 0, "shard_ids": [0, 1]}
+    {"op": "event", "event": "guild_broadcast", "payload": {...}}
+    {"op": "invalidate", "cache": "server_config", "key": 1234}
+    {"op": "health", "data": {...}}
+
+Events and invalidations are relayed to every other worker; health reports are
+kept by the coordinator and served from its /health endpoint.
+"""
+import asyncio
+import json
+import logging
+import os
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SOCKET_PATH = '/tmp/plagg_cluster.sock'
+
+_client: Optional['ClusterClient'] = None
+_event_handlers: Dict[str, List[Callable[[Dict[str, Any]], Awaitable[Any]]]] = {}
+_invalidation_handlers: Dict[str, List[Callable[[Any], Any]]] = {}
+
+
+def _encode(message: Dict[str, Any]) -> bytes:
+    """Encode a message as a JSON line."""
+    return (json.dumps(message, default=str) + '\n').encode('utf-8')
+
+
+def get_cluster_id() -> Optional[int]:
+    """Get this worker's cluster id (None outside cluster mode)."""
+    cluster_id = os.getenv('CLUSTER_ID')
+    return int(cluster_id) if cluster_id else None
+
+
+def is_clustered() -> bool:
+    """Check if this process runs as a cluster worker."""
+    return get_cluster_id() is not None
+
+
+def register_event_handler(event: str, handler: Callable[[Dict[str, Any]], Awaitable[Any]]):
+    """Register a coroutine called when another worker broadcasts an event."""
+    handlers = _event_handlers.setdefault(event, [])
+    # Replace a handler with the same name so hot reloads do not stack duplicates
+    handlers[:] = [h for h in handlers if getattr(h, '__qualname__', None) != getattr(handler, '__qualname__', None)]
+    handlers.append(handler)
+
+
+def register_invalidation_handler(cache: str, handler: Callable[[Any], Any]):
+    """Register a function that drops a cached key when another worker changes it."""
+    handlers = _invalidation_handlers.setdefault(cache, [])
+    handlers[:] = [h for h in handlers if getattr(h, '__qualname__', None) != getattr(handler, '__qualname__', None)]
+    handlers.append(handler)
+
+
+def _run_invalidation(cache: str, key: Any):
+    """Run the local invalidation handlers for a cache key."""
+    for handler in _invalidation_handlers.get(cache, []):
+        try:
+            handler(key)
+        except Exception as e:
+            logger.error(f"Error invalidating {cache}:{key}: {e}")
+
+
+def publish_invalidation(cache: str, key: Any = None):
+    """Tell the other workers that a cached key changed (no-op outside cluster mode)."""
+    if _client:
+        _client.send_nowait({'op': 'invalidate', 'cache': cache, 'key': key})
+
+
+async def broadcast_event(event: str, payload: Dict[str, Any]) -> bool:
+    """Send an event to every other worker. Returns False outside cluster mode."""
+    if not _client:
+        return False
+    _client.send_nowait({'op': 'event', 'event': event, 'payload': payload})
+    return True
+
+
+def build_health_report(bot) -> Dict[str, Any]:
+    """Build this worker's health report."""
+    from utils.sharding import get_local_shard_ids, get_shard_stats
+
+    shards = get_shard_stats(bot)
+    latencies = [shard['latency'] for shard in shards if shard['latency'] is not None]
+    return {
+        'cluster_id': get_cluster_id(),
+        'pid': os.getpid(),
+        'online': bot.is_ready() and not bot.is_closed(),
+        'shard_ids': get_local_shard_ids(bot),
+        'guilds': len(bot.guilds),
+        'users': len(bot.users),
+        'latency': round(sum(latencies) / len(latencies), 2) if latencies else None,
+        'shards': shards,
+        'reported_at': time.time()
+    }
+
+
+async def report_health(bot):
+    """Send this worker's health report to the coordinator."""
+    if _client:
+        _client.send_nowait({'op': 'health', 'data': build_health_report(bot)})
+
+
+class ClusterClient:
+    """Worker side connection to the cluster coordinator."""
+
+    def __init__(self, socket_path: str, cluster_id: int, shard_ids: Optional[List[int]] = None):
+        self.socket_path = socket_path
+        self.cluster_id = cluster_id
+        self.shard_ids = shard_ids or []
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.outgoing: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self):
+        """Start the connection loop in the background."""
+        self.loop = asyncio.get_running_loop()
+        self.outgoing = asyncio.Queue(maxsize=1000)
+        self._task = self.loop.create_task(self._run())
+
+    async def close(self):
+        """Stop the connection loop."""
+        if self._task:
+            self._task.cancel()
+            self._task = None
+
+    def send_nowait(self, message: Dict[str, Any]):
+        """Queue a message for the coordinator (safe to call from any thread)."""
+        if not self.loop or not self.outgoing:
+            return
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is self.loop:
+            self._enqueue(message)
+        else:
+            self.loop.call_soon_threadsafe(self._enqueue, message)
+
+    def _enqueue(self, message: Dict[str, Any]):
+        """Queue a message, dropping it if the coordinator has been unreachable for long."""
+        try:
+            self.outgoing.put_nowait(message)
+        except asyncio.QueueFull:
+            logger.warning(f"Cluster queue full, dropping {message.get('op')} message")
+
+    async def _run(self):
+        """Connect to the coordinator and reconnect with backoff if the link drops."""
+        delay = 1
+        while True:
+            try:
+                reader, writer = await asyncio.open_unix_connection(self.socket_path)
+                delay = 1
+                writer.write(_encode({'op': 'hello', 'cluster_id': self.cluster_id, 'shard_ids': self.shard_ids}))
+                await writer.drain()
+                logger.info(f"Cluster {self.cluster_id} connected to coordinator")
+
+                sender = asyncio.create_task(self._send_loop(writer))
+                try:
+                    await self._receive_loop(reader)
+                finally:
+                    sender.cancel()
+                    writer.close()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Cluster coordinator connection failed: {e}")
+
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 30)
+
+    async def _send_loop(self, writer: asyncio.StreamWriter):
+        """Write queued messages to the coordinator."""
+        while True:
+            message = await self.outgoing.get()
+            writer.write(_encode(message))
+            await writer.drain()
+
+    async def _receive_loop(self, reader: asyncio.StreamReader):
+        """Dispatch messages relayed by the coordinator."""
+        while True:
+            line = await reader.readline()
+            if not line:
+                logger.warning("Cluster coordinator closed the connection")
+                return
+
+            try:
+                message = json.loads(line)
+            except ValueError:
+                continue
+
+            if message.get('op') == 'invalidate':
+                _run_invalidation(message.get('cache'), message.get('key'))
+            elif message.get('op') == 'event':
+                for handler in _event_handlers.get(message.get('event'), []):
+                    try:
+                        await handler(message.get('payload') or {})
+                    except Exception as e:
+                        logger.error(f"Error handling cluster event {message.get('event')}: {e}")
+
+
+async def start_cluster_client(shard_ids: Optional[List[int]] = None) -> Optional[ClusterClient]:
+    """Connect this worker to the coordinator when running in cluster mode."""
+    global _client
+
+    cluster_id = get_cluster_id()
+    if cluster_id is None:
+        return None
+    if _client:
+        return _client
+
+    socket_path = os.getenv('CLUSTER_SOCKET', DEFAULT_SOCKET_PATH)
+    _client = ClusterClient(socket_path, cluster_id, shard_ids)
+    await _client.start()
+    return _client
+
+
+async def stop_cluster_client():
+    """Disconnect this worker from the coordinator."""
+    global _client
+
+    if _client:
+        await _client.close()
+        _client = None
+
+
+class ClusterCoordinator:
+    """Launcher side hub that relays messages between workers."""
+
+    def __init__(self, socket_path: str = DEFAULT_SOCKET_PATH):
+        self.socket_path = socket_path
+        self.writers: Dict[int, asyncio.StreamWriter] = {}
+        self.health: Dict[int, Dict[str, Any]] = {}
+        self.server: Optional[asyncio.AbstractServer] = None
+
+    async def start(self):
+        """Start listening on the Unix socket."""
+        if os.path.exists(self.socket_path):
+            os.remove(self.socket_path)
+        self.server = await asyncio.start_unix_server(self._handle_worker, path=self.socket_path)
+        logger.info(f"Cluster coordinator listening on {self.socket_path}")
+
+    async def close(self):
+        """Stop the server and drop worker connections."""
+        if self.server:
+            self.server.close()
+            await self.server.wait_closed()
+        for writer in self.writers.values():
+            writer.close()
+        self.writers.clear()
+        if os.path.exists(self.socket_path):
+            os.remove(self.socket_path)
+
+    async def _relay(self, sender_id: Optional[int], message: Dict[str, Any]):
+        """Send a message to every worker except the sender."""
+        data = _encode(message)
+        for cluster_id, writer in list(self.writers.items()):
+            if cluster_id == sender_id:
+                continue
+            try:
+                writer.write(data)
+                await writer.drain()
+            except Exception as e:
+                logger.warning(f"Failed to relay to cluster {cluster_id}: {e}")
+
+    async def _handle_worker(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Serve one worker connection."""
+        cluster_id = None
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+
+                try:
+                    message = json.loads(line)
+                except ValueError:
+                    continue
+
+                op = message.get('op')
+                if op == 'hello':
+                    cluster_id = message.get('cluster_id')
+                    self.writers[cluster_id] = writer
+                    logger.info(f"Cluster {cluster_id} joined (shards: {message.get('shard_ids')})")
+                elif op == 'health' and cluster_id is not None:
+                    self.health[cluster_id] = message.get('data') or {}
+                elif op in ('event', 'invalidate'):
+                    await self._relay(cluster_id, message)
+        except Exception as e:
+            logger.error(f"Error serving cluster {cluster_id}: {e}")
+        finally:
+            if cluster_id is not None and self.writers.get(cluster_id) is writer:
+                del self.writers[cluster_id]
+                logger.warning(f"Cluster {cluster_id} disconnected")
+            writer.close()
+
+    def aggregate_health(self, stale_after: float = 90) -> Dict[str, Any]:
+        """Combine the latest worker reports into one health summary."""
+        now = time.time()
+        clusters = []
+        for cluster_id, report in sorted(self.health.items()):
+            entry = dict(report)
+            entry['connected'] = cluster_id in self.writers
+            entry['stale'] = now - report.get('reported_at', 0) > stale_after
+            clusters.append(entry)
+
+        live = [c for c in clusters if c['connected'] and not c['stale']]
+        latencies = [c['latency'] for c in live if c.get('latency') is not None]
+        return {
+            'is_online': any(c.get('online') for c in live),
+            'guilds': sum(c.get('guilds', 0) for c in live),
+            'users': sum(c.get('users', 0) for c in live),
+            'latency': round(sum(latencies) / len(latencies), 2) if latencies else 0,
+            'shards': [shard for c in live for shard in c.get('shards', [])],
+            'clusters': clusters
+        }
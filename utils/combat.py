@@ -0,0 +1,240 @@
+"""
+Combat engine shared by PvE battles, PvP, dungeons and raid bosses.
+
+Fighters are reduced to compact Combatant records once per battle: base
+attack/defense plus the multipliers from status effects, the critical hit
+chance and the specials of the equipped weapon. Every random roll comes from
+an RNG derived from the battle's seed and the turn number, so any fight can be
+replayed or verified from (combatants, seed) alone and a resumed battle rolls
+exactly as it would have without the restart.
+
+Damage is ``max(1, attack - defense)`` varied by ±20%, doubled
+(critical_multiplier) on a critical hit, raised by boss_damage against bosses
+and reduced by damage penalties. resolve() auto-battles two combatants in one
+call, resolve_many() runs many matchups, and raid_round() resolves one attack
+from each of any number of raiders against a shared boss.
+"""
+import random
+from dataclasses import dataclass, field, replace
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from utils.constants import RPG_CONSTANTS, STATUS_EFFECTS
+
+# Inventory items that work without being equipped
+OMNIPOTENT_WEAPONS = ("World Ender",)
+
+
+@dataclass(slots=True)
+class Combatant:
+    """A fighter's combat stats, resolved once per battle."""
+
+    name: str
+    hp: int
+    max_hp: int
+    attack: int
+    defense: int
+    crit_chance: float = RPG_CONSTANTS['critical_chance']
+    crit_multiplier: float = RPG_CONSTANTS['critical_multiplier']
+    attack_multiplier: float = 1.0
+    defense_multiplier: float = 1.0
+    damage_multiplier: float = 1.0
+    boss_damage: float = 0.0  # Percent bonus against bosses
+    one_shot: bool = False
+    is_boss: bool = False
+    combatant_id: str = ""
+
+    @property
+    def alive(self) -> bool:
+        return self.hp > 0
+
+    @property
+    def hp_percent(self) -> float:
+        return 100 * max(0, self.hp) / self.max_hp if self.max_hp else 0.0
+
+
+@dataclass(slots=True)
+class Hit:
+    """The outcome of one attack."""
+
+    attacker: str
+    defender: str
+    damage: int
+    critical: bool = False
+    turn: int = 0
+
+
+@dataclass(slots=True)
+class BattleResult:
+    """The outcome of an auto-battle."""
+
+    winner: Optional[Combatant]
+    loser: Optional[Combatant]
+    turns: int
+    seed: int
+    hits: List[Hit] = field(default_factory=list)
+
+
+def new_seed() -> int:
+    """Get a random battle seed."""
+    return random.getrandbits(32)
+
+
+def turn_rng(seed: int, turn: int) -> random.Random:
+    """Get the RNG for one turn of a battle."""
+    return random.Random(seed * 1_000_003 + turn)
+
+
+def active_status_effects(player_data: Dict[str, Any], now: Optional[float] = None) -> List[str]:
+    """Get the names of a player's unexpired status effects."""
+    from utils.status_effects import active_effects
+    return list(active_effects(player_data, now))
+
+
+def combatant_from_profile(player_data: Dict[str, Any], name: str = "Player", combatant_id: str = "",
+                           effects: Optional[Iterable[str]] = None) -> Combatant:
+    """Build a combatant from a player profile (stats already include equipment bonuses)."""
+    from utils.inventory import has_item
+    from utils.item_catalog import get_catalog
+
+    combatant = Combatant(
+        name=name,
+        hp=player_data.get('hp', 100),
+        max_hp=player_data.get('max_hp', 100),
+        attack=player_data.get('attack', 10),
+        defense=player_data.get('defense', 5),
+        combatant_id=combatant_id or str(player_data.get('user_id', ''))
+    )
+
+    weapon = None
+    weapon_name = (player_data.get('equipped') or {}).get('weapon')
+    if weapon_name:
+        # $equip stores the name as typed, so fall back to a case-insensitive lookup
+        catalog = get_catalog()
+        weapon = catalog.weapons.get(weapon_name)
+        if weapon is None:
+            entry = catalog.resolve(weapon_name)
+            weapon = entry if entry and entry['source'] == 'weapon' else None
+    if weapon:
+        combatant.crit_chance += weapon.get('crit_chance', 0) / 100
+        combatant.boss_damage = weapon.get('boss_damage', 0)
+        combatant.one_shot = weapon.get('special') == 'one_shot_kill'
+    if any(has_item(player_data, item) for item in OMNIPOTENT_WEAPONS):
+        combatant.one_shot = True
+
+    for effect in active_status_effects(player_data) if effects is None else effects:
+        bonuses = STATUS_EFFECTS.get(effect, {}).get('effects', {})
+        combatant.attack_multiplier *= bonuses.get('attack_bonus', 1.0)
+        combatant.defense_multiplier *= bonuses.get('defense_bonus', 1.0)
+        combatant.damage_multiplier *= bonuses.get('damage_penalty', 1.0)
+
+    return combatant
+
+
+def combatant_from_enemy(enemy: Dict[str, Any], is_boss: bool = False) -> Combatant:
+    """Build a combatant from a monster or boss definition."""
+    return Combatant(
+        name=enemy.get('name', 'Enemy'),
+        hp=enemy.get('hp', 50),
+        max_hp=enemy.get('max_hp', enemy.get('hp', 50)),
+        attack=enemy.get('attack', 8),
+        defense=enemy.get('defense', 0),
+        crit_chance=enemy.get('crit_chance', RPG_CONSTANTS['critical_chance']),
+        is_boss=is_boss or enemy.get('is_boss', False),
+        combatant_id=enemy.get('id', '')
+    )
+
+
+def roll_damage(attacker: Combatant, defender: Combatant, rng: random.Random,
+                guard: float = 1.0) -> Tuple[int, bool]:
+    """Roll one attack's damage. guard multiplies the defender's defense (2 when defending)."""
+    if attacker.one_shot:
+        return max(1, defender.hp), False
+
+    attack = attacker.attack * attacker.attack_multiplier
+    defense = defender.defense * defender.defense_multiplier * guard
+    damage = max(1, attack - defense) * rng.uniform(0.8, 1.2)
+
+    critical = rng.random() < attacker.crit_chance
+    if critical:
+        damage *= attacker.crit_multiplier
+    if defender.is_boss and attacker.boss_damage:
+        damage *= 1 + attacker.boss_damage / 100
+    damage *= attacker.damage_multiplier
+
+    return max(1, int(damage)), critical
+
+
+def strike(attacker: Combatant, defender: Combatant, rng: random.Random, turn: int = 0,
+           guard: float = 1.0) -> Hit:
+    """Resolve one attack, applying the damage to the defender."""
+    damage, critical = roll_damage(attacker, defender, rng, guard)
+    defender.hp -= damage
+    return Hit(attacker.name, defender.name, damage, critical, turn)
+
+
+def play_turn(player: Combatant, enemy: Combatant, seed: int, turn: int, action: str = "attack") -> List[Hit]:
+    """Resolve one interactive turn: the player attacks or defends, then the enemy strikes back if alive."""
+    rng = turn_rng(seed, turn)
+    hits = []
+    if action == "attack":
+        hits.append(strike(player, enemy, rng, turn))
+    if enemy.alive:
+        hits.append(strike(enemy, player, rng, turn, guard=2.0 if action == "defend" else 1.0))
+    return hits
+
+
+def resolve(first: Combatant, second: Combatant, seed: Optional[int] = None, max_turns: int = 10,
+            copy: bool = True) -> BattleResult:
+    """Auto-battle two combatants, alternating attacks for up to max_turns rounds.
+
+    If both survive, the one with more HP left wins. The inputs are copied
+    unless copy=False, in which case their HP is updated in place.
+    """
+    seed = new_seed() if seed is None else seed
+    if copy:
+        first, second = replace(first), replace(second)
+
+    hits = []
+    turn = 0
+    while first.alive and second.alive and turn < max_turns:
+        turn += 1
+        rng = turn_rng(seed, turn)
+        hits.append(strike(first, second, rng, turn))
+        if second.alive:
+            hits.append(strike(second, first, rng, turn))
+
+    winner, loser = (first, second) if first.hp > second.hp else (second, first)
+    return BattleResult(winner, loser, turn, seed, hits)
+
+
+def resolve_many(matchups: Iterable[Tuple[Combatant, Combatant]], seed: Optional[int] = None,
+                 max_turns: int = 10) -> List[BattleResult]:
+    """Auto-battle many matchups in one call, each with a seed derived from the batch seed."""
+    seed = new_seed() if seed is None else seed
+    return [resolve(first, second, seed + index, max_turns) for index, (first, second) in enumerate(matchups)]
+
+
+def raid_round(raiders: List[Combatant], boss: Combatant, seed: int, round_number: int,
+               counterattack: bool = True) -> List[Hit]:
+    """Resolve one round of a raid: every living raider hits the boss once, in order.
+
+    When counterattack is set the boss strikes each raider back while it
+    stands. Returns every hit; the boss's and raiders' HP are updated in place.
+    """
+    rng = turn_rng(seed, round_number)
+    hits = []
+    for raider in raiders:
+        if not boss.alive:
+            break
+        if not raider.alive:
+            continue
+        hits.append(strike(raider, boss, rng, round_number))
+        if counterattack and boss.alive:
+            hits.append(strike(boss, raider, rng, round_number))
+    return hits
+
+
+def format_hit(hit: Hit) -> str:
+    """Format a hit for a battle log."""
+    critical = " 💥 **Critical hit!**" if hit.critical else ""
+    return f"{hit.attacker} dealt {hit.damage} damage to {hit.defender}!{critical}"
@@ -15,6 +15,7 @@ RPG_CONSTANTS = {
     'gather_cooldown': 900,     # 15 minutes
     'trade_cooldown': 1800,     # 30 minutes
     'quest_cooldown': 3600,     # 1 hour
+    'raid_cooldown': 60,        # 1 minute between world boss attacks
 
     # Costs
     'heal_cost': 50,            # Cost to heal
@@ -39,6 +40,8 @@ RPG_CONSTANTS = {
 
     # Economy
     'max_inventory_size': 50,   # Maximum inventory slots
+    'max_stack_size': 99,       # Maximum quantity per inventory slot
+    'sell_ratio': 0.5,          # Shop items sell back for half price
     'auction_tax': 0.05,        # 5% auction house tax
     'trade_fee': 100,           # Cost to initiate trade
 }
@@ -367,6 +370,21 @@ WEAPON_UNLOCK_CONDITIONS = {
     }
 }
 
+# Hidden Class Unlock Conditions
+CLASS_UNLOCK_CONDITIONS = {
+    "chrono_weave": {
+        "requirements": [
+            {"type": "boss_defeat", "boss": "time_rift_dragon", "player_level_max": 30},
+            {"type": "quest", "quest_name": "chrono_whispers"},
+            {"type": "item_required", "item": "relic_of_past"},
+            {"type": "item_required", "item": "relic_of_future"},
+            {"type": "item_required", "item": "relic_of_present"}
+        ],
+        "description": "Defeat Time Rift Dragon at level 30 or lower, complete Chrono Whispers and collect the 3 Ancient Relics",
+        "unlock_message": "Time bends around you... The Chrono Weave class is yours to claim!"
+    }
+}
+
 # Special Bosses and Events
 SPECIAL_BOSSES = {
     "time_rift_dragon": {
@@ -689,6 +707,18 @@ RARITY_WEIGHTS = {
     "omnipotent": 0.0001 # 0.01%
 }
 
+# Sell values for items without a shop price
+ITEM_SELL_VALUES = {
+    "common": 10,
+    "uncommon": 25,
+    "rare": 60,
+    "epic": 150,
+    "legendary": 400,
+    "mythic": 1000,
+    "divine": 2500,
+    "omnipotent": 0      # Priceless, can't be sold
+}
+
 # Luck Levels
 LUCK_LEVELS = {
     'cursed': {'min': -1000, 'max': -100, 'emoji': '💀', 'bonus_percent': -25},
@@ -1356,63 +1386,53 @@ def get_items_by_rarity(rarity_filter=None):
 
 def get_dynamic_weapons():
     """Get dynamically created weapons from database."""
-    from replit import db
+    from utils.storage import db
     return db.get("dynamic_weapons", {})
 
 def get_dynamic_armor():
     """Get dynamically created armor from database."""
-    from replit import db
+    from utils.storage import db
     return db.get("dynamic_armor", {})
 
 def get_dynamic_bosses():
     """Get dynamically created bosses from database."""
-    from replit import db
+    from utils.storage import db
     return db.get("dynamic_bosses", {})
 
 def get_dynamic_classes():
     """Get dynamically created classes from database."""
-    from replit import db
+    from utils.storage import db
     return db.get("dynamic_classes", {})
 
 def get_all_weapons():
-    """Get all weapons including dynamic ones."""
-    all_weapons = WEAPONS.copy()
-    dynamic_weapons = get_dynamic_weapons()
-    all_weapons.update(dynamic_weapons)
-    return all_weapons
+    """Get all weapons including dynamic ones (read-only, cached)."""
+    from utils.content_registry import get_registry
+    return get_registry().weapons
 
 def get_all_armor():
-    """Get all armor including dynamic ones."""
-    all_armor = ARMOR.copy()
-    dynamic_armor = get_dynamic_armor()
-    all_armor.update(dynamic_armor)
-    return all_armor
+    """Get all armor including dynamic ones (read-only, cached)."""
+    from utils.content_registry import get_registry
+    return get_registry().armor
 
 def get_all_bosses():
-    """Get all bosses including dynamic ones."""
-    all_bosses = SPECIAL_BOSSES.copy()
-    dynamic_bosses = get_dynamic_bosses()
-    all_bosses.update(dynamic_bosses)
-    return all_bosses
+    """Get all bosses including dynamic ones (read-only, cached)."""
+    from utils.content_registry import get_registry
+    return get_registry().bosses
 
 def get_all_classes():
-    """Get all classes including dynamic ones."""
-    all_classes = PLAYER_CLASSES.copy()
-    dynamic_classes = get_dynamic_classes()
-    all_classes.update(dynamic_classes)
-    return all_classes
+    """Get all classes including dynamic ones (read-only, cached)."""
+    from utils.content_registry import get_registry
+    return get_registry().classes
 
 def get_game_difficulty():
     """Get current game difficulty setting."""
-    from replit import db
-    settings = db.get("game_settings", {})
-    return settings.get("difficulty", 5)
+    from utils.content_registry import get_registry
+    return get_registry().difficulty
 
 def get_xp_multiplier():
     """Get current XP multiplier setting."""
-    from replit import db
-    settings = db.get("game_settings", {})
-    return settings.get("xp_multiplier", 1.0)
+    from utils.content_registry import get_registry
+    return get_registry().xp_multiplier
 
 # Daily Rewards
 DAILY_REWARDS = {
@@ -1427,7 +1447,9 @@ STATUS_EFFECTS = {
     'blessed': {'duration': 1800, 'effects': {'luck_bonus': 100, 'xp_bonus': 1.2}},
     'cursed': {'duration': 1800, 'effects': {'luck_penalty': -50, 'damage_penalty': 0.8}},
     'cheese_power': {'duration': 600, 'effects': {'attack_bonus': 1.3, 'cheese_immunity': True}},
-    'kwami_protection': {'duration': 900, 'effects': {'defense_bonus': 1.5, 'magic_resistance': 0.5}}
+    'kwami_protection': {'duration': 900, 'effects': {'defense_bonus': 1.5, 'magic_resistance': 0.5}},
+    'lucky': {'duration': 3600, 'effects': {'luck_bonus': 100}},
+    'xp_boost': {'duration': 1800, 'effects': {'xp_bonus': 2.0}}
 }
 
 # World Locations with cheese theme
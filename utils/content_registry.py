@@ -0,0 +1,121 @@
+"""
+Cached, read-only registry of game content and settings.
+
+Static tables from utils/constants.py are merged with the admin-created
+``dynamic_*`` keys and ``game_settings`` once, then served as MappingProxy views
+so gameplay code never touches the database for content lookups. Admin content
+changes call publish_content_change() to rebuild it on every worker.
+"""
+import logging
+from types import MappingProxyType
+from typing import Any, Dict, Mapping, Optional
+
+from utils.cluster import register_invalidation_handler, publish_invalidation
+from utils.hot_reload import register_cache_invalidator
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_GAME_SETTINGS = {
+    'difficulty': 5,
+    'xp_multiplier': 1.0
+}
+
+_registry: Optional['ContentRegistry'] = None
+
+
+def _freeze(table: Mapping[str, Any]) -> Mapping[str, Any]:
+    """Wrap a table and its entries in read-only views."""
+    return MappingProxyType({
+        key: MappingProxyType(dict(value)) if isinstance(value, Mapping) else value
+        for key, value in table.items()
+    })
+
+
+class ContentRegistry:
+    """Snapshot of static plus dynamic game content."""
+
+    def __init__(self, weapons: Dict[str, Any], armor: Dict[str, Any], bosses: Dict[str, Any],
+                 classes: Dict[str, Any], settings: Dict[str, Any]):
+        self.weapons = _freeze(weapons)
+        self.armor = _freeze(armor)
+        self.bosses = _freeze(bosses)
+        self.classes = _freeze(classes)
+        self.settings = MappingProxyType({**DEFAULT_GAME_SETTINGS, **settings})
+
+    @property
+    def difficulty(self) -> int:
+        """Current game difficulty (1-10)."""
+        return self.settings.get('difficulty', DEFAULT_GAME_SETTINGS['difficulty'])
+
+    @property
+    def xp_multiplier(self) -> float:
+        """Current global XP multiplier."""
+        return self.settings.get('xp_multiplier', DEFAULT_GAME_SETTINGS['xp_multiplier'])
+
+
+def _load_dynamic(key: str) -> Dict[str, Any]:
+    """Read a dynamic content key as plain dicts."""
+    from utils.storage import db
+
+    try:
+        return {name: dict(data) for name, data in db.get(key, {}).items()}
+    except Exception as e:
+        logger.error(f"Error loading {key}: {e}")
+        return {}
+
+
+def _load_dynamic_settings() -> Dict[str, Any]:
+    """Read the admin game settings."""
+    from utils.storage import db
+
+    try:
+        return dict(db.get('game_settings', {}))
+    except Exception as e:
+        logger.error(f"Error loading game settings: {e}")
+        return {}
+
+
+def build_registry() -> ContentRegistry:
+    """Load static and dynamic content into a new registry."""
+    from utils.constants import WEAPONS, ARMOR, SPECIAL_BOSSES, PLAYER_CLASSES
+
+    registry = ContentRegistry(
+        weapons={**WEAPONS, **_load_dynamic('dynamic_weapons')},
+        armor={**ARMOR, **_load_dynamic('dynamic_armor')},
+        bosses={**SPECIAL_BOSSES, **_load_dynamic('dynamic_bosses')},
+        classes={**PLAYER_CLASSES, **_load_dynamic('dynamic_classes')},
+        settings=_load_dynamic_settings()
+    )
+    logger.info(
+        f"Content registry loaded: {len(registry.weapons)} weapons, {len(registry.armor)} armor, "
+        f"{len(registry.bosses)} bosses, {len(registry.classes)} classes"
+    )
+    return registry
+
+
+def get_registry() -> ContentRegistry:
+    """Get the content registry, loading it on first use."""
+    global _registry
+
+    if _registry is None:
+        _registry = build_registry()
+    return _registry
+
+
+def invalidate_registry(key: Any = None):
+    """Drop the registry and the item catalog built from it."""
+    global _registry
+    _registry = None
+
+    from utils.item_catalog import invalidate_catalog
+    invalidate_catalog()
+
+
+def publish_content_change():
+    """Rebuild content here and on the other cluster workers after an admin change."""
+    invalidate_registry()
+    publish_invalidation('content')
+
+
+register_invalidation_handler('content', invalidate_registry)
+register_cache_invalidator('content', invalidate_registry)
@@ -0,0 +1,174 @@
+"""
+Persistent per-user command cooldowns.
+
+Each user's cooldowns are one small record, ``cooldowns_{id}``, mapping a
+cooldown name to the unix second it is ready again; expired entries are dropped
+whenever the record is written. Records are cached in memory after the first
+check, so checks are a dict lookup. Changes go through a write-behind buffer
+(flushed within a few seconds, and on shutdown) and are broadcast to the other
+cluster workers, so cooldowns survive restarts and apply across processes.
+"""
+import asyncio
+import logging
+import time
+from typing import Dict, Optional
+
+from discord.ext import commands
+
+from utils.cluster import broadcast_event, register_event_handler
+from utils.storage import db
+from utils.write_behind import WriteBehindBuffer
+
+logger = logging.getLogger(__name__)
+
+EVICT_INTERVAL = 60  # Seconds between sweeps of cached records that have run out
+
+_cache: Dict[str, Dict[str, int]] = {}
+_last_evicted = 0.0
+
+
+def _record_key(user_id: str) -> str:
+    """Get the database key of a user's cooldown record."""
+    return f"cooldowns_{user_id}"
+
+
+def _write_record(key: str, active: Dict[str, int]):
+    """Store a cooldown record, or delete it when nothing is pending."""
+    if active:
+        db[key] = active
+    elif key in db:
+        del db[key]
+
+
+_cooldown_writes = WriteBehindBuffer("cooldowns", _write_record, window=5.0)
+
+
+def _load(user_id: str) -> Dict[str, int]:
+    """Get a user's cooldown record, reading it from the database once."""
+    record = _cache.get(user_id)
+    if record is not None:
+        return record
+
+    record = {}
+    try:
+        key = _record_key(user_id)
+        stored = _cooldown_writes.get(key)
+        if stored is None and key in db:
+            stored = db[key]
+        if stored:
+            record = {name: int(ready_at) for name, ready_at in stored.items()}
+    except Exception as e:
+        logger.error(f"Error loading cooldowns for {user_id}: {e}")
+
+    _cache[user_id] = record
+    return record
+
+
+def get_retry_after(user_id: str, name: str) -> float:
+    """Get seconds until a cooldown is ready (0 if it is ready)."""
+    ready_at = _load(str(user_id)).get(name, 0)
+    return max(0.0, ready_at - time.time())
+
+
+def set_cooldown(user_id: str, name: str, seconds: float, broadcast: bool = True):
+    """Start a cooldown for a user."""
+    user_id = str(user_id)
+    ready_at = int(time.time() + seconds + 0.999)
+    _load(user_id)[name] = ready_at
+    _save(user_id)
+
+    if broadcast:
+        _schedule(broadcast_event('cooldown', {'user_id': user_id, 'name': name, 'ready_at': ready_at}))
+
+
+def reset_cooldown(user_id: str, name: str):
+    """Clear a user's cooldown (e.g. when a command is refunded)."""
+    user_id = str(user_id)
+    if _load(user_id).pop(name, None) is not None:
+        _save(user_id)
+        _schedule(broadcast_event('cooldown', {'user_id': user_id, 'name': name, 'ready_at': 0}))
+
+
+def import_cooldowns(user_id: str, ready_times: Dict[str, int]):
+    """Merge ready times from an older record into a user's cooldowns."""
+    user_id = str(user_id)
+    record = _load(user_id)
+    now = time.time()
+    changed = False
+    for name, ready_at in ready_times.items():
+        if ready_at > now and ready_at > record.get(name, 0):
+            record[name] = int(ready_at)
+            changed = True
+    if changed:
+        _save(user_id)
+
+
+async def handle_cooldown_event(payload):
+    """Apply a cooldown started or cleared on another cluster worker."""
+    user_id = payload['user_id']
+    # Only users already cached here need updating; others read the record on first use
+    record = _cache.get(user_id)
+    if record is None:
+        return
+    if payload['ready_at']:
+        record[payload['name']] = max(record.get(payload['name'], 0), payload['ready_at'])
+    else:
+        record.pop(payload['name'], None)
+
+
+register_event_handler('cooldown', handle_cooldown_event)
+
+
+def _schedule(coro):
+    """Run a coroutine on the running loop without waiting for it."""
+    try:
+        asyncio.get_running_loop().create_task(coro)
+    except RuntimeError:
+        coro.close()
+
+
+def _save(user_id: str):
+    """Queue a snapshot of a user's unexpired cooldowns for writing."""
+    now = time.time()
+    active = {name: ready_at for name, ready_at in list(_cache.get(user_id, {}).items()) if ready_at > now}
+    _cooldown_writes.put(_record_key(user_id), active)
+    _evict_expired(now)
+
+
+def _evict_expired(now: float):
+    """Drop cached records whose cooldowns have all run out, at most every EVICT_INTERVAL seconds."""
+    global _last_evicted
+    if now - _last_evicted < EVICT_INTERVAL:
+        return
+    _last_evicted = now
+
+    # Iterate over copies: migrations may import cooldowns from a worker thread
+    for user_id, record in list(_cache.items()):
+        if all(ready_at <= now for ready_at in list(record.values())) and _record_key(user_id) not in _cooldown_writes:
+            _cache.pop(user_id, None)
+
+
+def flush_cooldowns() -> int:
+    """Write every changed cooldown record now (call on shutdown). Returns the number written."""
+    return _cooldown_writes.flush()
+
+
+def persistent_cooldown(name: str, seconds: Optional[int] = None):
+    """Command check applying a restart-safe per-user cooldown.
+
+    Defaults to RPG_CONSTANTS['<name>_cooldown'] and raises CommandOnCooldown
+    like @commands.cooldown, so the usual error handler reports it.
+    """
+    async def predicate(ctx):
+        # Looked up per use: this module is never reloaded, but the constants are
+        from utils.constants import RPG_CONSTANTS
+
+        duration = seconds if seconds is not None else RPG_CONSTANTS[f'{name}_cooldown']
+        user_id = str(ctx.author.id)
+        retry_after = get_retry_after(user_id, name)
+        if retry_after > 0:
+            raise commands.CommandOnCooldown(commands.Cooldown(1, duration), retry_after, commands.BucketType.user)
+        set_cooldown(user_id, name, duration)
+        return True
+
+    return commands.check(predicate)
@@ -1,11 +1,144 @@
 import logging
-from typing import Dict, Any, Optional, List
-from replit import db
+from collections.abc import Mapping, Sequence
+from typing import Dict, Any, Optional, List, Iterable
+from utils.storage import db
 import json
 from datetime import datetime
 
+from utils.profile_schema import new_profile, migrate_profile
+from utils.write_behind import WriteBehindBuffer
+
 logger = logging.getLogger(__name__)
 
+# Profile fields that are rarely needed are kept out of the hot user_rpg_{id} record.
+# Each section is stored under profile_{section}_{id} and loaded on first access.
+PROFILE_SECTIONS = {
+    'history': ('completed_quests', 'boss_defeats', 'dungeon_clears', 'world_event_contributions', 'seasonal_progress'),
+    'achievements': ('achievements', 'titles', 'legacy_modifiers', 'unlocked_weapons'),
+    'collections': ('pets', 'materials', 'housing'),
+}
+FIELD_SECTIONS = {field: section for section, fields in PROFILE_SECTIONS.items() for field in fields}
+
+def to_plain(value: Any) -> Any:
+    """Convert database containers to plain dicts and lists."""
+    if isinstance(value, Mapping):
+        return {key: to_plain(item) for key, item in value.items()}
+    if isinstance(value, Sequence) and not isinstance(value, (str, bytes)):
+        return [to_plain(item) for item in value]
+    return value
+
+def _section_key(section: str, user_id: str) -> str:
+    """Get the database key of a cold profile section."""
+    return f"profile_{section}_{user_id}"
+
+def _write_key(key: str, value: Any):
+    """Write a value to the database (used by the profile write-behind buffer)."""
+    db[key] = value
+
+# Profile writes are coalesced per key and flushed in the background
+_profile_writes = WriteBehindBuffer('profiles', _write_key)
+_NOT_QUEUED = object()
+
+def _read_profile_key(key: str) -> Optional[Any]:
+    """Read a profile key, preferring a write that hasn't been flushed yet."""
+    # One get() so a write flushed from another thread can't slip in between a check and a read
+    pending = _profile_writes.get(key, _NOT_QUEUED)
+    if pending is not _NOT_QUEUED:
+        return to_plain(pending)
+    if key in db:
+        return db[key]
+    return None
+
+def flush_profile_writes() -> int:
+    """Write every queued profile update now (call on shutdown)."""
+    return _profile_writes.flush()
+
+def get_profile_write_metrics() -> Dict[str, Any]:
+    """Get the profile write-behind buffer's metrics."""
+    return _profile_writes.metrics()
+
+def _snapshot(values: Dict[str, Any]) -> str:
+    """Serialize section values for change detection."""
+    return json.dumps(values, sort_keys=True, default=str)
+
+class ProfileData(dict):
+    """A hot profile record that loads its cold sections on first access."""
+
+    def __init__(self, user_id: str, record: Dict[str, Any], sections: Iterable[str] = ()):
+        super().__init__()
+        self.user_id = user_id
+        self.loaded_sections: Dict[str, Optional[str]] = {}
+
+        legacy: Dict[str, Dict[str, Any]] = {}
+        for field, value in record.items():
+            section = FIELD_SECTIONS.get(field)
+            if section:
+                legacy.setdefault(section, {})[field] = to_plain(value)
+            else:
+                dict.__setitem__(self, field, value)
+
+        # Profiles saved before the split carry their cold fields inline; keep them
+        # and leave the snapshot empty so the next save moves them to their own key
+        for section, values in legacy.items():
+            dict.update(self, values)
+            self.loaded_sections[section] = None
+
+        for section in sections:
+            self.load_section(section)
+
+    def load_section(self, section: str):
+        """Load a cold section into the profile if it isn't loaded yet."""
+        if section in self.loaded_sections:
+            return
+
+        values = {}
+        try:
+            values = to_plain(_read_profile_key(_section_key(section, self.user_id)) or {})
+        except Exception as e:
+            logger.error(f"Error loading {section} profile section for {self.user_id}: {e}")
+
+        fields = PROFILE_SECTIONS[section]
+        values = {field: value for field, value in values.items() if field in fields}
+        dict.update(self, values)
+        self.loaded_sections[section] = _snapshot(values)
+
+    def _ensure(self, key: Any):
+        section = FIELD_SECTIONS.get(key)
+        if section and section not in self.loaded_sections:
+            self.load_section(section)
+
+    def __getitem__(self, key):
+        self._ensure(key)
+        return super().__getitem__(key)
+
+    def __setitem__(self, key, value):
+        self._ensure(key)
+        super().__setitem__(key, value)
+
+    def __delitem__(self, key):
+        self._ensure(key)
+        super().__delitem__(key)
+
+    def __contains__(self, key):
+        self._ensure(key)
+        return super().__contains__(key)
+
+    def get(self, key, default=None):
+        self._ensure(key)
+        return super().get(key, default)
+
+    def setdefault(self, key, default=None):
+        self._ensure(key)
+        return super().setdefault(key, default)
+
+    def pop(self, key, *args):
+        self._ensure(key)
+        return super().pop(key, *args)
+
+    def update(self, *args, **kwargs):
+        for key, value in dict(*args, **kwargs).items():
+            self[key] = value
+
 async def initialize_database():
     """Initialize the database with default settings."""
     try:
@@ -23,32 +156,83 @@ async def initialize_database():
         logger.error(f"Database initialization failed: {e}")
         raise
 
-def get_user_rpg_data(user_id: str) -> Optional[Dict[str, Any]]:
-    """Get user's RPG data from database."""
+def get_user_rpg_data(user_id: str, sections: Iterable[str] = ()) -> Optional[Dict[str, Any]]:
+    """Get user's RPG data from database.
+
+    Only the hot record is read; cold sections load on first access, or up front
+    when listed in ``sections``.
+    """
     try:
         key = f"user_rpg_{user_id}"
-        if key in db:
-            return dict(db[key])
-        return None
+        record = _read_profile_key(key)
+        if record is None:
+            return None
+
+        profile = ProfileData(user_id, record, sections)
+        if migrate_profile(profile):
+            update_user_rpg_data(user_id, profile)
+        return profile
     except Exception as e:
         logger.error(f"Error getting user RPG data for {user_id}: {e}")
         return None
 
 def update_user_rpg_data(user_id: str, data: Dict[str, Any]) -> bool:
-    """Update user's RPG data in database."""
+    """Update user's RPG data in database, writing only the cold sections that changed."""
     try:
         key = f"user_rpg_{user_id}"
-        db[key] = data
+        _profile_writes.put(key, to_plain({field: value for field, value in data.items() if field not in FIELD_SECTIONS}))
+
+        loaded = data.loaded_sections if isinstance(data, ProfileData) else None
+        for section, fields in PROFILE_SECTIONS.items():
+            values = {field: data[field] for field in fields if dict.__contains__(data, field)}
+            if loaded is None:
+                # Plain dicts may carry only some fields of a section; merge them in
+                if not values:
+                    continue
+                section_key = _section_key(section, user_id)
+                _profile_writes.put(section_key, {**to_plain(_read_profile_key(section_key) or {}), **to_plain(values)})
+                continue
+
+            if section not in loaded:
+                continue
+            snapshot = _snapshot(values)
+            if loaded[section] != snapshot:
+                _profile_writes.put(_section_key(section, user_id), to_plain(values))
+                loaded[section] = snapshot
         return True
     except Exception as e:
         logger.error(f"Error updating user RPG data for {user_id}: {e}")
         return False
 
+def get_user_stash(user_id: str) -> Dict[str, int]:
+    """Get user's overflow item stash from database."""
+    try:
+        key = f"user_stash_{user_id}"
+        if key in db:
+            return dict(db[key])
+        return {}
+    except Exception as e:
+        logger.error(f"Error getting user stash for {user_id}: {e}")
+        return {}
+
+def update_user_stash(user_id: str, stash: Dict[str, int]) -> bool:
+    """Update user's overflow item stash in database (removing it when empty)."""
+    try:
+        key = f"user_stash_{user_id}"
+        if stash:
+            db[key] = stash
+        elif key in db:
+            del db[key]
+        return True
+    except Exception as e:
+        logger.error(f"Error updating user stash for {user_id}: {e}")
+        return False
+
 def ensure_user_exists(user_id: str) -> bool:
     """Ensure user exists in database, create if not."""
     try:
         key = f"user_rpg_{user_id}"
-        if key not in db:
+        if key not in _profile_writes and key not in db:
             return create_user_profile(user_id)
         return True
     except Exception as e:
@@ -58,74 +242,10 @@ def ensure_user_exists(user_id: str) -> bool:
 def create_user_profile(user_id: str) -> bool:
     """Create a new user profile with default stats."""
     try:
-        default_profile = {
-            "user_id": user_id,
-            "level": 1,
-            "xp": 0,
-            "max_xp": 100,
-            "hp": 100,
-            "max_hp": 100,
-            "attack": 10,
-            "defense": 5,
-            "mana": 50,
-            "max_mana": 50,
-            "coins": 100,
-            "inventory": [],
-            "materials": {},  # Crafting materials
-            "equipped": {
-                "weapon": None,
-                "armor": None,
-                "accessory": None
-            },
-            "player_class": None,
-            "profession": None,
-            "profession_level": 0,
-            "profession_xp": 0,
-            "faction": None,
-            "prestige_level": 0,
-            "legacy_modifiers": [],
-            "achievements": [],
-            "titles": [],
-            "active_title": None,
-            "stats": {
-                "battles_won": 0,
-                "battles_lost": 0,
-                "items_found": 0,
-                "bosses_defeated": 0,
-                "quests_completed": 0,
-                "items_crafted": 0,
-                "materials_gathered": 0,
-                "cheese_consumed": 0,
-                "dragons_defeated": 0,
-                "kwami_quests": 0
-            },
-            "adventure_count": 0,
-            "work_count": 0,
-            "daily_streak": 0,
-            "last_daily": None,
-            "last_work": None,
-            "last_adventure": None,
-            "last_craft": None,
-            "last_gather": None,
-            "last_quest": None,
-            "luck_points": 0,
-            "status_effects": {},
-            "active_quests": [],
-            "completed_quests": [],
-            "party_id": None,
-            "guild_id": None,
-            "pvp_rating": 1000,
-            "pvp_wins": 0,
-            "pvp_losses": 0,
-            "world_event_contributions": {},
-            "seasonal_progress": {},
-            "housing": None,
-            "pets": [],
-            "created_at": str(db.get("timestamp", ""))
-        }
+        default_profile = new_profile(user_id, str(db.get("timestamp", "")))
         
-        key = f"user_rpg_{user_id}"
-        db[key] = default_profile
+        # Split into the hot record and its cold sections
+        update_user_rpg_data(user_id, default_profile)
         
         # Update global user count
         global_settings = db.get("global_settings", {})
@@ -144,7 +264,7 @@ def get_leaderboard(category: str, guild_id: int, limit: int = 10) -> List[Dict[
         users = []
         
         # Get all user keys
-        user_keys = [key for key in db.keys() if key.startswith("user_rpg_")]
+        user_keys = db.prefix("user_rpg_")
         
         for key in user_keys:
             try:
@@ -0,0 +1,614 @@
+"""
+Interactive dungeon runs.
+
+Each dungeon in INTERACTIVE_DUNGEONS and SPECIAL_DUNGEONS is compiled once
+into a DungeonTable: a flat tuple of floors, each with a fixed tuple of
+options, and each option with a precomputed Outcome (a fight with resolved
+enemy stats, HP change, rewards, a status effect, or a check with success and
+failure outcomes). Scenario types are normalised at compile time (choice,
+stealth and time_choice are all choices; puzzles become an answer or a skill
+check; mysteries and sabotage pick a hidden right option from the run's
+seed), so playing a floor is a table lookup. The non-boss scenarios fill the
+floors in order and the boss guards the last one.
+
+A run is a DungeonRun session (see utils/battle_sessions): the dungeon key,
+floor, each member's HP and the rewards banked so far, keyed by its owner
+(``u{user_id}``, or ``p{party_id}`` for a party) so there is one run at a
+time and it can be resumed. A party run is the one authoritative state for
+all its members: their button presses are votes merged into the session by
+cast_vote(), and the floor resolves once for everyone when the vote closes.
+Each floor saves the record once; profiles are only written when the run is
+cleared or lost, once per member, with the loot shared out by the party's
+loot mode.
+"""
+import logging
+import random
+import time
+from collections import Counter
+from dataclasses import dataclass, field, replace
+from typing import Any, ClassVar, Dict, List, Optional, Tuple
+
+from utils.battle_sessions import end_session, get_session, register_session_type, save_session
+from utils.combat import combatant_from_enemy, combatant_from_profile, new_seed, raid_round, turn_rng
+from utils.hot_reload import register_cache_invalidator
+
+logger = logging.getLogger(__name__)
+
+DIFFICULTY_TIERS = {'easy': 1, 'medium': 2, 'hard': 3, 'legendary': 4, 'mythic': 5}
+
+# Named rewards in scenario definitions
+BOONS = {
+    'full_heal': {'heal': True},
+    'hidden_treasure': {'coins': 150},
+    'cheese_immunity': {'effect': 'cheese_power'},
+    'surprise_attack': {'effect': 'cheese_power'},
+    'shield_boost': {'effect': 'kwami_protection'},
+    'kwami_blessing': {'effect': 'blessed'},
+}
+
+CHECK_CHANCE = 0.6  # Base success chance of skill checks, before level bonus
+FIGHT_TURNS = 30    # Rounds a dungeon fight may last
+PARTY_HP_SCALE = 0.75  # Extra enemy HP per party member beyond the first
+VOTE_WINDOW = 20    # Seconds before the next choice closes a party's vote
+
+LOOT_MODES = {
+    'fair': "items go round the party in turn",
+    'leader': "the leader keeps every item",
+    'roll': "each item goes to a random member",
+}
+REWARD_KEYS = ('coins', 'xp', 'luck_points', 'achievement')
+
+
+@dataclass(slots=True)
+class Outcome:
+    """What choosing an option does."""
+
+    text: str = ""
+    enemy: Optional[Dict[str, Any]] = None
+    hp: int = 0
+    heal: bool = False
+    coins: int = 0
+    xp: int = 0
+    luck: int = 0
+    items: Tuple[str, ...] = ()
+    effect: str = ""
+    chance: float = 1.0             # Skill check success chance (before level bonus)
+    failure: Optional['Outcome'] = None
+    answer: str = ""                # Puzzle answer typed by the player
+    hidden: bool = False            # Right only if it is the floor's seeded pick
+
+
+@dataclass(slots=True)
+class Option:
+    """A button on a floor."""
+
+    label: str
+    outcome: Outcome
+
+
+@dataclass(slots=True)
+class Floor:
+    """One step of a dungeon."""
+
+    title: str
+    description: str
+    options: Tuple[Option, ...]
+    boss: str = ""  # ID of the boss guarding the floor
+
+
+@dataclass(slots=True)
+class DungeonTable:
+    """A compiled dungeon."""
+
+    key: str
+    name: str
+    description: str
+    tier: int
+    min_level: int
+    floors: Tuple[Floor, ...]
+    coins: Tuple[int, int]
+    xp: Tuple[int, int]
+    items: Tuple[str, ...]
+    required_item: str = ""
+    event_only: bool = False
+
+
+@dataclass(slots=True)
+class DungeonRun:
+    """An in-progress dungeon run, solo or for a party."""
+
+    session_id: str
+    user_id: str                    # The player, or the party's leader
+    dungeon: str
+    members: Dict[str, List[int]]   # user_id -> [hp, max_hp]
+    seed: int
+    party_id: str = ""
+    loot_mode: str = "fair"
+    floor: int = 0
+    coins: int = 0
+    xp: int = 0
+    items: List[str] = field(default_factory=list)
+    effects: List[str] = field(default_factory=list)  # Boons lasting for the rest of the run
+    luck: int = 0
+    votes: Dict[str, List[Any]] = field(default_factory=dict)  # user_id -> [option index, answer]
+    vote_opened_at: int = 0
+    channel_id: int = 0
+    message_id: int = 0
+    expires_at: int = 0
+
+    kind: ClassVar[str] = "dungeon"
+
+    @property
+    def hp(self) -> int:
+        return sum(max(0, hp) for hp, _ in self.members.values())
+
+    @property
+    def max_hp(self) -> int:
+        return sum(max_hp for _, max_hp in self.members.values())
+
+    def standing(self) -> List[str]:
+        """Get the members still on their feet."""
+        return [user_id for user_id, (hp, _) in self.members.items() if hp > 0]
+
+
+register_session_type(DungeonRun)
+
+_tables: Optional[Dict[str, DungeonTable]] = None
+
+
+def _title(name: str) -> str:
+    """Format a snake_case id for display."""
+    return name.replace('_', ' ').title()
+
+
+def _enemy(name: str, tier: int, floor: int) -> Dict[str, Any]:
+    """Get the stats of a regular dungeon enemy."""
+    scale = 1 + floor * 0.1
+    return {
+        'name': _title(name),
+        'hp': int((30 + 25 * tier) * scale),
+        'attack': int((6 + 5 * tier) * scale),
+        'defense': int(2 * tier * scale)
+    }
+
+
+def _boon(name: Optional[str], text: str = "") -> Outcome:
+    """Compile a named reward: a boon from BOONS, or else an item."""
+    if not name:
+        return Outcome(text=text)
+    outcome = Outcome(text=text or f"You gained {_title(name)}!", **BOONS.get(name, {}))
+    if name not in BOONS:
+        outcome.items = (name,)
+    return outcome
+
+
+def _rewards(spec: Dict[str, Any], text: str) -> Outcome:
+    """Compile a reward dict such as success_reward."""
+    outcome = Outcome(text=text, coins=spec.get('coins', 0), xp=spec.get('xp', 0), luck=spec.get('luck_points', 0))
+    items = []
+    for name, value in spec.items():
+        if name in REWARD_KEYS:
+            continue
+        if name in BOONS:
+            boon = _boon(name)
+            outcome.heal = outcome.heal or boon.heal
+            outcome.coins += boon.coins
+            outcome.effect = boon.effect or outcome.effect
+        elif value is True:
+            items.append(name)
+        elif isinstance(value, int):
+            items.extend([name] * value)
+    outcome.items = tuple(items)
+    return outcome
+
+
+def _compile_choice(option: Dict[str, Any], tier: int, floor: int) -> Outcome:
+    """Compile one option of a choice scenario."""
+    if option.get('enemy'):
+        return Outcome(text=f"You fight the {_title(option['enemy'])}!", enemy=_enemy(option['enemy'], tier, floor))
+    outcome = _boon(option.get('reward') or option.get('bonus'))
+    outcome.hp = -option.get('damage', 0)
+    if outcome.hp:
+        outcome.text = f"You take {-outcome.hp} damage, but gain {_title(option['reward'])}!" \
+            if option.get('reward') else f"You take {-outcome.hp} damage!"
+    return outcome
+
+
+def _compile_scenario(scenario: Dict[str, Any], tier: int, floor: int) -> Floor:
+    """Compile a scenario into a floor."""
+    kind = scenario['type']
+    title, description = scenario.get('title', _title(kind)), scenario.get('description', '')
+
+    if kind == 'boss':
+        boss = scenario['boss']
+        return Floor(title, description, (
+            Option("⚔️ Fight", Outcome(text=f"You face {boss['name']}!", enemy=dict(boss))),
+        ), boss=boss['name'].lower().replace(' ', '_'))
+
+    if 'choices' in scenario:
+        options = tuple(Option(choice['text'], _compile_choice(choice, tier, floor)) for choice in scenario['choices'])
+        return Floor(title, description, options)
+
+    success = _rewards(scenario.get('success_reward') or scenario.get('reward') or {}, "Success!")
+    penalty = scenario.get('failure_penalty') or {}
+    failure = Outcome(text="It didn't work...", hp=-penalty.get('hp', 10 * tier))
+    if (scenario.get('failure_consequence') or {}).get('reinforcements'):
+        failure = Outcome(text="Reinforcements arrive!", enemy=_enemy('reinforcements', tier, floor))
+
+    if scenario.get('answer'):
+        success.answer = scenario['answer']
+        success.failure = failure
+        return Floor(title, description, (Option("✍️ Answer", success), Option("🚪 Skip", failure)))
+
+    picks = scenario.get('clues') or scenario.get('actions')
+    if picks:
+        options = []
+        for pick in picks:
+            outcome = replace(success, hidden=True, failure=failure)
+            options.append(Option(_title(pick), outcome))
+        return Floor(title, description, tuple(options))
+
+    # A puzzle without a fixed answer is a skill check
+    success.chance = CHECK_CHANCE
+    success.failure = failure
+    return Floor(title, description, (Option("🧩 Attempt", success), Option("🚪 Skip", failure)))
+
+
+def _compile_special(key: str, data: Dict[str, Any], tier: int) -> Tuple[Floor, ...]:
+    """Compile a special dungeon's mechanics into generic floors, guarded by its location's boss."""
+    from utils.constants import SPECIAL_BOSSES
+
+    floors = []
+    mechanics = data.get('mechanics') or ['traps']
+    for number in range(data.get('floors', 3) - 1):
+        mechanic = mechanics[number % len(mechanics)]
+        success = Outcome(text="You find a way through!", coins=50 * tier, xp=25 * tier, chance=CHECK_CHANCE)
+        success.failure = Outcome(text=f"The {_title(mechanic).lower()} catch you!", hp=-10 * tier)
+        floors.append(Floor(_title(mechanic), f"The {_title(mechanic).lower()} bar your way.", (
+            Option("⚔️ Push through", Outcome(text="Something guards the way!", enemy=_enemy(mechanic, tier, number))),
+            Option("🔍 Search carefully", success)
+        )))
+
+    boss_id = next((boss_id for boss_id, boss in SPECIAL_BOSSES.items() if boss.get('location') == key),
+                   f"{key}_guardian")
+    boss = dict(SPECIAL_BOSSES[boss_id]) if boss_id in SPECIAL_BOSSES else _enemy(boss_id, tier + 1, len(floors))
+    floors.append(Floor(boss['name'], f"{boss['name']} awaits at the heart of the {data['name']}!", (
+        Option("⚔️ Fight", Outcome(text=f"You face {boss['name']}!", enemy=boss)),
+    ), boss=boss_id))
+    return tuple(floors)
+
+
+def compile_dungeon(key: str, data: Dict[str, Any], special: bool = False) -> DungeonTable:
+    """Compile a dungeon definition into its floor table."""
+    tier = DIFFICULTY_TIERS.get(data.get('difficulty'), 1)
+    if special:
+        floors = _compile_special(key, data, tier)
+        coins, xp = (500 * tier, 1000 * tier), (250 * tier, 500 * tier)
+        items = tuple(data.get('rewards', ()))
+    else:
+        scenarios = data.get('scenarios', [])
+        steps = [scenario for scenario in scenarios if scenario['type'] != 'boss']
+        boss = next((scenario for scenario in scenarios if scenario['type'] == 'boss'), None)
+        count = data.get('floors', len(scenarios))
+        floors = [_compile_scenario(steps[number % len(steps)], tier, number)
+                  for number in range(count - (1 if boss else 0))] if steps else []
+        if boss:
+            floors.append(_compile_scenario(boss, tier, count))
+        floors = tuple(floors)
+        rewards = data.get('rewards', {})
+        coins, xp = tuple(rewards.get('coins', (0, 0))), tuple(rewards.get('xp', (0, 0)))
+        items = tuple(rewards.get('items', ()))
+
+    return DungeonTable(
+        key=key,
+        name=data['name'],
+        description=data.get('description', ''),
+        tier=tier,
+        min_level=data.get('min_level', 1),
+        floors=floors,
+        coins=coins,
+        xp=xp,
+        items=items,
+        required_item=data.get('unlock_requirement', ''),
+        event_only=data.get('event_dungeon', False)
+    )
+
+
+def get_dungeons() -> Dict[str, DungeonTable]:
+    """Get every compiled dungeon, compiling them on first use."""
+    global _tables
+
+    if _tables is None:
+        from utils.constants import INTERACTIVE_DUNGEONS, SPECIAL_DUNGEONS
+        tables = {key: compile_dungeon(key, data) for key, data in INTERACTIVE_DUNGEONS.items()}
+        tables.update({key: compile_dungeon(key, data, special=True) for key, data in SPECIAL_DUNGEONS.items()})
+        _tables = tables
+    return _tables
+
+
+def invalidate_dungeons():
+    """Drop the compiled dungeons so they are rebuilt from the reloaded constants."""
+    global _tables
+    _tables = None
+
+
+register_cache_invalidator('dungeons', invalidate_dungeons)
+
+
+def run_id(user_id: str) -> str:
+    """Get the session ID of a player's solo dungeon run."""
+    return f"u{user_id}"
+
+
+def party_run_id(party_id: str) -> str:
+    """Get the session ID of a party's dungeon run."""
+    return f"p{party_id}"
+
+
+def get_run(user_id: str, party_id: Optional[str] = None) -> Optional[DungeonRun]:
+    """Get a player's active dungeon run: their party's if it has one, else their own."""
+    for session_id in ((party_run_id(party_id),) if party_id else ()) + (run_id(user_id),):
+        run = get_session(session_id)
+        if isinstance(run, DungeonRun) and user_id in run.members:
+            return run
+    return None
+
+
+def check_entry(player_data: Dict[str, Any], table: DungeonTable) -> Optional[str]:
+    """Check if a player may enter a dungeon. Returns why not, or None."""
+    from utils.inventory import has_item, item_display_name, item_key
+    from utils.world_events import active_events
+
+    if player_data.get('level', 1) < table.min_level:
+        return f"You need to be level {table.min_level} to enter {table.name}!"
+    if player_data.get('hp', 100) <= 0:
+        return "You are defeated! Use `$heal` to recover."
+    if table.required_item and not has_item(player_data, table.required_item):
+        return f"You need a **{item_display_name(item_key(table.required_item))}** to enter {table.name}!"
+    if table.event_only and not active_events():
+        return f"{table.name} only opens during a world event!"
+    return None
+
+
+def _member_hp(profiles: Dict[str, Dict[str, Any]]) -> Dict[str, List[int]]:
+    """Get the starting [hp, max_hp] of each member."""
+    return {user_id: [player_data.get('hp', 100), player_data.get('max_hp', 100)]
+            for user_id, player_data in profiles.items()}
+
+
+def start_run(user_id: str, player_data: Dict[str, Any], table: DungeonTable) -> DungeonRun:
+    """Start a solo dungeon run."""
+    run = DungeonRun(
+        session_id=run_id(user_id),
+        user_id=user_id,
+        dungeon=table.key,
+        members=_member_hp({user_id: player_data}),
+        seed=new_seed()
+    )
+    save_session(run)
+    return run
+
+
+def start_party_run(party_data: Dict[str, Any], profiles: Dict[str, Dict[str, Any]],
+                    table: DungeonTable) -> DungeonRun:
+    """Start a dungeon run for a party, with the members whose profiles are given."""
+    run = DungeonRun(
+        session_id=party_run_id(party_data['party_id']),
+        user_id=party_data['leader_id'],
+        dungeon=table.key,
+        members=_member_hp(profiles),
+        seed=new_seed(),
+        party_id=party_data['party_id'],
+        loot_mode=party_data.get('loot_distribution') or "fair"
+    )
+    save_session(run)
+    return run
+
+
+def current_floor(run: DungeonRun) -> Optional[Floor]:
+    """Get the floor a run is on."""
+    table = get_dungeons().get(run.dungeon)
+    if table is None or run.floor >= len(table.floors):
+        return None
+    return table.floors[run.floor]
+
+
+def cast_vote(run: DungeonRun, user_id: str, option_index: int, answer: Optional[str] = None,
+              now: Optional[float] = None) -> Optional[Tuple[int, List[str]]]:
+    """Record a member's choice on the current floor.
+
+    The vote closes once every standing member has chosen, or on the first
+    choice after VOTE_WINDOW seconds. Returns the winning option (ties go to
+    the earliest choice) and the answers given for it, or None while the vote
+    is open. A solo run's vote closes straight away.
+    """
+    now = time.time() if now is None else now
+    if not run.votes:
+        run.vote_opened_at = int(now)
+    run.votes[user_id] = [option_index, answer or ""]
+
+    if len(run.votes) < len(run.standing()) and now - run.vote_opened_at < VOTE_WINDOW:
+        save_session(run)
+        return None
+
+    tally = Counter(choice for choice, _ in run.votes.values())
+    best = max(tally.values())
+    option_index = next(choice for choice, _ in run.votes.values() if tally[choice] == best)
+    answers = [answer for choice, answer in run.votes.values() if choice == option_index and answer]
+    run.votes = {}
+    return option_index, answers
+
+
+def _check_passes(run: DungeonRun, outcome: Outcome, option_index: int, answers: List[str],
+                  level: int, options: int) -> bool:
+    """Decide whether a check, hidden pick or puzzle answer succeeds."""
+    rng = turn_rng(run.seed, run.floor)
+    if outcome.answer:
+        return any(answer.strip().lower() == outcome.answer.lower() for answer in answers)
+    if outcome.hidden:
+        return rng.randrange(options) == option_index
+    level_bonus = min(0.3, level * 0.01)
+    return rng.random() < outcome.chance + level_bonus
+
+
+def _fight(run: DungeonRun, enemy: Dict[str, Any], is_boss: bool,
+           profiles: Dict[str, Dict[str, Any]]) -> Tuple[bool, int]:
+    """Fight an enemy with every standing member. Returns whether they won and the rounds fought.
+
+    Enemies get PARTY_HP_SCALE more HP per extra member. If the enemy still
+    stands after FIGHT_TURNS rounds, the side with more HP left (in percent) wins.
+    """
+    from utils.combat import active_status_effects
+
+    standing = run.standing()
+    enemy = dict(enemy)
+    enemy['hp'] = int(enemy.get('hp', 50) * (1 + PARTY_HP_SCALE * (len(standing) - 1)))
+    foe = combatant_from_enemy(enemy, is_boss)
+
+    raiders = []
+    for user_id in standing:
+        player_data = profiles[user_id]
+        raider = combatant_from_profile(player_data, "You", user_id, active_status_effects(player_data) + run.effects)
+        raider.hp, raider.max_hp = run.members[user_id]
+        raiders.append(raider)
+
+    rounds = 0
+    while foe.alive and any(raider.alive for raider in raiders) and rounds < FIGHT_TURNS:
+        rounds += 1
+        raid_round(raiders, foe, run.seed + run.floor, rounds)
+
+    survivors = [raider for raider in raiders if raider.alive]
+    won = not foe.alive or bool(survivors) and foe.hp_percent < sum(
+        raider.hp_percent for raider in survivors) / len(survivors)
+    for raider in raiders:
+        run.members[raider.combatant_id][0] = max(0, raider.hp) if won else 0
+    return won, rounds
+
+
+def play_floor(run: DungeonRun, option_index: int, profiles: Dict[str, Dict[str, Any]],
+               answers: List[str] = ()) -> Tuple[List[str], str]:
+    """Resolve the chosen option on the current floor.
+
+    profiles holds every member's profile (read only). Returns the narration
+    lines and the run's state: 'continue', 'cleared' or 'defeated'. The run's
+    HP and banked rewards are updated in place and the run is saved (or
+    ended) once.
+    """
+    table = get_dungeons()[run.dungeon]
+    floor = table.floors[run.floor]
+    outcome = floor.options[option_index].outcome
+    who = "Your party" if run.party_id else "You"
+    lines = []
+
+    level = max(profiles[user_id].get('level', 1) for user_id in run.standing())
+    if outcome.failure is not None and not _check_passes(run, outcome, option_index, list(answers), level,
+                                                         len(floor.options)):
+        outcome = outcome.failure
+
+    if outcome.text:
+        lines.append(outcome.text)
+
+    if outcome.enemy:
+        won, rounds = _fight(run, outcome.enemy, bool(floor.boss), profiles)
+        if won:
+            lines.append(f"⚔️ {who} defeated {outcome.enemy['name']} in {rounds} rounds! "
+                         f"({run.hp}/{run.max_hp} HP left)")
+        else:
+            lines.append(f"💀 {outcome.enemy['name']} defeated {who.lower()}!")
+
+    if outcome.heal:
+        for member in run.members.values():
+            member[0] = member[1]
+        lines.append(f"❤️ {who} {'are' if who == 'You' else 'is'} fully healed!")
+    for user_id in run.standing():
+        hp, max_hp = run.members[user_id]
+        run.members[user_id][0] = max(0, min(max_hp, hp + outcome.hp))
+    run.coins += outcome.coins
+    run.xp += outcome.xp
+    run.items.extend(outcome.items)
+    run.luck += outcome.luck
+    if outcome.effect and outcome.effect not in run.effects:
+        run.effects.append(outcome.effect)
+        lines.append(f"✨ {_title(outcome.effect)} empowers {who.lower()} for the rest of the dungeon!")
+
+    if not run.standing():
+        end_session(run)
+        return lines, 'defeated'
+
+    run.floor += 1
+    if run.floor >= len(table.floors):
+        end_session(run)
+        return lines, 'cleared'
+
+    save_session(run)
+    return lines, 'continue'
+
+
+def split_loot(items: List[str], members: List[str], leader_id: str, mode: str,
+               rng: random.Random) -> Dict[str, List[str]]:
+    """Share items out by a party's loot mode: 'fair' (round robin), 'leader' or 'roll' (random per item)."""
+    shares = {user_id: [] for user_id in members}
+    if mode == 'leader' and leader_id in shares:
+        shares[leader_id].extend(items)
+    elif mode == 'roll':
+        for item in items:
+            shares[rng.choice(members)].append(item)
+    else:
+        offset = rng.randrange(len(members))
+        for index, item in enumerate(items):
+            shares[members[(offset + index) % len(members)]].append(item)
+    return shares
+
+
+def finish_run(run: DungeonRun, profiles: Dict[str, Dict[str, Any]], state: str) -> Dict[str, Dict[str, Any]]:
+    """Settle a finished run into every member's profile. Returns what each was awarded (nothing if defeated).
+
+    Coins are split evenly, everyone gets the full XP, and items are shared by
+    the run's loot mode. The profiles are only changed in memory, so the
+    caller writes each one once.
+    """
+    from utils.game_events import emit, is_dragon, merge_results
+    from utils.inventory import store_items
+    from utils.modifiers import apply_rewards
+    from utils.unlock_conditions import record_boss_defeat
+
+    table = get_dungeons()[run.dungeon]
+    for user_id, player_data in profiles.items():
+        player_data['hp'] = max(0, run.members[user_id][0])
+    if state != 'cleared':
+        return {user_id: {'coins': 0, 'xp': 0, 'items': [], 'overflow': {}, 'events': None} for user_id in profiles}
+
+    rng = random.Random(run.seed)
+    total_coins = run.coins + rng.randint(*table.coins)
+    total_xp = run.xp + rng.randint(*table.xp)
+    items = list(run.items)
+    if table.items:
+        items.append(rng.choice(table.items))
+    shares = split_loot(items, list(profiles), run.user_id, run.loot_mode, rng)
+    boss = table.floors[-1].boss if table.floors else ""
+    now = int(time.time())
+
+    results = {}
+    for user_id, player_data in profiles.items():
+        coins, xp = apply_rewards(player_data, total_coins // len(profiles), total_xp)
+        player_data['coins'] = player_data.get('coins', 0) + coins
+        player_data['xp'] = player_data.get('xp', 0) + xp
+        player_data['luck_points'] = player_data.get('luck_points', 0) + run.luck
+        overflow = store_items(user_id, player_data, shares[user_id])
+
+        clears = player_data.get('dungeon_clears') or {}
+        clears[table.key] = max(clears.get(table.key, 0), len(table.floors))
+        player_data['dungeon_clears'] = clears
+
+        events = [emit(player_data, 'dungeon_cleared', dungeon=table.key, floors=len(table.floors)),
+                  emit(player_data, 'item_found', len(shares[user_id]))]
+        if boss:
+            hp, max_hp = run.members[user_id]
+            record_boss_defeat(player_data, boss, now)
+            events.append(emit(player_data, 'boss_defeated', boss=boss, in_battle=True,
+                               hp_percent=100 * max(0, hp) / max_hp if max_hp else 0))
+            if is_dragon(boss):
+                events.append(emit(player_data, 'dragon_defeated', boss=boss))
+        results[user_id] = {'coins': coins, 'xp': xp, 'items': shares[user_id], 'overflow': overflow,
+                            'events': merge_results(*events)}
+    return results
@@ -0,0 +1,281 @@
+"""
+Gameplay event bus driving achievement and quest progress.
+
+Commands report what happened with emit(player_data, 'battle_won') instead of
+bumping stats counters by hand. Each event increments its stats counters and
+then only looks at the rules that depend on them: an inverted index maps every
+stat key to the achievements whose requirements use it, and every event to the
+quest types it advances. Achievements are only checked when a counter crosses
+one of their thresholds, so the cold achievements section is loaded only when
+something may unlock. Everything happens on the profile in memory, so it is
+saved by the command's usual update_user_rpg_data() call.
+"""
+import logging
+import random
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from utils.hot_reload import register_cache_invalidator
+
+logger = logging.getLogger(__name__)
+
+# Stats counters each event increments
+EVENT_STATS = {
+    'battle_won': ('battles_won',),
+    'battle_lost': ('battles_lost',),
+    'boss_defeated': ('bosses_defeated',),
+    'dragon_defeated': ('dragons_defeated',),
+    'item_found': ('items_found',),
+    'item_purchased': ('items_purchased',),
+    'item_crafted': ('items_crafted',),
+    'item_used': ('items_used',),
+    'material_gathered': ('materials_gathered',),
+    'cheese_consumed': ('cheese_consumed',),
+    'quest_completed': ('quests_completed',),
+    'kwami_quest_completed': ('kwami_quests',),
+    'pvp_won': ('pvp_wins',),
+    'pvp_lost': ('pvp_losses',)
+}
+
+# Events that advance each quest type
+QUEST_EVENTS = {
+    'kill': ('battle_won',),
+    'collection': ('material_gathered',),
+    'exploration': ('adventure_completed',),
+    'delivery': ('work_completed',),
+    'story': ('boss_defeated', 'dungeon_cleared')
+}
+
+# Reward keys that add to a numeric profile field
+PROFILE_REWARDS = ('coins', 'xp', 'luck_points')
+
+# Quest locations whose completions count as kwami quests
+KWAMI_QUEST_LOCATIONS = ('kwami_realm',)
+
+Handler = Callable[[Dict[str, Any], str, int, Dict[str, Any], Dict[str, List]], None]
+
+# Kept across hot reloads: modules that are never reloaded (e.g. utils.world_events) only register once
+_handlers: Dict[str, List[Handler]] = globals().get('_handlers', {})
+_index: Optional['TriggerIndex'] = None
+
+
+class TriggerIndex:
+    """Inverted index from stats and events to the rules they can advance."""
+
+    def __init__(self, achievements: Dict[str, Any]):
+        self.achievements_by_stat: Dict[str, List[str]] = {}
+        for achievement_id, achievement in achievements.items():
+            for stat in achievement.get('requirement', {}):
+                self.achievements_by_stat.setdefault(stat, []).append(achievement_id)
+
+        self.quest_types_by_event: Dict[str, List[str]] = {}
+        for quest_type, events in QUEST_EVENTS.items():
+            for event in events:
+                self.quest_types_by_event.setdefault(event, []).append(quest_type)
+
+
+def get_trigger_index() -> TriggerIndex:
+    """Get the trigger index, building it on first use."""
+    global _index
+
+    if _index is None:
+        from utils.constants import ACHIEVEMENTS
+        _index = TriggerIndex(ACHIEVEMENTS)
+    return _index
+
+
+def invalidate_trigger_index():
+    """Drop the trigger index so it is rebuilt from the reloaded constants."""
+    global _index
+    _index = None
+
+
+register_cache_invalidator('game_events', invalidate_trigger_index)
+
+
+def register_handler(event: str, func: Handler):
+    """Run a function whenever an event is emitted."""
+    handlers = _handlers.setdefault(event, [])
+    # Replace a handler with the same name so hot reloads do not stack duplicates
+    name = (func.__module__, func.__qualname__)
+    handlers[:] = [h for h in handlers if (h.__module__, h.__qualname__) != name]
+    handlers.append(func)
+
+
+def emit(player_data: Dict[str, Any], event: str, amount: int = 1, **context) -> Dict[str, List]:
+    """Apply a gameplay event to a profile in place.
+
+    Returns {'achievements': [...], 'quests': [...], 'unlocks': [...]} with what
+    it unlocked or completed; pass it to format_event_rewards() for the reply.
+    """
+    result = _empty_result()
+    if amount <= 0:
+        return result
+
+    index = get_trigger_index()
+    stats = player_data.get('stats') or {}
+    crossed = []
+
+    for stat in EVENT_STATS.get(event, ()):
+        old = stats.get(stat, 0)
+        stats[stat] = old + amount
+        for achievement_id in index.achievements_by_stat.get(stat, ()):
+            crossed.append((achievement_id, stat, old))
+    player_data['stats'] = stats
+
+    for achievement_id, stat, old in crossed:
+        _check_achievement(player_data, achievement_id, stat, old, result)
+
+    quest_types = index.quest_types_by_event.get(event)
+    if quest_types:
+        _advance_quests(player_data, quest_types, amount, result)
+
+    for handler in _handlers.get(event, ()):
+        try:
+            handler(player_data, event, amount, context, result)
+        except Exception as e:
+            logger.error(f"Error in {event} handler {handler.__name__}: {e}")
+
+    return result
+
+
+def is_dragon(boss: str) -> bool:
+    """Check whether a boss ID is a dragon (counts toward dragons_defeated)."""
+    return 'dragon' in boss
+
+
+def _empty_result() -> Dict[str, List]:
+    """Get an empty emit() result."""
+    return {'achievements': [], 'quests': [], 'unlocks': []}
+
+
+def _check_achievement(player_data: Dict[str, Any], achievement_id: str, stat: str, old: int,
+                       result: Dict[str, List]):
+    """Unlock an achievement if the counter that just moved crossed its target."""
+    from utils.constants import ACHIEVEMENTS
+
+    achievement = ACHIEVEMENTS.get(achievement_id)
+    if not achievement:
+        return
+
+    # A counter already past its target before this event can't have completed anything
+    requirement = achievement['requirement']
+    if old >= requirement[stat]:
+        return
+    stats = player_data['stats']
+    if not all(stats.get(key, 0) >= target for key, target in requirement.items()):
+        return
+
+    achievements = player_data.get('achievements') or []
+    if achievement_id in achievements:
+        return
+    achievements.append(achievement_id)
+    player_data['achievements'] = achievements
+
+    rewards = achievement.get('rewards', {})
+    _grant_rewards(player_data, rewards)
+    result['achievements'].append(achievement)
+
+
+def _grant_rewards(player_data: Dict[str, Any], rewards: Dict[str, Any]):
+    """Add an achievement's title, numeric, item and companion rewards to a profile."""
+    title = rewards.get('title')
+    if title:
+        titles = player_data.get('titles') or []
+        if title not in titles:
+            titles.append(title)
+            player_data['titles'] = titles
+
+    for field in PROFILE_REWARDS:
+        if field in rewards:
+            player_data[field] = player_data.get(field, 0) + rewards[field]
+
+    if rewards.get('legendary_weapon'):
+        from utils.inventory import store_items
+        from utils.item_catalog import get_catalog
+
+        weapons = get_catalog().get_names_by_rarity('weapon', 'legendary')
+        if weapons:
+            user_id = str(player_data.get('user_id', ''))
+            store_items(user_id, player_data, [random.choice(weapons) for _ in range(rewards['legendary_weapon'])])
+
+    if rewards.get('kwami_companion'):
+        pets = player_data.get('pets') or []
+        pets.extend(['kwami_companion'] * rewards['kwami_companion'])
+        player_data['pets'] = pets
+
+    for field in rewards.keys() - {'title', 'legendary_weapon', 'kwami_companion', *PROFILE_REWARDS}:
+        logger.warning(f"Unknown achievement reward {field!r} not granted")
+
+
+def _advance_quests(player_data: Dict[str, Any], quest_types: List[str], amount: int, result: Dict[str, List]):
+    """Advance the active quests of the given types, completing any that reach their target."""
+    active_quests = player_data.get('active_quests') or []
+    finished = []
+
+    for quest in active_quests:
+        if quest.get('type') not in quest_types:
+            continue
+        target = quest.get('target', 1)
+        quest['progress'] = min(target, quest.get('progress', 0) + amount)
+        if quest['progress'] >= target:
+            finished.append(quest)
+
+    if not finished:
+        return
+
+    player_data['active_quests'] = [quest for quest in active_quests if quest not in finished]
+    completed_quests = player_data.get('completed_quests') or []
+    for quest in finished:
+        quest['rewarded'] = _quest_rewards(quest)
+        player_data['coins'] = player_data.get('coins', 0) + quest['rewarded']['coins']
+        player_data['xp'] = player_data.get('xp', 0) + quest['rewarded']['xp']
+        completed_quests.append({
+            'id': quest['id'],
+            'name': quest.get('name', quest.get('title')),
+            'type': quest.get('type'),
+            'completed_at': time.time()
+        })
+        result['quests'].append(quest)
+    player_data['completed_quests'] = completed_quests
+
+    nested = [emit(player_data, 'quest_completed', len(finished), quests=[quest['id'] for quest in finished])]
+    kwami_quests = [quest['id'] for quest in finished if quest.get('location') in KWAMI_QUEST_LOCATIONS]
+    if kwami_quests:
+        nested.append(emit(player_data, 'kwami_quest_completed', len(kwami_quests), quests=kwami_quests))
+    for events in nested:
+        result['achievements'].extend(events['achievements'])
+        result['unlocks'].extend(events['unlocks'])
+
+
+def _quest_rewards(quest: Dict[str, Any]) -> Dict[str, int]:
+    """Roll a completed quest's coin and XP rewards."""
+    rewards = quest.get('rewards', {})
+    rolled = {}
+    for field in ('coins', 'xp'):
+        value = rewards.get(field, 0)
+        rolled[field] = random.randint(*value) if isinstance(value, (list, tuple)) else int(value)
+    return rolled
+
+
+def format_event_rewards(result: Dict[str, List]) -> str:
+    """Format unlocked achievements, completed quests and unlocked weapons for a reply ('' if none)."""
+    lines = []
+    for achievement in result['achievements']:
+        lines.append(f"🏆 Achievement unlocked: **{achievement['name']}** - {achievement['description']}")
+    for quest in result['quests']:
+        rewarded = quest.get('rewarded', {})
+        lines.append(f"📜 Quest complete: **{quest['title']}** "
+                     f"(+{rewarded.get('coins', 0)} coins, +{rewarded.get('xp', 0)} XP)")
+    for message in result.get('unlocks', ()):
+        lines.append(f"⚔️ {message}")
+    return "\n".join(lines)
+
+
+def merge_results(*results: Dict[str, List]) -> Dict[str, List]:
+    """Combine the results of several emit() calls."""
+    merged = _empty_result()
+    for result in results:
+        for key in merged:
+            merged[key].extend(result.get(key, ()))
+    return merged
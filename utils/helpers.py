@@ -6,6 +6,7 @@ import logging
 import time
 
 from config import COLORS, EMOJIS
+from utils.inventory import has_item, add_item
 
 logger = logging.getLogger(__name__)
 
@@ -19,6 +20,19 @@ def create_embed(title: str, description: str, color: int = COLORS['primary']) -
     )
     return embed
 
+async def send_to_all_guilds(guilds, embed: discord.Embed) -> int:
+    """Send an embed to the system (or first text) channel of each guild."""
+    sent_count = 0
+    for guild in guilds:
+        try:
+            channel = guild.system_channel or guild.text_channels[0] if guild.text_channels else None
+            if channel:
+                await channel.send(embed=embed)
+                sent_count += 1
+        except Exception:
+            continue
+    return sent_count
+
 def format_number(num: int) -> str:
     """Format large numbers with commas."""
     return f"{num:,}"
@@ -106,20 +120,6 @@ def level_up_player(player_data: Dict[str, Any]) -> Optional[str]:
 
     return None
 
-def calculate_battle_damage(attacker_stats: Dict[str, Any], defender_stats: Dict[str, Any]) -> int:
-    """Calculate damage in battle."""
-    attack = attacker_stats.get('attack', 10)
-    defense = defender_stats.get('defense', 5)
-
-    # Base damage calculation
-    base_damage = max(1, attack - defense)
-
-    # Add some randomness (80% - 120% of base damage)
-    damage_multiplier = random.uniform(0.8, 1.2)
-    final_damage = int(base_damage * damage_multiplier)
-
-    return max(1, final_damage)
-
 def generate_random_stats() -> Dict[str, int]:
     """Generate random stats for monsters/items."""
     return {
@@ -146,63 +146,17 @@ def format_time_remaining(seconds):
 
 def check_weapon_unlock_conditions(player_data, weapon_name):
     """Check if player meets unlock conditions for a weapon."""
-    from utils.constants import WEAPON_UNLOCK_CONDITIONS
-
-    if weapon_name not in WEAPON_UNLOCK_CONDITIONS:
-        return True, "No special conditions"
-
-    conditions = WEAPON_UNLOCK_CONDITIONS[weapon_name]["requirements"]
-    failed_conditions = []
-
-    for condition in conditions:
-        if condition["type"] == "boss_defeat":
-            # Check if player has defeated the required boss
-            boss_defeats = player_data.get("boss_defeats", {})
-            boss_name = condition["boss"]
-
-            if boss_name not in boss_defeats:
-                failed_conditions.append(f"Must defeat {boss_name.replace('_', ' ').title()}")
-            elif condition.get("player_level_max"):
-                # Check if they were low enough level when they defeated it
-                defeat_data = boss_defeats[boss_name]
-                if defeat_data.get("player_level", 999) > condition["player_level_max"]:
-                    failed_conditions.append(f"Must defeat {boss_name.replace('_', ' ').title()} at level {condition['player_level_max']} or lower")
-
-        elif condition["type"] == "class_unlock":
-            required_class = condition["class"]
-            if player_data.get("player_class") != required_class:
-                failed_conditions.append(f"Must be {required_class.replace('_', ' ').title()} class")
-
-        elif condition["type"] == "health_condition":
-            # This would be checked during combat, not here
-            failed_conditions.append(f"Must complete challenge at {condition['max_hp_percent']}% HP or lower")
-
-        elif condition["type"] == "dungeon_clear":
-            dungeon_clears = player_data.get("dungeon_clears", {})
-            dungeon_name = condition["dungeon"]
-            required_floors = condition.get("floors", 1)
-
-            if dungeon_name not in dungeon_clears or dungeon_clears[dungeon_name] < required_floors:
-                failed_conditions.append(f"Must clear {dungeon_name.replace('_', ' ').title()} ({required_floors} floors)")
-
-        elif condition["type"] == "item_required":
-            inventory = player_data.get("inventory", [])
-            required_item = condition["item"]
-
-            if required_item not in inventory:
-                failed_conditions.append(f"Must possess {required_item.replace('_', ' ').title()}")
+    from utils.unlock_conditions import check_weapon_unlock
 
-    return len(failed_conditions) == 0, failed_conditions
+    return check_weapon_unlock(player_data, weapon_name)
 
 def award_weapon_unlock(player_data, weapon_name):
     """Award a special weapon to the player."""
     from utils.constants import WEAPON_UNLOCK_CONDITIONS
 
     # Add to inventory
-    inventory = player_data.get("inventory", [])
-    if weapon_name not in inventory:
-        inventory.append(weapon_name)
-        player_data["inventory"] = inventory
+    if not has_item(player_data, weapon_name):
+        add_item(player_data, weapon_name)
 
     # Record the unlock
     unlocked_weapons = player_data.get("unlocked_weapons", [])
@@ -393,7 +347,10 @@ def format_shop_item(item_data: Dict[str, Any]) -> str:
 
 def clear_item_cache():
     """Clear any cached item data to prevent duplicates."""
-    logger.info("Item cache cleared")
+    from utils.hot_reload import clear_caches
+
+    cleared = clear_caches()
+    logger.info(f"Item cache cleared ({len(cleared)} caches rebuilt)")
     return True
 
 def validate_shop_data() -> Dict[str, Any]:
@@ -482,79 +439,23 @@ def format_duration(seconds: int) -> str:
             return f"{days} days, {remaining_hours} hours"
         return f"{days} days"
 
-def check_weapon_unlock_conditions(user_id: str, weapon_name: str) -> tuple[bool, str]:
-    """Check if user meets weapon unlock conditions."""
-    from utils.constants import WEAPON_UNLOCK_CONDITIONS
-    from utils.database import get_user_rpg_data
-
-    if weapon_name not in WEAPON_UNLOCK_CONDITIONS:
-        return True, "No special conditions required"
-
-    player_data = get_user_rpg_data(user_id)
-    if not player_data:
-        return False, "Player data not found"
-
-    conditions = WEAPON_UNLOCK_CONDITIONS[weapon_name]["requirements"]
-    failed_conditions = []
-
-    for condition in conditions:
-        if condition["type"] == "boss_defeat":
-            boss_defeats = player_data.get("boss_defeats", {})
-            if condition["boss"] not in boss_defeats:
-                failed_conditions.append(f"Must defeat {condition['boss']}")
-            elif condition.get("min_level") and player_data.get("level", 1) < condition["min_level"]:
-                failed_conditions.append(f"Must be level {condition['min_level']} or higher")
-
-        elif condition["type"] == "class_unlock":
-            if player_data.get("player_class") != condition["class"]:
-                failed_conditions.append(f"Must be {condition['class']} class")
-
-        elif condition["type"] == "item_required":
-            inventory = player_data.get("inventory", [])
-            if condition["item"] not in inventory:
-                failed_conditions.append(f"Must have {condition['item']}")
-
-    if failed_conditions:
-        return False, "; ".join(failed_conditions)
-
-    return True, "All conditions met"
-
-def check_chrono_weave_unlock(user_id: str) -> tuple[bool, str]:
-    """Check if user can unlock Chrono Weave class."""
-    from utils.database import get_user_rpg_data
-
-    player_data = get_user_rpg_data(user_id)
-    if not player_data:
-        return False, "Player data not found"
-
-    # Check boss defeat condition
-    boss_defeats = player_data.get("boss_defeats", {})
-    if "time_rift_dragon" not in boss_defeats:
-        return False, "Must defeat Time Rift Dragon while level 30 or lower"
-
-    # Check quest completion
-    completed_quests = player_data.get("completed_quests", [])
-    if "chrono_whispers" not in [q.get("name", "") for q in completed_quests]:
-        return False, "Must complete Chrono Whispers quest"
-
-    # Check ancient relics
-    inventory = player_data.get("inventory", [])
-    required_relics = ["relic_of_past", "relic_of_future", "relic_of_present"]
-    missing_relics = [relic for relic in required_relics if relic not in inventory]
-
-    if missing_relics:
-        return False, f"Missing relics: {', '.join(missing_relics)}"
+def check_chrono_weave_unlock(player_data: dict) -> tuple[bool, str]:
+    """Check if a player can unlock the Chrono Weave class."""
+    from utils.unlock_conditions import check_class_unlock
 
+    can_unlock, missing = check_class_unlock(player_data, "chrono_weave")
+    if not can_unlock:
+        return False, "\n".join(missing)
     return True, "All Chrono Weave requirements met"
 
 def calculate_weapon_stats(weapon_name: str, player_data: dict) -> dict:
     """Calculate effective weapon stats based on player data."""
-    from utils.constants import WEAPONS
+    from utils.item_catalog import get_catalog
 
-    if weapon_name not in WEAPONS:
+    weapon = get_catalog().weapons.get(weapon_name)
+    if not weapon:
         return {"attack": 0, "defense": 0}
 
-    weapon = WEAPONS[weapon_name]
     stats = {
         "attack": weapon.get("attack", 0),
         "defense": weapon.get("defense", 0)
@@ -580,12 +481,12 @@ def calculate_weapon_stats(weapon_name: str, player_data: dict) -> dict:
 
 def format_weapon_info(weapon_name: str) -> str:
     """Format weapon information for display."""
-    from utils.constants import WEAPONS, RARITY_COLORS
+    from utils.item_catalog import get_catalog
 
-    if weapon_name not in WEAPONS:
+    weapon = get_catalog().weapons.get(weapon_name)
+    if not weapon:
         return f"Unknown weapon: {weapon_name}"
 
-    weapon = WEAPONS[weapon_name]
     rarity = weapon.get("rarity", "common")
 
     info = f"**{weapon_name}** ({rarity.title()})\n"
@@ -0,0 +1,170 @@
+"""
+In-place reloading of cogs and content modules.
+
+Modules that keep derived data (indexes, caches) register an invalidator here so
+the data is rebuilt after a reload. Cogs list the attributes that must survive a
+reload in a ``__reload_state__`` tuple, e.g. ``__reload_state__ = ('spam_tracker',)``.
+"""
+import graphlib
+import importlib
+import logging
+import sys
+import types
+from typing import Any, Callable, Dict, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Only our own modules may be reloaded
+RELOADABLE_PREFIXES = ('cogs.', 'utils.')
+RELOADABLE_MODULES = ('config',)
+
+# Modules holding process wide state that a reload would lose
+NON_RELOADABLE_MODULES = ('utils.hot_reload', 'utils.logging_config', 'utils.startup', 'utils.cluster', 'utils.cooldowns',
+                          'utils.storage', 'utils.write_behind', 'utils.database', 'utils.battle_sessions',
+                          'utils.pvp_rating', 'utils.world_events', 'utils.status_effects', 'utils.dungeons')
+
+_cache_invalidators: Dict[str, Callable[[], Any]] = {}
+
+
+def register_cache_invalidator(name: str, func: Callable[[], Any]):
+    """Register a function that clears a derived cache (re-registering replaces it)."""
+    _cache_invalidators[name] = func
+
+
+def clear_caches() -> List[str]:
+    """Run every registered cache invalidator and return the names that succeeded."""
+    cleared = []
+    for name, func in list(_cache_invalidators.items()):
+        try:
+            func()
+            cleared.append(name)
+        except Exception as e:
+            logger.error(f"Error clearing cache {name}: {e}")
+    return cleared
+
+
+def is_reloadable(module_name: str) -> bool:
+    """Check if a module may be reloaded in place."""
+    if module_name in NON_RELOADABLE_MODULES:
+        return False
+    return module_name in RELOADABLE_MODULES or module_name.startswith(RELOADABLE_PREFIXES)
+
+
+def resolve_target(bot, target: str) -> str:
+    """Resolve a short name like 'rpg_games' or 'constants' to a module name."""
+    for candidate in (target, f"cogs.{target}", f"utils.{target}"):
+        if candidate in bot.extensions or candidate in sys.modules:
+            return candidate
+    return target
+
+
+def _owned_objects(module: types.ModuleType) -> set:
+    """Get ids of the tables, functions and classes a module defines."""
+    owned = set()
+    for name, value in vars(module).items():
+        if name.startswith('__'):
+            continue
+        if isinstance(value, (dict, list, set)):
+            owned.add(id(value))
+        elif isinstance(value, (types.FunctionType, type)) and getattr(value, '__module__', None) == module.__name__:
+            owned.add(id(value))
+    return owned
+
+
+def find_dependents(module_name: str, inherited: frozenset = frozenset()) -> List[str]:
+    """Find loaded modules that bound names from a module with 'from x import y'.
+
+    ``inherited`` holds ids of objects the module itself imported (e.g. tables from
+    a module it depends on), so sharing those doesn't make another module a dependent.
+    """
+    module = sys.modules.get(module_name)
+    if not module:
+        return []
+
+    owned = _owned_objects(module) - inherited
+    dependents = []
+    for name, other in list(sys.modules.items()):
+        if name == module_name or not other or not is_reloadable(name):
+            continue
+        if any(id(value) in owned for value in vars(other).values()):
+            dependents.append(name)
+    return dependents
+
+
+def _capture_cog_state(bot, extension: str) -> Dict[str, Dict[str, Any]]:
+    """Collect the attributes each cog of an extension wants to keep."""
+    state = {}
+    for cog_name, cog in bot.cogs.items():
+        if type(cog).__module__ != extension:
+            continue
+        attrs = getattr(cog, '__reload_state__', ())
+        state[cog_name] = {attr: getattr(cog, attr) for attr in attrs if hasattr(cog, attr)}
+    return state
+
+
+def _restore_cog_state(bot, state: Dict[str, Dict[str, Any]]):
+    """Copy kept attributes onto the freshly loaded cogs."""
+    for cog_name, attrs in state.items():
+        cog = bot.get_cog(cog_name)
+        if not cog:
+            continue
+        for attr, value in attrs.items():
+            setattr(cog, attr, value)
+
+
+async def reload_extension(bot, extension: str):
+    """Reload a loaded extension, carrying its cogs' declared state across."""
+    state = _capture_cog_state(bot, extension)
+    await bot.reload_extension(extension)
+    _restore_cog_state(bot, state)
+
+
+async def reload_target(bot, target: str) -> Tuple[List[str], List[str]]:
+    """Reload a cog or module plus everything that depends on it.
+
+    Returns the reloaded module names and the names of the caches that were cleared.
+    """
+    module_name = resolve_target(bot, target)
+
+    if module_name in bot.extensions:
+        await reload_extension(bot, module_name)
+        return [module_name], clear_caches()
+
+    if module_name not in sys.modules:
+        raise ValueError(f"'{target}' is not a loaded cog or module")
+    if not is_reloadable(module_name):
+        raise ValueError(f"'{module_name}' cannot be reloaded in place")
+
+    # Collect dependents before reloading, while they still share objects with the old module
+    found = [module_name]
+    imports: Dict[str, set] = {module_name: set()}  # module -> collected modules it imports from
+    inherited: Dict[str, set] = {module_name: set()}  # module -> ids of objects owned by those modules
+    pending = [module_name]
+    while pending:
+        name = pending.pop(0)
+        passed_on = inherited[name] | _owned_objects(sys.modules[name])
+        for dependent in find_dependents(name, frozenset(inherited[name])):
+            imports.setdefault(dependent, set()).add(name)
+            inherited.setdefault(dependent, set()).update(passed_on)
+            if dependent not in found:
+                found.append(dependent)
+                pending.append(dependent)
+
+    # Reload each module after everything it imports from, so it binds their new objects
+    try:
+        order = list(graphlib.TopologicalSorter(imports).static_order())
+    except graphlib.CycleError:
+        logger.warning(f"Import cycle among the dependents of {module_name}; reloading in discovery order")
+        order = found
+
+    plain_modules = [name for name in order if name not in bot.extensions]
+    extensions = [name for name in order if name in bot.extensions]
+
+    for name in plain_modules:
+        importlib.reload(sys.modules[name])
+    for name in extensions:
+        await reload_extension(bot, name)
+
+    cleared = clear_caches()
+    logger.info(f"Reloaded {', '.join(order)} (caches cleared: {', '.join(cleared) or 'none'})")
+    return order, cleared
@@ -0,0 +1,276 @@
+"""
+Counted inventory helpers.
+
+A player's ``inventory`` is stored as ``{item_key: quantity}``, where the key is
+the catalog item ID (or the plain name for items that are not in the catalog,
+such as fish or crafted materials). Per-instance data, when an item needs it,
+lives in ``inventory_meta`` as ``{item_key: [instance, ...]}``.
+
+Legacy profiles store a list of item names; they are converted the first time
+any helper touches them and saved with the next profile write.
+
+Capacity is counted in slots (distinct keys) of up to ``max_stack_size`` each,
+so the profile document stays bounded. Rewards that don't fit go to the
+player's stash, a separate ``user_stash_{id}`` key that is only read when the
+player claims it or more items overflow.
+"""
+import logging
+from collections import Counter
+from collections.abc import Mapping
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+
+from utils.constants import RPG_CONSTANTS, ITEM_SELL_VALUES
+from utils.database import get_user_stash, update_user_stash
+from utils.item_catalog import get_catalog
+
+logger = logging.getLogger(__name__)
+
+
+def item_key(item: str) -> str:
+    """Get the inventory key for an item name or ID."""
+    entry = get_catalog().resolve(item)
+    return entry['id'] if entry else item
+
+
+def item_display_name(key: str) -> str:
+    """Get the display name for an inventory key."""
+    entry = get_catalog().get(key)
+    return entry['name'] if entry else key
+
+
+def get_inventory(player_data: Dict[str, Any]) -> Dict[str, int]:
+    """Get a player's counted inventory, migrating the legacy list format in place."""
+    inventory = player_data.get('inventory')
+
+    if type(inventory) is dict:
+        return inventory
+
+    counted: Dict[str, int] = {}
+    if isinstance(inventory, Mapping):
+        # Database-backed mapping: copy it so edits don't write through one by one
+        counted = {key: int(quantity) for key, quantity in inventory.items()}
+    elif inventory:
+        for name in inventory:
+            key = item_key(name)
+            counted[key] = counted.get(key, 0) + 1
+
+    player_data['inventory'] = counted
+    return counted
+
+
+def count_item(player_data: Dict[str, Any], item: str) -> int:
+    """Get how many of an item a player has."""
+    return get_inventory(player_data).get(item_key(item), 0)
+
+
+def has_item(player_data: Dict[str, Any], item: str, quantity: int = 1) -> bool:
+    """Check if a player has at least a quantity of an item."""
+    return count_item(player_data, item) >= quantity
+
+
+def add_item(player_data: Dict[str, Any], item: str, quantity: int = 1, meta: Optional[Dict[str, Any]] = None) -> str:
+    """Add an item to a player's inventory and return its key."""
+    inventory = get_inventory(player_data)
+    key = item_key(item)
+    inventory[key] = inventory.get(key, 0) + quantity
+
+    if meta is not None:
+        all_meta = player_data.get('inventory_meta') or {}
+        all_meta.setdefault(key, []).append(meta)
+        player_data['inventory_meta'] = all_meta
+
+    return key
+
+
+def remove_item(player_data: Dict[str, Any], item: str, quantity: int = 1) -> bool:
+    """Remove a quantity of an item. Returns False (and changes nothing) if there aren't enough."""
+    inventory = get_inventory(player_data)
+    key = item_key(item)
+    current = inventory.get(key, 0)
+    if current < quantity:
+        return False
+
+    if current == quantity:
+        del inventory[key]
+    else:
+        inventory[key] = current - quantity
+
+    all_meta = player_data.get('inventory_meta')
+    if all_meta and key in all_meta:
+        instances = all_meta[key][quantity:] if key in inventory else []
+        if instances:
+            all_meta[key] = instances
+        else:
+            del all_meta[key]
+
+    return True
+
+
+def total_items(player_data: Dict[str, Any]) -> int:
+    """Get the total number of items a player holds."""
+    return sum(get_inventory(player_data).values())
+
+
+def list_items(player_data: Dict[str, Any]) -> List[Tuple[str, int]]:
+    """Get (display name, quantity) pairs for a player's inventory."""
+    return [(item_display_name(key), quantity) for key, quantity in get_inventory(player_data).items()]
+
+
+def item_names(player_data: Dict[str, Any]) -> List[str]:
+    """Get the display names of every distinct item a player holds."""
+    return [item_display_name(key) for key in get_inventory(player_data)]
+
+
+def format_inventory_lines(player_data: Dict[str, Any], limit: int) -> str:
+    """Format inventory items as bullet lines, with quantities for stacks."""
+    items = list_items(player_data)
+    if not items:
+        return "Your inventory is empty!"
+
+    lines = [f"• {name} x{quantity}" if quantity > 1 else f"• {name}" for name, quantity in items[:limit]]
+    if len(items) > limit:
+        lines.append(f"... and {len(items) - limit} more items")
+    return "\n".join(lines)
+
+
+def get_capacity() -> int:
+    """Get the number of inventory slots."""
+    return RPG_CONSTANTS['max_inventory_size']
+
+
+def get_stack_size() -> int:
+    """Get the maximum quantity held in one slot."""
+    return RPG_CONSTANTS['max_stack_size']
+
+
+def used_slots(player_data: Dict[str, Any]) -> int:
+    """Get the number of inventory slots in use."""
+    return len(get_inventory(player_data))
+
+
+def room_for(player_data: Dict[str, Any], item: str) -> int:
+    """Get how many more of an item fit in the inventory."""
+    inventory = get_inventory(player_data)
+    key = item_key(item)
+    if key in inventory:
+        return max(0, get_stack_size() - inventory[key])
+    return get_stack_size() if len(inventory) < get_capacity() else 0
+
+
+def has_room(player_data: Dict[str, Any], item: str, quantity: int = 1) -> bool:
+    """Check if a quantity of an item fits in the inventory."""
+    return room_for(player_data, item) >= quantity
+
+
+def _merge_into_stash(user_id: str, overflow: Dict[str, int]) -> bool:
+    """Add overflow counts to a player's stash with a single write."""
+    stash = get_user_stash(user_id)
+    for key, quantity in overflow.items():
+        stash[key] = stash.get(key, 0) + quantity
+    return update_user_stash(user_id, stash)
+
+
+def store_items(user_id: str, player_data: Dict[str, Any],
+                items: Union[Iterable[str], Mapping]) -> Dict[str, int]:
+    """Add items up to capacity, sending the rest to the stash.
+
+    Accepts a list of names (one per item) or a {name: quantity} mapping.
+    Returns the overflowed items as {display name: quantity}.
+    """
+    counts = items if isinstance(items, Mapping) else Counter(items)
+    overflow: Dict[str, int] = {}
+
+    for item, quantity in counts.items():
+        fits = min(quantity, room_for(player_data, item))
+        if fits:
+            add_item(player_data, item, fits)
+        if quantity > fits:
+            key = item_key(item)
+            overflow[key] = overflow.get(key, 0) + quantity - fits
+
+    if overflow and not _merge_into_stash(user_id, overflow):
+        logger.error(f"Lost {sum(overflow.values())} overflow items for {user_id}")
+    return {item_display_name(key): quantity for key, quantity in overflow.items()}
+
+
+def format_overflow_notice(overflow: Dict[str, int]) -> str:
+    """Format a note telling the player items went to their stash."""
+    if not overflow:
+        return ""
+    items = ", ".join(f"{name} x{quantity}" if quantity > 1 else name for name, quantity in overflow.items())
+    return f"\n\n📦 Inventory full! Sent to your stash: {items} (use `$stash claim`)"
+
+
+def list_stash(user_id: str) -> List[Tuple[str, int]]:
+    """Get (display name, quantity) pairs for a player's stash."""
+    return [(item_display_name(key), quantity) for key, quantity in get_user_stash(user_id).items()]
+
+
+def claim_stash(user_id: str, player_data: Dict[str, Any]) -> Tuple[Dict[str, int], int]:
+    """Move as much of the stash as fits into the inventory.
+
+    Returns the claimed items as {display name: quantity} and the number left behind.
+    """
+    stash = get_user_stash(user_id)
+    claimed: Dict[str, int] = {}
+
+    for key in list(stash):
+        fits = min(stash[key], room_for(player_data, key))
+        if not fits:
+            continue
+        add_item(player_data, key, fits)
+        claimed[item_display_name(key)] = fits
+        stash[key] -= fits
+        if not stash[key]:
+            del stash[key]
+
+    if claimed:
+        update_user_stash(user_id, stash)
+    return claimed, sum(stash.values())
+
+
+def item_category(key: str) -> str:
+    """Get the category of an inventory key ('other' for non-catalog items)."""
+    entry = get_catalog().get(key)
+    return entry.get('category', 'other') if entry else 'other'
+
+
+def item_rarity(key: str) -> str:
+    """Get the rarity of an inventory key."""
+    entry = get_catalog().get(key)
+    return entry.get('rarity', 'common') if entry else 'common'
+
+
+def sell_value(key: str) -> int:
+    """Get the coins one of an item sells for."""
+    entry = get_catalog().get(key)
+    if entry and entry.get('price'):
+        return int(entry['price'] * RPG_CONSTANTS['sell_ratio'])
+    return ITEM_SELL_VALUES.get(item_rarity(key), 0)
+
+
+def select_items(player_data: Dict[str, Any], selector: str) -> Dict[str, int]:
+    """Get the inventory entries matching a rarity, a category or an item name."""
+    selector = selector.lower().strip()
+    inventory = get_inventory(player_data)
+
+    if selector in ITEM_SELL_VALUES:
+        return {key: quantity for key, quantity in inventory.items() if item_rarity(key) == selector}
+
+    by_category = {key: quantity for key, quantity in inventory.items() if item_category(key) == selector}
+    if by_category:
+        return by_category
+
+    key = item_key(selector)
+    if key not in inventory:
+        key = next((k for k in inventory if k.lower() == selector), key)
+    return {key: inventory[key]} if key in inventory else {}
+
+
+def remove_items(player_data: Dict[str, Any], items: Mapping) -> int:
+    """Remove several {key: quantity} entries at once. Returns how many were removed."""
+    removed = 0
+    for key, quantity in items.items():
+        if remove_item(player_data, key, quantity):
+            removed += quantity
+    return removed
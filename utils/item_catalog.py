@@ -0,0 +1,140 @@
+"""
+Unified item catalog with precomputed lookup indexes.
+
+The catalog merges the shop, weapon, armor and special item tables from
+utils/constants.py with the admin-created dynamic weapons and armor. It is built
+once and rebuilt only after invalidate_catalog(), which the content registry
+calls whenever admin content changes.
+"""
+import logging
+from typing import Any, Dict, List, Mapping, Optional
+
+from utils.cluster import register_invalidation_handler
+from utils.hot_reload import register_cache_invalidator
+
+logger = logging.getLogger(__name__)
+
+# Category assigned to items that come from the non-shop tables
+SOURCE_CATEGORIES = {
+    'weapon': 'weapons',
+    'armor': 'armor',
+    'special': 'special'
+}
+
+_catalog: Optional['ItemCatalog'] = None
+_version = 0
+
+
+def normalize_name(name: str) -> str:
+    """Normalize an item name for lookups (case and whitespace insensitive)."""
+    return ' '.join(str(name).lower().split())
+
+
+class ItemCatalog:
+    """Immutable snapshot of every item with O(1) lookups."""
+
+    def __init__(self, version: int, shop_items: Mapping[str, Dict[str, Any]], weapons: Mapping[str, Dict[str, Any]],
+                 armor: Mapping[str, Dict[str, Any]], special_items: Mapping[str, Dict[str, Any]]):
+        self.version = version
+        self.by_id: Dict[str, Dict[str, Any]] = {}
+        self.by_name: Dict[str, Dict[str, Any]] = {}
+        self.shop_by_category: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        self.by_rarity: Dict[str, Dict[str, List[str]]] = {}
+        self.weapons: Dict[str, Dict[str, Any]] = {}
+        self.armor: Dict[str, Dict[str, Any]] = {}
+
+        # Shop items come first so their names win over the equipment tables
+        for item_id, data in shop_items.items():
+            entry = {**data, 'id': data.get('id', item_id), 'source': 'shop'}
+            self._add(entry)
+            self.shop_by_category.setdefault(entry.get('category'), {})[entry['id']] = entry
+
+        for source, table in (('weapon', weapons), ('armor', armor), ('special', special_items)):
+            for name, data in table.items():
+                entry = {**data, 'id': name, 'name': name, 'category': SOURCE_CATEGORIES[source], 'source': source}
+                self._add(entry)
+                if source == 'weapon':
+                    self.weapons[name] = entry
+                elif source == 'armor':
+                    self.armor[name] = entry
+
+    def _add(self, entry: Dict[str, Any]):
+        """Add an entry to the id, name and rarity indexes."""
+        self.by_id.setdefault(entry['id'], entry)
+        if entry.get('name'):
+            self.by_name.setdefault(normalize_name(entry['name']), entry)
+        rarity = entry.get('rarity', 'common')
+        self.by_rarity.setdefault(entry['source'], {}).setdefault(rarity, []).append(entry['name'])
+
+    def get(self, item_id: str) -> Optional[Dict[str, Any]]:
+        """Get an item by its ID."""
+        return self.by_id.get(item_id)
+
+    def get_by_name(self, name: str) -> Optional[Dict[str, Any]]:
+        """Get an item by name (case insensitive)."""
+        return self.by_name.get(normalize_name(name))
+
+    def resolve(self, name_or_id: str) -> Optional[Dict[str, Any]]:
+        """Get an item by ID or by name."""
+        return self.by_id.get(name_or_id) or self.get_by_name(name_or_id)
+
+    def get_shop_item(self, name_or_id: str) -> Optional[Dict[str, Any]]:
+        """Get a purchasable shop item by ID or name."""
+        entry = self.resolve(name_or_id)
+        return entry if entry and entry['source'] == 'shop' else None
+
+    def get_shop_items(self) -> List[Dict[str, Any]]:
+        """Get every purchasable shop item."""
+        return [item for items in self.shop_by_category.values() for item in items.values()]
+
+    def get_shop_category(self, category: str) -> Dict[str, Dict[str, Any]]:
+        """Get shop items of a category, keyed by ID."""
+        return self.shop_by_category.get(category, {})
+
+    def get_names_by_rarity(self, source: str, rarity: str) -> List[str]:
+        """Get item names of a source ('shop', 'weapon', 'armor', 'special') and rarity."""
+        return self.by_rarity.get(source, {}).get(rarity, [])
+
+    def get_rarity(self, name: str, default: str = 'common') -> str:
+        """Get the rarity of an item by name."""
+        entry = self.get_by_name(name)
+        return entry.get('rarity', default) if entry else default
+
+    def names(self) -> List[str]:
+        """Get the display name of every item."""
+        return [entry['name'] for entry in self.by_name.values()]
+
+
+def build_catalog() -> ItemCatalog:
+    """Build a new catalog from the constant tables and dynamic content."""
+    global _version
+
+    from utils.constants import SHOP_ITEMS, OMNIPOTENT_ITEM
+    from utils.content_registry import get_registry
+
+    # Weapons and armor (static plus admin-created) come from the content registry
+    registry = get_registry()
+
+    _version += 1
+    catalog = ItemCatalog(_version, SHOP_ITEMS, registry.weapons, registry.armor, OMNIPOTENT_ITEM)
+    logger.info(f"Item catalog v{catalog.version} built with {len(catalog.by_id)} items")
+    return catalog
+
+
+def get_catalog() -> ItemCatalog:
+    """Get the current item catalog, building it on first use."""
+    global _catalog
+
+    if _catalog is None:
+        _catalog = build_catalog()
+    return _catalog
+
+
+def invalidate_catalog(key: Any = None):
+    """Drop the catalog so it is rebuilt on next use."""
+    global _catalog
+    _catalog = None
+
+
+register_invalidation_handler('item_catalog', invalidate_catalog)
+register_cache_invalidator('item_catalog', invalidate_catalog)
@@ -0,0 +1,170 @@
+"""
+Fuzzy item name search used for command resolution and slash autocomplete.
+
+Names are indexed once per catalog version by full-name prefix, word prefix and
+character trigrams, so a query only scores the handful of names sharing
+trigrams with it instead of scanning the whole catalog.
+"""
+import bisect
+import logging
+from typing import Dict, Iterable, List, Optional, Set
+
+from utils.hot_reload import register_cache_invalidator
+from utils.item_catalog import get_catalog, normalize_name
+
+logger = logging.getLogger(__name__)
+
+MIN_TRIGRAM_SCORE = 0.3
+
+_indexes: Dict[str, 'ItemSearchIndex'] = {}
+_indexed_catalog = None
+
+
+def _trigrams(text: str) -> Set[str]:
+    """Get the character trigrams of a normalized string (padded at word edges)."""
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class ItemSearchIndex:
+    """Prefix and trigram index over a set of item names."""
+
+    def __init__(self, names: Iterable[str]):
+        self.names: List[str] = []
+        self.normalized: List[str] = []
+        seen = set()
+        for name in names:
+            key = normalize_name(name)
+            if not key or key in seen:
+                continue
+            seen.add(key)
+            self.names.append(name)
+            self.normalized.append(key)
+
+        self.exact = {key: i for i, key in enumerate(self.normalized)}
+        self.sorted_full = sorted((key, i) for i, key in enumerate(self.normalized))
+        self.sorted_words = sorted(
+            (word, i) for i, key in enumerate(self.normalized) for word in key.split()[1:]
+        )
+        self.trigram_postings: Dict[str, List[int]] = {}
+        self.trigram_counts: List[int] = []
+        for i, key in enumerate(self.normalized):
+            grams = _trigrams(key)
+            self.trigram_counts.append(len(grams))
+            for gram in grams:
+                self.trigram_postings.setdefault(gram, []).append(i)
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    @staticmethod
+    def _prefix_range(sorted_keys: List[tuple], prefix: str) -> List[int]:
+        """Get indexes whose key starts with a prefix from a sorted (key, index) list."""
+        start = bisect.bisect_left(sorted_keys, (prefix,))
+        matches = []
+        for key, i in sorted_keys[start:]:
+            if not key.startswith(prefix):
+                break
+            matches.append(i)
+        return matches
+
+    def search(self, query: str, limit: int = 10) -> List[str]:
+        """Get the best matching names for a query, best first."""
+        q = normalize_name(query)
+        if not q:
+            return sorted(self.names, key=str.lower)[:limit]
+
+        # Rank: exact, full-name prefix, word prefix, substring, then trigram similarity
+        scores: Dict[int, float] = {}
+        if q in self.exact:
+            scores[self.exact[q]] = 4.0
+        for i in self._prefix_range(self.sorted_full, q):
+            scores.setdefault(i, 3.0)
+        for i in self._prefix_range(self.sorted_words, q):
+            scores.setdefault(i, 2.0)
+
+        query_grams = _trigrams(q)
+        shared: Dict[int, int] = {}
+        for gram in query_grams:
+            for i in self.trigram_postings.get(gram, ()):
+                shared[i] = shared.get(i, 0) + 1
+        for i, count in shared.items():
+            if i in scores:
+                continue
+            if q in self.normalized[i]:
+                scores[i] = 1.5
+                continue
+            similarity = 2 * count / (len(query_grams) + self.trigram_counts[i])
+            if similarity >= MIN_TRIGRAM_SCORE:
+                scores[i] = similarity
+
+        ranked = sorted(scores, key=lambda i: (-scores[i], len(self.normalized[i]), self.normalized[i]))
+        return [self.names[i] for i in ranked[:limit]]
+
+    def resolve(self, query: str) -> Optional[str]:
+        """Resolve a query to one name when it is exact or an unambiguous prefix."""
+        q = normalize_name(query)
+        if q in self.exact:
+            return self.names[self.exact[q]]
+
+        prefix_matches = self._prefix_range(self.sorted_full, q) if q else []
+        if len(prefix_matches) == 1:
+            return self.names[prefix_matches[0]]
+        return None
+
+
+def resolve_name(names: Iterable[str], query: str, suggestions: int = 5) -> tuple:
+    """Resolve a query against a small ad-hoc list of names (e.g. an inventory).
+
+    Returns the resolved name (or None) and a list of suggestions.
+    """
+    index = ItemSearchIndex(names)
+    resolved = index.resolve(query)
+    if resolved:
+        return resolved, []
+    return None, index.search(query, suggestions)
+
+
+def format_suggestions(names: List[str]) -> str:
+    """Format a 'Did you mean' block for an error message."""
+    if not names:
+        return ""
+    return "\n\n**Did you mean:**\n" + "\n".join(f"• {name}" for name in names)
+
+
+def _scope_names(scope: str) -> List[str]:
+    """Get the item names that belong to a search scope."""
+    catalog = get_catalog()
+    if scope == 'shop':
+        return [item['name'] for item in catalog.get_shop_items()]
+    if scope == 'weapon':
+        return list(catalog.weapons.keys())
+    if scope == 'armor':
+        return list(catalog.armor.keys())
+    return catalog.names()
+
+
+def get_search_index(scope: str = 'all') -> ItemSearchIndex:
+    """Get the search index for 'all', 'shop', 'weapon' or 'armor' items."""
+    global _indexed_catalog
+
+    catalog = get_catalog()
+    if catalog is not _indexed_catalog:
+        _indexes.clear()
+        _indexed_catalog = catalog
+
+    index = _indexes.get(scope)
+    if index is None:
+        index = ItemSearchIndex(_scope_names(scope))
+        _indexes[scope] = index
+    return index
+
+
+def clear_search_indexes():
+    """Drop every search index."""
+    global _indexed_catalog
+    _indexes.clear()
+    _indexed_catalog = None
+
+
+register_cache_invalidator('item_search', clear_search_indexes)
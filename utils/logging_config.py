@@ -0,0 +1,173 @@
+"""
+Non-blocking logging pipeline for the bot.
+
+Log records are pushed onto an in-memory queue by the handlers attached to the
+root logger and written to disk/console by a single background listener thread,
+so a logger call from the event loop never waits on file I/O.
+"""
+import gzip
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import shutil
+from datetime import datetime
+from typing import Dict, Optional
+
+LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+# Defaults, all overridable through environment variables
+DEFAULT_LOG_SETTINGS = {
+    'file': 'bot.log',
+    'level': 'INFO',
+    'rotation': 'size',          # size or time
+    'max_bytes': 5 * 1024 * 1024,  # 5 MB per file
+    'when': 'midnight',          # rotation interval for time based rotation
+    'backup_count': 5,
+    'compress': True,
+    'json': False,
+    'queue_size': 10000
+}
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+class JSONFormatter(logging.Formatter):
+    """Format log records as single-line JSON objects."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'time': datetime.fromtimestamp(record.created).isoformat(),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+            'thread': record.threadName
+        }
+        if record.exc_info:
+            entry['exc_info'] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False)
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """Queue handler that drops records instead of blocking when the queue is full."""
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            pass
+
+
+def _gzip_namer(name: str) -> str:
+    """Name rotated files with a .gz suffix."""
+    return name + '.gz'
+
+
+def _gzip_rotator(source: str, dest: str):
+    """Compress a rotated log file and remove the original."""
+    with open(source, 'rb') as f_in, gzip.open(dest, 'wb') as f_out:
+        shutil.copyfileobj(f_in, f_out)
+    os.remove(source)
+
+
+def parse_module_levels(spec: str) -> Dict[str, int]:
+    """Parse per-module levels from a spec like 'discord=WARNING,cogs.rpg_games=DEBUG'."""
+    levels = {}
+    for part in (spec or '').split(','):
+        if '=' not in part:
+            continue
+        name, level = part.split('=', 1)
+        name = name.strip()
+        level_value = logging.getLevelName(level.strip().upper())
+        if name and isinstance(level_value, int):
+            levels[name] = level_value
+    return levels
+
+
+def get_log_settings() -> Dict[str, object]:
+    """Get logging settings merged with environment overrides."""
+    settings = dict(DEFAULT_LOG_SETTINGS)
+    settings['file'] = os.getenv('LOG_FILE', settings['file'])
+    settings['level'] = os.getenv('LOG_LEVEL', settings['level']).upper()
+    settings['rotation'] = os.getenv('LOG_ROTATION', settings['rotation']).lower()
+    settings['when'] = os.getenv('LOG_ROTATE_WHEN', settings['when'])
+    settings['max_bytes'] = int(os.getenv('LOG_MAX_BYTES', settings['max_bytes']))
+    settings['backup_count'] = int(os.getenv('LOG_BACKUP_COUNT', settings['backup_count']))
+    settings['compress'] = os.getenv('LOG_COMPRESS', '1' if settings['compress'] else '0') not in ('0', 'false', 'no')
+    settings['json'] = os.getenv('LOG_JSON', '1' if settings['json'] else '0') not in ('0', 'false', 'no')
+    settings['module_levels'] = parse_module_levels(os.getenv('LOG_MODULE_LEVELS', 'discord=INFO,werkzeug=WARNING'))
+    return settings
+
+
+def _create_file_handler(settings: Dict[str, object]) -> logging.Handler:
+    """Create the rotating file handler described by the settings."""
+    if settings['rotation'] == 'time':
+        handler = logging.handlers.TimedRotatingFileHandler(
+            settings['file'],
+            when=settings['when'],
+            backupCount=settings['backup_count'],
+            encoding='utf-8'
+        )
+    else:
+        handler = logging.handlers.RotatingFileHandler(
+            settings['file'],
+            maxBytes=settings['max_bytes'],
+            backupCount=settings['backup_count'],
+            encoding='utf-8'
+        )
+
+    if settings['compress']:
+        handler.namer = _gzip_namer
+        handler.rotator = _gzip_rotator
+
+    return handler
+
+
+def setup_logging() -> logging.handlers.QueueListener:
+    """Configure queue based logging and start the background writer thread."""
+    global _listener
+
+    if _listener:
+        return _listener
+
+    settings = get_log_settings()
+
+    file_formatter = JSONFormatter() if settings['json'] else logging.Formatter(LOG_FORMAT)
+    file_handler = _create_file_handler(settings)
+    file_handler.setFormatter(file_formatter)
+
+    console_handler = logging.StreamHandler()
+    console_handler.setFormatter(logging.Formatter(LOG_FORMAT))
+
+    log_queue = queue.Queue(maxsize=settings['queue_size'])
+    queue_handler = DroppingQueueHandler(log_queue)
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(queue_handler)
+    root.setLevel(settings['level'])
+
+    for module_name, level in settings['module_levels'].items():
+        logging.getLogger(module_name).setLevel(level)
+
+    _listener = logging.handlers.QueueListener(
+        log_queue,
+        file_handler,
+        console_handler,
+        respect_handler_level=True
+    )
+    _listener.start()
+    return _listener
+
+
+def shutdown_logging():
+    """Flush queued records and stop the background writer thread."""
+    global _listener
+
+    if _listener:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
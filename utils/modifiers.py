@@ -0,0 +1,207 @@
+"""
+Reward modifier pipeline.
+
+Every source of reward bonuses is folded into one precomputed Modifiers set
+per player:
+
+- the admin xp_multiplier from the game settings
+- active world events (loot_multiplier, xp_multiplier, rare_encounter_chance)
+- the player's active status effects (xp_bonus multipliers, luck bonuses and penalties)
+- the player's legacy modifiers (xp_bonus fractions, luck bonuses)
+
+The global part (settings and events) is shared by every player and rebuilt
+when the settings registry or the set of running events changes. Each player's
+set is cached until the first of its effects or events expires, or until
+invalidate_modifiers() is called for them (on every worker) after their
+status effects or legacy modifiers change. Reward paths then apply everything
+with a few multiplications via apply_rewards() and item_chance(), using the
+luck points of the profile already in memory rather than reloading it.
+"""
+import logging
+import random
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+from utils.cluster import publish_invalidation, register_invalidation_handler
+from utils.hot_reload import register_cache_invalidator
+
+logger = logging.getLogger(__name__)
+
+MAX_CACHED = 10000  # Player sets kept before stale ones are swept
+
+
+@dataclass(slots=True)
+class Modifiers:
+    """Composed reward multipliers."""
+
+    xp: float = 1.0
+    coins: float = 1.0
+    loot: float = 1.0          # Item drop chance multiplier
+    rare_chance: float = 0.0   # Chance of a rare encounter
+    luck_bonus: int = 0        # Luck points added to the player's own
+    expires_at: float = float('inf')
+    sources: List[str] = field(default_factory=list)
+    base: Optional['GlobalModifiers'] = None
+
+
+@dataclass(slots=True)
+class GlobalModifiers:
+    """The part of every player's modifiers that comes from settings and world events."""
+
+    modifiers: Modifiers
+    registry: Any
+    event_ids: Tuple[str, ...]
+
+
+_global: Optional[GlobalModifiers] = None
+_cache: Dict[str, Modifiers] = {}
+
+
+def _current_events() -> List[Any]:
+    """Get the running world events."""
+    from utils.world_events import active_events
+    return active_events()
+
+
+def get_global_modifiers() -> GlobalModifiers:
+    """Get the settings and world event modifiers, rebuilding them when either changed."""
+    global _global
+    from utils.content_registry import get_registry
+
+    registry = get_registry()
+    events = _current_events()
+    event_ids = tuple(event.event_id for event in events)
+    if (_global is not None and _global.registry is registry and _global.event_ids == event_ids
+            and _global.modifiers.expires_at > time.time()):
+        return _global
+
+    from utils.constants import WORLD_EVENTS
+
+    modifiers = Modifiers(xp=registry.xp_multiplier)
+    if registry.xp_multiplier != 1.0:
+        modifiers.sources.append(f"Server XP x{registry.xp_multiplier:g}")
+
+    for event in events:
+        effects = WORLD_EVENTS.get(event.event_type, {}).get('effects', {})
+        modifiers.xp *= effects.get('xp_multiplier', 1.0)
+        modifiers.coins *= effects.get('loot_multiplier', 1.0)
+        modifiers.loot *= effects.get('loot_multiplier', 1.0)
+        modifiers.rare_chance += effects.get('rare_encounter_chance', 0.0)
+        modifiers.expires_at = min(modifiers.expires_at, event.ends_at)
+        modifiers.sources.append(event.name)
+
+    _global = GlobalModifiers(modifiers, registry, event_ids)
+    return _global
+
+
+def _build(player_data: Dict[str, Any], base: GlobalModifiers, now: float) -> Modifiers:
+    """Compose a player's modifiers on top of the global ones."""
+    from utils.constants import LEGACY_MODIFIERS, STATUS_EFFECTS
+    from utils.status_effects import active_effects
+
+    shared = base.modifiers
+    modifiers = Modifiers(shared.xp, shared.coins, shared.loot, shared.rare_chance, shared.luck_bonus,
+                          shared.expires_at, list(shared.sources), base)
+
+    for name, expires_at in active_effects(player_data, now).items():
+        effects = STATUS_EFFECTS[name].get('effects', {})
+        modifiers.xp *= effects.get('xp_bonus', 1.0)
+        modifiers.luck_bonus += effects.get('luck_bonus', 0) + effects.get('luck_penalty', 0)
+        if isinstance(expires_at, (int, float)):
+            modifiers.expires_at = min(modifiers.expires_at, expires_at)
+        modifiers.sources.append(name.replace('_', ' ').title())
+
+    for name in player_data.get('legacy_modifiers') or []:
+        legacy = LEGACY_MODIFIERS.get(name)
+        if not legacy:
+            continue
+        effects = legacy.get('effects', {})
+        modifiers.xp *= 1 + effects.get('xp_bonus', 0.0)
+        modifiers.luck_bonus += effects.get('luck_bonus', 0)
+        modifiers.sources.append(legacy['name'])
+
+    return modifiers
+
+
+def get_modifiers(player_data: Dict[str, Any], user_id: Optional[str] = None) -> Modifiers:
+    """Get a player's composed modifiers, from the cache while still valid."""
+    user_id = str(user_id or player_data.get('user_id', ''))
+    now = time.time()
+    base = get_global_modifiers()
+
+    cached = _cache.get(user_id)
+    if cached is not None and cached.base is base and cached.expires_at > now:
+        return cached
+
+    modifiers = _build(player_data, base, now)
+    if user_id:
+        if len(_cache) >= MAX_CACHED:
+            _sweep(now)
+        _cache[user_id] = modifiers
+    return modifiers
+
+
+def _sweep(now: float):
+    """Drop stale cached sets, or everything if none are stale."""
+    stale = [user_id for user_id, cached in _cache.items() if cached.base is not _global or cached.expires_at <= now]
+    for user_id in stale:
+        del _cache[user_id]
+    if len(_cache) >= MAX_CACHED:
+        _cache.clear()
+
+
+def _drop(user_id: Any = None):
+    """Drop one player's cached modifiers, or every player's."""
+    global _global
+    if user_id is None:
+        _cache.clear()
+        _global = None
+    else:
+        _cache.pop(str(user_id), None)
+
+
+def invalidate_modifiers(user_id: Optional[str] = None):
+    """Recompute a player's modifiers (or everyone's) here and on the other workers."""
+    _drop(user_id)
+    publish_invalidation('modifiers', user_id)
+
+
+register_invalidation_handler('modifiers', _drop)
+register_cache_invalidator('modifiers', _drop)
+
+
+def luck_percent(player_data: Dict[str, Any], modifiers: Optional[Modifiers] = None) -> int:
+    """Get a player's luck bonus percent, counting luck granted by modifiers."""
+    from utils.constants import LUCK_LEVELS
+
+    modifiers = modifiers or get_modifiers(player_data)
+    points = player_data.get('luck_points', 0) + modifiers.luck_bonus
+    for data in LUCK_LEVELS.values():
+        if data['min'] <= points <= data['max']:
+            return data['bonus_percent']
+    return LUCK_LEVELS['divine']['bonus_percent'] if points > 0 else LUCK_LEVELS['cursed']['bonus_percent']
+
+
+def apply_rewards(player_data: Dict[str, Any], coins: int, xp: int) -> Tuple[int, int]:
+    """Apply luck and every modifier to a coin and XP reward."""
+    modifiers = get_modifiers(player_data)
+    luck = 1 + luck_percent(player_data, modifiers) / 100
+    return max(1, int(coins * luck * modifiers.coins)), max(1, int(xp * luck * modifiers.xp))
+
+
+def item_chance(player_data: Dict[str, Any], base_chance: float) -> float:
+    """Get an item drop chance after luck and loot modifiers."""
+    modifiers = get_modifiers(player_data)
+    chance = base_chance * (1 + luck_percent(player_data, modifiers) / 100) * modifiers.loot
+    return max(0.0, min(1.0, chance))
+
+
+def roll_item(player_data: Dict[str, Any], base_chance: float) -> bool:
+    """Roll for an item drop with luck and loot modifiers."""
+    return random.random() < item_chance(player_data, base_chance)
+
+
+def format_modifiers(modifiers: Modifiers) -> str:
+    """Describe the bonuses in effect for a reward embed ('' if none)."""
+    return ", ".join(modifiers.sources)
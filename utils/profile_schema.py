@@ -0,0 +1,219 @@
+"""
+RPG profile schema and migrations.
+
+Every profile carries a ``schema_version``. Migrations are registered in order
+with @migration(version) and applied by migrate_profile() when a profile is
+read, so gameplay code can rely on the current shape; the upgraded profile is
+written back once. run_background_migration() upgrades profiles of players who
+haven't been seen since, a batch at a time.
+"""
+import asyncio
+import logging
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+SCHEMA_VERSION = 4
+
+# Counters every profile's stats dict has
+STAT_DEFAULTS = {
+    "battles_won": 0,
+    "battles_lost": 0,
+    "items_found": 0,
+    "items_purchased": 0,
+    "bosses_defeated": 0,
+    "quests_completed": 0,
+    "items_crafted": 0,
+    "materials_gathered": 0,
+    "cheese_consumed": 0,
+    "dragons_defeated": 0,
+    "kwami_quests": 0,
+    "pvp_wins": 0,
+    "pvp_losses": 0
+}
+
+# Legacy last_* timestamp fields and the cooldown names they map to
+LEGACY_COOLDOWN_FIELDS = {
+    "last_daily": "daily",
+    "last_work": "work",
+    "last_adventure": "adventure",
+    "last_craft": "craft",
+    "last_gather": "gather",
+    "last_quest": "quest"
+}
+
+MIGRATIONS: List[Tuple[int, Callable[[Dict[str, Any]], None]]] = []
+
+
+def new_profile(user_id: str, created_at: str = "") -> Dict[str, Any]:
+    """Get a new profile in the current schema."""
+    return {
+        "user_id": user_id,
+        "schema_version": SCHEMA_VERSION,
+        "level": 1,
+        "xp": 0,
+        "max_xp": 100,
+        "hp": 100,
+        "max_hp": 100,
+        "attack": 10,
+        "defense": 5,
+        "mana": 50,
+        "max_mana": 50,
+        "coins": 100,
+        "inventory": {},
+        "materials": {},  # Crafting materials
+        "equipped": {
+            "weapon": None,
+            "armor": None,
+            "accessory": None
+        },
+        "player_class": None,
+        "profession": None,
+        "profession_level": 0,
+        "profession_xp": 0,
+        "faction": None,
+        "prestige_level": 0,
+        "legacy_modifiers": [],
+        "achievements": [],
+        "titles": [],
+        "active_title": None,
+        "stats": dict(STAT_DEFAULTS),
+        "adventure_count": 0,
+        "work_count": 0,
+        "daily_streak": 0,
+        "luck_points": 0,
+        "status_effects": {},
+        "active_quests": [],
+        "completed_quests": [],
+        "party_id": None,
+        "guild_id": None,
+        "pvp_rating": 1000,
+        "world_event_contributions": {},
+        "seasonal_progress": {},
+        "housing": None,
+        "pets": [],
+        "created_at": created_at
+    }
+
+
+def migration(version: int):
+    """Register a function that upgrades a profile to a schema version."""
+    def decorator(func):
+        MIGRATIONS.append((version, func))
+        MIGRATIONS.sort(key=lambda entry: entry[0])
+        return func
+    return decorator
+
+
+def migrate_profile(data: Dict[str, Any]) -> bool:
+    """Apply pending migrations to a profile in place. Returns True if it changed."""
+    version = data.get("schema_version", 0)
+    if version >= SCHEMA_VERSION:
+        return False
+
+    for target, func in MIGRATIONS:
+        if target > version:
+            func(data)
+            data["schema_version"] = target
+    return True
+
+
+@migration(1)
+def _add_missing_fields(data: Dict[str, Any]):
+    """Fill in hot fields older profiles never got."""
+    from utils.database import FIELD_SECTIONS
+
+    # Cold sections are left alone so migrating doesn't load them
+    for field, default in new_profile(data.get("user_id", "")).items():
+        if field not in FIELD_SECTIONS and field not in data:
+            data[field] = default
+
+
+@migration(2)
+def _normalize_stats(data: Dict[str, Any]):
+    """Keep every counter in stats, folding in the old top-level PvP counters."""
+    stats = dict(data.get("stats") or {})
+    for field in ("pvp_wins", "pvp_losses"):
+        if field in data:
+            stats[field] = stats.get(field, 0) + (data.pop(field) or 0)
+    for field, default in STAT_DEFAULTS.items():
+        stats.setdefault(field, default)
+    data["stats"] = stats
+
+
+def _to_timestamp(value: Any) -> float:
+    """Convert a stored ISO string or number to unix time."""
+    if isinstance(value, (int, float)):
+        return float(value)
+    return datetime.fromisoformat(str(value)).timestamp()
+
+
+@migration(3)
+def _collect_cooldowns(data: Dict[str, Any]):
+    """Move the last_* timestamps into the cooldowns record."""
+    cooldowns = dict(data.get("cooldowns") or {})
+    for field, name in LEGACY_COOLDOWN_FIELDS.items():
+        if field not in data:
+            continue
+        value = data.pop(field)
+        if not value:
+            continue
+        try:
+            cooldowns[name] = max(cooldowns.get(name, 0), _to_timestamp(value))
+        except ValueError:
+            logger.warning(f"Dropping unreadable {field} value {value!r} for {data.get('user_id')}")
+    data["cooldowns"] = cooldowns
+
+
+@migration(4)
+def _move_cooldowns(data: Dict[str, Any]):
+    """Hand the profile's cooldown timestamps over to the cooldown store."""
+    from utils.constants import RPG_CONSTANTS
+    from utils.cooldowns import import_cooldowns
+
+    last_used = data.pop("cooldowns", None) or {}
+    ready_times = {
+        name: used_at + RPG_CONSTANTS[f"{name}_cooldown"]
+        for name, used_at in last_used.items() if f"{name}_cooldown" in RPG_CONSTANTS
+    }
+    if ready_times:
+        import_cooldowns(data.get("user_id", ""), ready_times)
+
+
+async def run_background_migration(batch_size: int = 50, pause: float = 1.0) -> int:
+    """Upgrade every stored profile that is behind the current schema.
+
+    Works through the profiles in batches with a pause in between so the
+    database isn't flooded. Each batch runs in a worker thread, since every read
+    may be a network round trip. Returns the number of profiles migrated.
+    """
+    from utils.storage import db
+
+    keys = await asyncio.to_thread(lambda: list(db.prefix("user_rpg_")))
+    migrated = 0
+
+    for start in range(0, len(keys), batch_size):
+        migrated += await asyncio.to_thread(_migrate_batch, keys[start:start + batch_size])
+        await asyncio.sleep(pause)
+
+    logger.info(f"Profile migration complete: {migrated} of {len(keys)} profiles upgraded to v{SCHEMA_VERSION}")
+    return migrated
+
+
+def _migrate_batch(keys: List[str]) -> int:
+    """Migrate the stored profiles under these keys that are behind. Returns the number migrated."""
+    from utils.storage import db
+    from utils.database import get_user_rpg_data
+
+    migrated = 0
+    for key in keys:
+        try:
+            if db[key].get("schema_version", 0) >= SCHEMA_VERSION:
+                continue
+            # Reading a profile migrates it and writes it back
+            if get_user_rpg_data(key[len("user_rpg_"):]) is not None:
+                migrated += 1
+        except Exception as e:
+            logger.error(f"Error migrating profile {key}: {e}")
+    return migrated
@@ -0,0 +1,366 @@
+"""
+PvP ratings, ranked matchmaking and the rating ladder.
+
+Ratings use Elo: the K-factor is higher for a player's first matches so new
+players settle quickly, and lower for the top of the ladder. record_result()
+updates both profiles in memory, so the usual profile writes save the change.
+
+The ladder keeps every rated player in a list sorted by rating, so top-N and
+rank queries are bisections and slices instead of a scan of every profile.
+Each worker stores only the ratings it changed, with when they changed, under
+``pvp_ladder_{worker}`` (written behind, so a burst of results costs one
+write), and tells the other workers about each change so their ladders stay
+current. Loading merges every shard, keeping each player's latest rating.
+
+The matchmaking queues (one per guild plus an open cross-server one) keep
+waiting players in rating buckets QUEUE_BUCKET points wide, each a short sorted
+list, so joining or leaving only shifts the few players in one bucket however
+long the queue is. A player joining is paired with their nearest-rated
+neighbour within a rating window, found by bisecting their bucket and stepping
+to the nearest non-empty buckets either side; the window widens the longer a
+player waits, and pair_waiting() retries everyone periodically. Queues are in memory and local to the worker process, so in
+cluster mode the open queue spans the servers of one worker.
+"""
+import logging
+import time
+from bisect import bisect_left, insort
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from utils.cluster import get_cluster_id, publish_invalidation, register_invalidation_handler
+from utils.storage import db
+from utils.write_behind import WriteBehindBuffer
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_RATING = 1000
+RATING_FLOOR = 100
+PROVISIONAL_GAMES = 30  # Matches played before the K-factor drops
+K_PROVISIONAL = 40
+K_STANDARD = 24
+K_ELITE = 16
+ELITE_RATING = 2000
+
+BASE_WINDOW = 100     # Rating difference accepted straight away
+WINDOW_GROWTH = 5     # Extra rating difference accepted per second waited
+MAX_WINDOW = 500
+QUEUE_BUCKET = 25     # Rating width of a matchmaking queue bucket
+QUEUE_TIMEOUT = 600   # Seconds before a waiting player is dropped
+OPEN_SCOPE = "open"
+
+LADDER_PREFIX = "pvp_ladder_"      # One shard per worker: the ratings it changed
+LEGACY_LADDER_KEY = "pvp_ladder"
+
+
+def get_rating(player_data: Dict[str, Any]) -> int:
+    """Get a player's PvP rating."""
+    return int(player_data.get('pvp_rating', DEFAULT_RATING))
+
+
+def games_played(player_data: Dict[str, Any]) -> int:
+    """Get how many PvP matches a player has finished."""
+    stats = player_data.get('stats') or {}
+    return stats.get('pvp_wins', 0) + stats.get('pvp_losses', 0)
+
+
+def k_factor(rating: int, games: int) -> int:
+    """Get the K-factor for a player."""
+    if games < PROVISIONAL_GAMES:
+        return K_PROVISIONAL
+    return K_ELITE if rating >= ELITE_RATING else K_STANDARD
+
+
+def expected_score(rating: int, opponent_rating: int) -> float:
+    """Get the probability of beating an opponent."""
+    return 1 / (1 + 10 ** ((opponent_rating - rating) / 400))
+
+
+def rating_changes(winner_rating: int, loser_rating: int, winner_games: int = PROVISIONAL_GAMES,
+                   loser_games: int = PROVISIONAL_GAMES) -> Tuple[int, int]:
+    """Get the (winner, loser) rating changes for a result."""
+    surprise = 1 - expected_score(winner_rating, loser_rating)
+    winner_delta = max(1, round(k_factor(winner_rating, winner_games) * surprise))
+    loser_delta = -max(1, round(k_factor(loser_rating, loser_games) * surprise))
+    return winner_delta, max(loser_delta, RATING_FLOOR - loser_rating)
+
+
+def record_result(winner_id: str, winner_data: Dict[str, Any], loser_id: str,
+                  loser_data: Dict[str, Any]) -> Tuple[int, int]:
+    """Apply a PvP result to both profiles and the ladder. Returns the rating changes.
+
+    Call before the result's pvp_won/pvp_lost events so the games count is the
+    number played before this match.
+    """
+    winner_rating, loser_rating = get_rating(winner_data), get_rating(loser_data)
+    winner_delta, loser_delta = rating_changes(winner_rating, loser_rating,
+                                               games_played(winner_data), games_played(loser_data))
+    winner_data['pvp_rating'] = winner_rating + winner_delta
+    loser_data['pvp_rating'] = loser_rating + loser_delta
+
+    now = time.time()
+    _set_ratings([[winner_id, winner_data['pvp_rating'], now], [loser_id, loser_data['pvp_rating'], now]])
+    return winner_delta, loser_delta
+
+
+class RatingLadder:
+    """Rated players kept sorted by rating (highest first)."""
+
+    def __init__(self, ratings: Optional[Dict[str, Tuple[int, float]]] = None):
+        self.ratings: Dict[str, int] = {}
+        self.updated_at: Dict[str, float] = {}
+        for user_id, (rating, updated_at) in (ratings or {}).items():
+            self.ratings[user_id] = int(rating)
+            self.updated_at[user_id] = float(updated_at)
+        self.entries: List[Tuple[int, str]] = sorted((-rating, user_id) for user_id, rating in self.ratings.items())
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def update(self, user_id: str, rating: int, updated_at: float) -> bool:
+        """Set a player's rating, moving them on the ladder. Older changes than the one held are ignored."""
+        if updated_at < self.updated_at.get(user_id, 0.0):
+            return False
+        self.updated_at[user_id] = updated_at
+        old = self.ratings.get(user_id)
+        if old == rating:
+            return True
+        if old is not None:
+            index = bisect_left(self.entries, (-old, user_id))
+            if index < len(self.entries) and self.entries[index] == (-old, user_id):
+                del self.entries[index]
+        self.ratings[user_id] = rating
+        insort(self.entries, (-rating, user_id))
+        return True
+
+    def rank(self, user_id: str) -> Optional[int]:
+        """Get a player's 1-based rank, or None if they are unrated."""
+        rating = self.ratings.get(user_id)
+        if rating is None:
+            return None
+        return bisect_left(self.entries, (-rating, user_id)) + 1
+
+    def top(self, limit: int = 10, include: Optional[Callable[[str], bool]] = None) -> List[Tuple[str, int]]:
+        """Get the top (user_id, rating) pairs, optionally only players passing a filter."""
+        if include is None:
+            return [(user_id, -rating) for rating, user_id in self.entries[:limit]]
+
+        top = []
+        for rating, user_id in self.entries:
+            if include(user_id):
+                top.append((user_id, -rating))
+                if len(top) >= limit:
+                    break
+        return top
+
+
+def _shard_key() -> str:
+    """Get the database key of the ratings this worker changed."""
+    return f"{LADDER_PREFIX}{get_cluster_id() or 0}"
+
+
+def _write_shard(key: str, ratings: Dict[str, List[float]]):
+    """Store this worker's changed ratings."""
+    db[key] = ratings
+
+
+_ladder_writes = WriteBehindBuffer("pvp_ladder", _write_shard, window=5.0)
+_ladder: Optional[RatingLadder] = None
+_shard: Dict[str, List[float]] = {}  # Ratings changed by this worker: user_id -> [rating, updated_at]
+
+
+def _load_ladder() -> RatingLadder:
+    """Merge every worker's shard (and the pre-shard ladder key), keeping each player's latest rating."""
+    merged: Dict[str, Tuple[int, float]] = {}
+    try:
+        if LEGACY_LADDER_KEY in db:
+            merged = {user_id: (int(rating), 0.0) for user_id, rating in dict(db[LEGACY_LADDER_KEY]).items()}
+        for key in db.prefix(LADDER_PREFIX):
+            for user_id, (rating, updated_at) in dict(db[key]).items():
+                if user_id not in merged or updated_at >= merged[user_id][1]:
+                    merged[user_id] = (int(rating), float(updated_at))
+    except Exception as e:
+        logger.error(f"Error loading PvP ladder: {e}")
+
+    own = _ladder_writes.get(_shard_key()) or db.get(_shard_key()) or {}
+    _shard.update({user_id: list(entry) for user_id, entry in own.items()})
+    return RatingLadder(merged)
+
+
+def get_ladder() -> RatingLadder:
+    """Get the rating ladder, loading it on first use."""
+    global _ladder
+
+    if _ladder is None:
+        _ladder = _load_ladder()
+    return _ladder
+
+
+def _set_ratings(changes: List[List[Any]]):
+    """Apply rating changes ([user_id, rating, updated_at]) made here, recording them in this worker's shard."""
+    ladder = get_ladder()
+    for user_id, rating, updated_at in changes:
+        ladder.update(user_id, rating, updated_at)
+        _shard[user_id] = [rating, updated_at]
+    _ladder_writes.put(_shard_key(), {user_id: list(entry) for user_id, entry in _shard.items()})
+    publish_invalidation('pvp_ladder', changes)
+
+
+def _apply_remote(changes: Any):
+    """Apply rating changes made on another worker."""
+    if _ladder is None or not changes:
+        return  # Loaded from storage on first use instead
+    for user_id, rating, updated_at in changes:
+        _ladder.update(user_id, int(rating), float(updated_at))
+
+
+register_invalidation_handler('pvp_ladder', _apply_remote)
+
+
+def flush_ladder() -> int:
+    """Write this worker's rating changes now (used at shutdown)."""
+    return _ladder_writes.flush()
+
+
+@dataclass(slots=True)
+class QueueEntry:
+    """A player waiting for a ranked match."""
+
+    user_id: str
+    rating: int
+    scope: str
+    channel_id: int
+    joined_at: float
+
+
+def search_window(waited: float) -> float:
+    """Get the rating difference accepted after waiting some seconds."""
+    return min(MAX_WINDOW, BASE_WINDOW + WINDOW_GROWTH * waited)
+
+
+class MatchmakingQueue:
+    """Players waiting for a match in one scope, bucketed by rating."""
+
+    def __init__(self):
+        self.buckets: Dict[int, List[Tuple[int, str]]] = {}  # rating // QUEUE_BUCKET -> sorted (rating, user_id)
+        self.waiting: Dict[str, QueueEntry] = {}
+
+    def __len__(self) -> int:
+        return len(self.waiting)
+
+    def add(self, entry: QueueEntry):
+        """Add a player to the queue."""
+        self.waiting[entry.user_id] = entry
+        insort(self.buckets.setdefault(entry.rating // QUEUE_BUCKET, []), (entry.rating, entry.user_id))
+
+    def remove(self, user_id: str) -> Optional[QueueEntry]:
+        """Remove a player from the queue."""
+        entry = self.waiting.pop(user_id, None)
+        if entry is not None:
+            bucket_id = entry.rating // QUEUE_BUCKET
+            bucket = self.buckets[bucket_id]
+            del bucket[bisect_left(bucket, (entry.rating, user_id))]
+            if not bucket:
+                del self.buckets[bucket_id]
+        return entry
+
+    def nearest(self, entry: QueueEntry, window: float) -> Optional[QueueEntry]:
+        """Find the closest-rated other player within a rating window."""
+        key = (entry.rating, entry.user_id)
+        bucket_id = entry.rating // QUEUE_BUCKET
+        bucket = self.buckets.get(bucket_id, [])
+        index = bisect_left(bucket, key)
+        after = index + 1 if index < len(bucket) and bucket[index] == key else index
+
+        below = bucket[index - 1] if index > 0 else self._edge(bucket_id, -1, entry.rating - window)
+        above = bucket[after] if after < len(bucket) else self._edge(bucket_id, 1, entry.rating + window)
+        best = None
+        for candidate in (below, above):
+            if candidate is None:
+                continue
+            difference = abs(candidate[0] - entry.rating)
+            if difference <= window and (best is None or difference < best[0]):
+                best = (difference, candidate[1])
+        return self.waiting[best[1]] if best else None
+
+    def _edge(self, bucket_id: int, step: int, limit: float) -> Optional[Tuple[int, str]]:
+        """Get the closest player in the next non-empty bucket below (step -1) or above (step 1), up to a rating."""
+        bucket_id += step
+        while (bucket_id * QUEUE_BUCKET <= limit) if step > 0 else ((bucket_id + 1) * QUEUE_BUCKET > limit):
+            bucket = self.buckets.get(bucket_id)
+            if bucket:
+                return bucket[0] if step > 0 else bucket[-1]
+            bucket_id += step
+        return None
+
+
+_queues: Dict[str, MatchmakingQueue] = {}
+_queued_in: Dict[str, str] = {}
+
+
+def queue_scope(guild_id: Optional[int]) -> str:
+    """Get the queue scope for a guild (or the open cross-server queue for None)."""
+    return str(guild_id) if guild_id else OPEN_SCOPE
+
+
+def join_queue(user_id: str, rating: int, scope: str, channel_id: int) -> Optional[Tuple[QueueEntry, QueueEntry]]:
+    """Queue a player, pairing them straight away if an opponent is close enough.
+
+    Returns the matched (waiting player, joining player) pair, or None if the
+    player is now waiting. A player already queued elsewhere is moved.
+    """
+    leave_queue(user_id)
+    queue = _queues.setdefault(scope, MatchmakingQueue())
+    entry = QueueEntry(user_id, rating, scope, channel_id, time.time())
+    queue.add(entry)
+    _queued_in[user_id] = scope
+
+    opponent = queue.nearest(entry, BASE_WINDOW)
+    if opponent is None:
+        return None
+    leave_queue(opponent.user_id)
+    leave_queue(user_id)
+    return opponent, entry
+
+
+def leave_queue(user_id: str) -> Optional[QueueEntry]:
+    """Take a player out of whichever queue they are in."""
+    scope = _queued_in.pop(user_id, None)
+    if scope is None:
+        return None
+    return _queues[scope].remove(user_id)
+
+
+def get_queue_entry(user_id: str) -> Optional[QueueEntry]:
+    """Get a player's queue entry, if they are waiting."""
+    scope = _queued_in.get(user_id)
+    return _queues[scope].waiting.get(user_id) if scope else None
+
+
+def pair_waiting(now: Optional[float] = None) -> Tuple[List[Tuple[QueueEntry, QueueEntry]], List[QueueEntry]]:
+    """Pair players whose search windows have widened enough, longest waiting first.
+
+    Returns the new pairs and the entries dropped for waiting too long.
+    """
+    now = time.time() if now is None else now
+    pairs, expired = [], []
+
+    for queue in _queues.values():
+        for entry in list(queue.waiting.values()):
+            if entry.user_id not in queue.waiting:
+                continue  # Paired earlier in this pass
+            waited = now - entry.joined_at
+            if waited > QUEUE_TIMEOUT:
+                expired.append(leave_queue(entry.user_id))
+                continue
+            opponent = queue.nearest(entry, search_window(waited))
+            if opponent is not None:
+                leave_queue(entry.user_id)
+                leave_queue(opponent.user_id)
+                pairs.append((entry, opponent))
+
+    return pairs, expired
+
+
+def queue_sizes() -> Dict[str, int]:
+    """Get the number of players waiting in each queue."""
+    return {scope: len(queue) for scope, queue in _queues.items() if len(queue)}
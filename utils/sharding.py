@@ -0,0 +1,116 @@
+"""
+Shard configuration and per-shard status helpers.
+
+Sharding is controlled through environment variables:
+    BOT_SHARDED  - '1' to run an AutoShardedBot with the recommended shard count
+    SHARD_COUNT  - total number of shards across every process
+    SHARD_IDS    - shards owned by this process, e.g. '0-3' or '0,2,4-5'
+"""
+import logging
+import os
+from typing import Any, Dict, List, Optional
+
+from discord.ext import commands
+
+logger = logging.getLogger(__name__)
+
+
+def parse_shard_ids(spec: Optional[str]) -> Optional[List[int]]:
+    """Parse a shard range spec like '0-3,6' into a sorted list of ids."""
+    if not spec:
+        return None
+
+    shard_ids = set()
+    for part in spec.split(','):
+        part = part.strip()
+        if not part:
+            continue
+        if '-' in part:
+            start, end = part.split('-', 1)
+            shard_ids.update(range(int(start), int(end) + 1))
+        else:
+            shard_ids.add(int(part))
+    return sorted(shard_ids) or None
+
+
+def get_shard_settings() -> Dict[str, Any]:
+    """Get shard settings from the environment."""
+    shard_count = os.getenv('SHARD_COUNT')
+    shard_ids = parse_shard_ids(os.getenv('SHARD_IDS'))
+    sharded = os.getenv('BOT_SHARDED', '0') not in ('0', 'false', 'no', '')
+
+    settings = {
+        'sharded': sharded or bool(shard_count) or bool(shard_ids),
+        'shard_count': int(shard_count) if shard_count else None,
+        'shard_ids': shard_ids
+    }
+
+    if settings['shard_ids'] and not settings['shard_count']:
+        logger.error("SHARD_IDS requires SHARD_COUNT, ignoring SHARD_IDS")
+        settings['shard_ids'] = None
+
+    return settings
+
+
+def create_bot(**kwargs) -> commands.Bot:
+    """Create the bot, auto-sharded when sharding is configured."""
+    settings = get_shard_settings()
+    if not settings['sharded']:
+        return commands.Bot(**kwargs)
+
+    logger.info(
+        f"Starting in sharded mode (shard count: {settings['shard_count'] or 'auto'}, "
+        f"shards: {settings['shard_ids'] or 'all'})"
+    )
+    return commands.AutoShardedBot(
+        shard_count=settings['shard_count'],
+        shard_ids=settings['shard_ids'],
+        **kwargs
+    )
+
+
+def get_local_shard_ids(bot: commands.Bot) -> List[int]:
+    """Get the shard ids handled by this process."""
+    if isinstance(bot, commands.AutoShardedBot):
+        if bot.shard_ids is not None:
+            return list(bot.shard_ids)
+        return sorted(bot.shards.keys()) or list(range(bot.shard_count or 1))
+    return [bot.shard_id or 0]
+
+
+def owns_primary_shard(bot: commands.Bot) -> bool:
+    """Check if this process owns shard 0, which runs the once-per-bot background tasks."""
+    return 0 in get_local_shard_ids(bot)
+
+
+def _latency_ms(latency: float) -> Optional[float]:
+    """Convert a gateway latency to milliseconds (None before the first heartbeat)."""
+    if latency != latency or latency == float('inf'):
+        return None
+    return round(latency * 1000, 2)
+
+
+def get_shard_stats(bot: commands.Bot) -> List[Dict[str, Any]]:
+    """Get latency and guild count for each shard handled by this process."""
+    guild_counts: Dict[int, int] = {}
+    for guild in bot.guilds:
+        shard_id = guild.shard_id or 0
+        guild_counts[shard_id] = guild_counts.get(shard_id, 0) + 1
+
+    stats = []
+    if isinstance(bot, commands.AutoShardedBot):
+        for shard_id, shard in sorted(bot.shards.items()):
+            stats.append({
+                'id': shard_id,
+                'latency': _latency_ms(shard.latency),
+                'guilds': guild_counts.get(shard_id, 0),
+                'online': not shard.is_closed()
+            })
+    else:
+        stats.append({
+            'id': bot.shard_id or 0,
+            'latency': _latency_ms(bot.latency),
+            'guilds': len(bot.guilds),
+            'online': not bot.is_closed()
+        })
+    return stats
@@ -0,0 +1,96 @@
+"""
+Startup timeline and import prewarming for the bot.
+
+Cog modules are imported in worker threads before discord.py registers them, so
+their shared dependencies are already in ``sys.modules`` when the extensions are
+loaded one by one on the event loop.
+"""
+import asyncio
+import importlib
+import logging
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class StartupTimeline:
+    """Record how long each startup phase took."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.events: List[Dict[str, Any]] = []
+        self.ready_at: Optional[float] = None
+
+    def mark(self, name: str, duration: float, ok: bool = True):
+        """Record a finished phase."""
+        self.events.append({
+            'name': name,
+            'duration_ms': round(duration * 1000, 2),
+            'at_ms': round((time.perf_counter() - self.started) * 1000, 2),
+            'ok': ok
+        })
+
+    @contextmanager
+    def phase(self, name: str):
+        """Time the wrapped block as a startup phase."""
+        start = time.perf_counter()
+        ok = True
+        try:
+            yield
+        except Exception:
+            ok = False
+            raise
+        finally:
+            self.mark(name, time.perf_counter() - start, ok)
+
+    def set_ready(self):
+        """Mark the bot as ready (only the first call counts)."""
+        if self.ready_at is None:
+            self.ready_at = time.perf_counter() - self.started
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Get the timeline as a JSON friendly dict."""
+        return {
+            'ready_ms': round(self.ready_at * 1000, 2) if self.ready_at is not None else None,
+            'phases': list(self.events)
+        }
+
+    def summary(self, limit: int = 10) -> str:
+        """Get a short text summary with the slowest phases first."""
+        slowest = sorted(self.events, key=lambda e: e['duration_ms'], reverse=True)[:limit]
+        lines = [f"{e['name']}: {e['duration_ms']}ms{'' if e['ok'] else ' (failed)'}" for e in slowest]
+        if self.ready_at is not None:
+            lines.insert(0, f"ready after {self.ready_at * 1000:.0f}ms")
+        return " | ".join(lines)
+
+
+# Shared timeline for the running process
+startup_timeline = StartupTimeline()
+
+
+def timed_import(module_name: str) -> Tuple[str, float]:
+    """Import a module and return how long it took."""
+    start = time.perf_counter()
+    importlib.import_module(module_name)
+    return module_name, time.perf_counter() - start
+
+
+async def prewarm_imports(module_names: List[str]) -> Dict[str, bool]:
+    """Import modules concurrently in worker threads and record their import times."""
+    results = await asyncio.gather(
+        *(asyncio.to_thread(timed_import, name) for name in module_names),
+        return_exceptions=True
+    )
+
+    status = {}
+    for name, result in zip(module_names, results):
+        if isinstance(result, Exception):
+            logger.error(f"Failed to prewarm {name}: {result}")
+            startup_timeline.mark(f"import {name}", 0.0, ok=False)
+            status[name] = False
+        else:
+            startup_timeline.mark(f"import {name}", result[1])
+            status[name] = True
+    return status
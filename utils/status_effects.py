@@ -0,0 +1,224 @@
+"""
+Timed status effects.
+
+A profile's ``status_effects`` maps each effect to the unix time it expires.
+Readers (combat, reward modifiers) go through active_effects(), which ignores
+anything past its time, so an expired effect never applies even before it is
+cleaned up. The cleanup itself doesn't touch every profile: every effect
+applied is pushed onto one min-heap of (expires_at, user_id, effect) for all
+players, and a background task pops whatever is due every few seconds,
+groups it by player and rewrites only those profiles, once each. Entries made
+stale by a refresh or removal are skipped when popped.
+
+The heap's contents are kept under ``status_effect_timers_{worker}`` (written
+behind) so a restarted worker picks up the timers it owned.
+"""
+import asyncio
+import heapq
+import logging
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from utils.cluster import get_cluster_id
+from utils.storage import db
+from utils.write_behind import WriteBehindBuffer
+
+logger = logging.getLogger(__name__)
+
+EXPIRY_INTERVAL = 5   # Seconds between expiry passes
+EXPIRY_BATCH = 200    # Players cleaned up per pass
+TIMERS_PREFIX = "status_effect_timers_"
+
+_heap: List[Tuple[float, str, str]] = []
+_timers: Dict[str, Dict[str, float]] = {}  # user_id -> effect -> expires_at
+_loaded = False
+_expiry_task: Optional[asyncio.Task] = None
+
+
+def _timers_key() -> str:
+    """Get the database key of this worker's timers."""
+    return f"{TIMERS_PREFIX}{get_cluster_id() or 0}"
+
+
+def _write_timers(key: str, timers: Dict[str, Dict[str, float]]):
+    """Store the pending timers."""
+    db[key] = timers
+
+
+_timer_writes = WriteBehindBuffer("status_effect_timers", _write_timers, window=5.0)
+
+
+def _save_timers():
+    """Queue a snapshot of the timers for writing."""
+    _timer_writes.put(_timers_key(), {user_id: dict(effects) for user_id, effects in _timers.items()})
+
+
+def _load_timers():
+    """Rebuild the heap from the stored timers on first use."""
+    global _loaded
+    if _loaded:
+        return
+    _loaded = True
+
+    try:
+        stored = db.get(_timers_key()) or {}
+    except Exception as e:
+        logger.error(f"Error loading status effect timers: {e}")
+        stored = {}
+    for user_id, effects in stored.items():
+        for effect, expires_at in effects.items():
+            _track(user_id, effect, float(expires_at))
+    heapq.heapify(_heap)
+
+
+def _track(user_id: str, effect: str, expires_at: float):
+    """Record a timer without saving it."""
+    _timers.setdefault(user_id, {})[effect] = expires_at
+    _heap.append((expires_at, user_id, effect))
+
+
+def _schedule(user_id: str, effect: str, expires_at: float):
+    """Add a timer to the heap and start the expiry task if needed."""
+    global _expiry_task
+
+    _load_timers()
+    _timers.setdefault(user_id, {})[effect] = expires_at
+    heapq.heappush(_heap, (expires_at, user_id, effect))
+    _save_timers()
+
+    if _expiry_task is None or _expiry_task.done():
+        try:
+            _expiry_task = asyncio.get_running_loop().create_task(_expiry_loop())
+        except RuntimeError:
+            # No event loop (scripts, migrations): expired effects are ignored by readers anyway
+            pass
+
+
+def active_effects(player_data: Dict[str, Any], now: Optional[float] = None) -> Dict[str, float]:
+    """Get a player's unexpired status effects as {name: expires_at}."""
+    from utils.constants import STATUS_EFFECTS
+
+    now = time.time() if now is None else now
+    return {name: expires_at for name, expires_at in (player_data.get('status_effects') or {}).items()
+            if name in STATUS_EFFECTS and (not isinstance(expires_at, (int, float)) or expires_at > now)}
+
+
+def apply_status_effect(player_data: Dict[str, Any], user_id: str, effect: str,
+                        duration: Optional[int] = None) -> float:
+    """Give a player a status effect (refreshing it if already active). Returns when it expires."""
+    from utils.constants import STATUS_EFFECTS
+    from utils.modifiers import invalidate_modifiers
+
+    expires_at = time.time() + (duration or STATUS_EFFECTS[effect]['duration'])
+    effects = player_data.get('status_effects') or {}
+    current = effects.get(effect)
+    if isinstance(current, (int, float)) and current > expires_at:
+        expires_at = current
+    effects[effect] = expires_at
+    player_data['status_effects'] = effects
+
+    _schedule(str(user_id), effect, expires_at)
+    invalidate_modifiers(user_id)
+    return expires_at
+
+
+def remove_status_effect(player_data: Dict[str, Any], user_id: str, effect: str) -> bool:
+    """Take a status effect off a player. Returns False if they didn't have it."""
+    from utils.modifiers import invalidate_modifiers
+
+    effects = player_data.get('status_effects') or {}
+    if effects.pop(effect, None) is None:
+        return False
+    player_data['status_effects'] = effects
+
+    _load_timers()
+    user_timers = _timers.get(str(user_id), {})
+    if user_timers.pop(effect, None) is not None:
+        if not user_timers:
+            _timers.pop(str(user_id), None)
+        _save_timers()
+    invalidate_modifiers(user_id)
+    return True
+
+
+def _pop_due(now: float, limit: int) -> Dict[str, List[str]]:
+    """Pop the due timers of up to limit players, skipping stale entries."""
+    due: Dict[str, List[str]] = {}
+    while _heap and _heap[0][0] <= now:
+        expires_at, user_id, effect = _heap[0]
+        if user_id not in due and len(due) >= limit:
+            break
+        heapq.heappop(_heap)
+        if _timers.get(user_id, {}).get(effect) != expires_at:
+            continue  # Refreshed or removed since
+        del _timers[user_id][effect]
+        if not _timers[user_id]:
+            del _timers[user_id]
+        due.setdefault(user_id, []).append(effect)
+    return due
+
+
+def expire_due(now: Optional[float] = None, limit: int = EXPIRY_BATCH) -> Dict[str, List[str]]:
+    """Remove due effects from the affected profiles, writing each once. Returns {user_id: effects}."""
+    now = time.time() if now is None else now
+    _load_timers()
+    due = _pop_due(now, limit)
+    if due:
+        _strip_expired(due, now)
+        _save_timers()
+    return due
+
+
+def _strip_expired(due: Dict[str, List[str]], now: float):
+    """Delete expired effects from each affected profile (safe to run in a worker thread)."""
+    from utils.database import get_user_rpg_data, update_user_rpg_data
+    from utils.modifiers import invalidate_modifiers
+
+    for user_id, names in due.items():
+        try:
+            player_data = get_user_rpg_data(user_id)
+            if not player_data:
+                continue
+            effects = player_data.get('status_effects') or {}
+            expired = [name for name in names
+                       if isinstance(effects.get(name), (int, float)) and effects[name] <= now]
+            if not expired:
+                continue
+            for name in expired:
+                del effects[name]
+            player_data['status_effects'] = effects
+            update_user_rpg_data(user_id, player_data)
+            invalidate_modifiers(user_id)
+        except Exception as e:
+            logger.error(f"Error expiring status effects for {user_id}: {e}")
+
+
+async def _expiry_loop():
+    """Expire due effects every EXPIRY_INTERVAL seconds until no timers are left.
+
+    The heap is popped on the loop; the profile reads and writes run in a worker thread.
+    """
+    while _heap:
+        await asyncio.sleep(EXPIRY_INTERVAL)
+        try:
+            now = time.time()
+            due = _pop_due(now, EXPIRY_BATCH)
+            if due:
+                await asyncio.to_thread(_strip_expired, due, now)
+                _save_timers()
+        except Exception as e:
+            logger.error(f"Error in status effect expiry: {e}")
+
+
+def start_expiry():
+    """Load the stored timers and start expiring them (call once the bot's loop is running)."""
+    global _expiry_task
+
+    _load_timers()
+    if _heap and (_expiry_task is None or _expiry_task.done()):
+        _expiry_task = asyncio.get_running_loop().create_task(_expiry_loop())
+
+
+def flush_status_timers() -> int:
+    """Write the pending timers now (used at shutdown)."""
+    return _timer_writes.flush()
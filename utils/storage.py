@@ -0,0 +1,177 @@
+"""
+Pluggable key-value storage behind the ``db`` object used across the bot.
+
+STORAGE_BACKEND selects the backend:
+- ``replit`` (default): Replit's hosted database
+- ``sqlite``: a local SQLite file (STORAGE_PATH, default data/bot.db) in WAL mode,
+  one row per key with the value stored as JSON
+
+Both support the same mapping interface (``db[key]``, ``get``, ``in``, ``del``,
+``keys``) plus ``prefix()``. To move an existing Replit database to SQLite, run
+``python -m utils.storage import`` on Replit with STORAGE_BACKEND=sqlite.
+"""
+import json
+import logging
+import os
+import sqlite3
+import sys
+import threading
+from collections.abc import Mapping, MutableMapping, Sequence
+from contextlib import contextmanager
+from typing import Any, Iterator, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SQLITE_PATH = os.path.join('data', 'bot.db')
+
+
+def _encode_default(value: Any) -> Any:
+    """Encode database containers (e.g. Replit's observed types) as JSON."""
+    if isinstance(value, Mapping):
+        return dict(value)
+    if isinstance(value, Sequence) and not isinstance(value, (str, bytes)):
+        return list(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def _dumps(value: Any) -> str:
+    """Encode a value for storage."""
+    return json.dumps(value, separators=(',', ':'), default=_encode_default)
+
+
+class SQLiteStore(MutableMapping):
+    """Key-value store in a local SQLite database."""
+
+    def __init__(self, path: str):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        # The web server thread and asyncio.to_thread callers share this connection
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS kv (key TEXT PRIMARY KEY, value TEXT NOT NULL) WITHOUT ROWID"
+        )
+        logger.info(f"Using SQLite storage at {path}")
+
+    def __getitem__(self, key: str) -> Any:
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM kv WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            raise KeyError(key)
+        return json.loads(row[0])
+
+    def __setitem__(self, key: str, value: Any):
+        encoded = _dumps(value)
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO kv (key, value) VALUES (?, ?) ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+                (key, encoded)
+            )
+
+    def __delitem__(self, key: str):
+        with self._lock:
+            deleted = self._conn.execute("DELETE FROM kv WHERE key = ?", (key,)).rowcount
+        if not deleted:
+            raise KeyError(key)
+
+    def __contains__(self, key: object) -> bool:
+        with self._lock:
+            return self._conn.execute("SELECT 1 FROM kv WHERE key = ?", (key,)).fetchone() is not None
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.keys())
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM kv").fetchone()[0]
+
+    def keys(self) -> Tuple[str, ...]:
+        """Get every key."""
+        with self._lock:
+            return tuple(row[0] for row in self._conn.execute("SELECT key FROM kv ORDER BY key"))
+
+    def prefix(self, prefix: str) -> Tuple[str, ...]:
+        """Get every key starting with a prefix (a range scan on the primary key)."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT key FROM kv WHERE key >= ? AND key < ? ORDER BY key", (prefix, prefix + '\uffff')
+            )
+            return tuple(row[0] for row in rows)
+
+    def set_many(self, items: Mapping):
+        """Write several keys in one transaction."""
+        rows = [(key, _dumps(value)) for key, value in items.items()]
+        with self.transaction():
+            self._conn.executemany(
+                "INSERT INTO kv (key, value) VALUES (?, ?) ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+                rows
+            )
+
+    @contextmanager
+    def transaction(self):
+        """Run the enclosed reads and writes atomically."""
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield self
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+
+    def close(self):
+        """Close the database connection."""
+        with self._lock:
+            self._conn.close()
+
+
+def get_backend_name() -> str:
+    """Get the configured storage backend name."""
+    return os.getenv('STORAGE_BACKEND', 'replit').lower()
+
+
+def create_store():
+    """Create the configured storage backend."""
+    backend = get_backend_name()
+    if backend == 'sqlite':
+        return SQLiteStore(os.getenv('STORAGE_PATH', DEFAULT_SQLITE_PATH))
+    if backend != 'replit':
+        logger.warning(f"Unknown STORAGE_BACKEND '{backend}', using replit")
+
+    from replit import db as replit_db
+    return replit_db
+
+
+def import_from_replit(target: SQLiteStore, batch_size: int = 500) -> int:
+    """Copy every key from the Replit database into a SQLite store. Returns the number copied."""
+    from replit import db as replit_db
+
+    keys = list(replit_db.keys())
+    copied = 0
+    for start in range(0, len(keys), batch_size):
+        batch = {}
+        for key in keys[start:start + batch_size]:
+            try:
+                batch[key] = replit_db[key]
+            except Exception as e:
+                logger.error(f"Skipping {key} during import: {e}")
+        target.set_many(batch)
+        copied += len(batch)
+        logger.info(f"Imported {copied}/{len(keys)} keys")
+    return copied
+
+
+db = create_store()
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    if sys.argv[1:] != ['import'] or not isinstance(db, SQLiteStore):
+        print("Usage: STORAGE_BACKEND=sqlite python -m utils.storage import")
+        sys.exit(1)
+    print(f"Imported {import_from_replit(db)} keys into {db.path}")
@@ -0,0 +1,307 @@
+"""
+Compiled unlock conditions for special weapons and hidden classes.
+
+The requirement lists in WEAPON_UNLOCK_CONDITIONS and CLASS_UNLOCK_CONDITIONS
+are compiled once into UnlockRules: each requirement becomes a predicate
+closure returning None when it holds or the reason it doesn't, with constant
+parts (boss levels, item keys) resolved at compile time. Rules are indexed by
+the gameplay events that can change their outcome, and a game_events handler
+re-checks only those rules when such an event fires, against the profile
+already in memory.
+
+Predicates that read hot profile fields run before those that read history,
+so a failing rule rarely loads the cold sections. Combat and event requirements
+(health_condition, restriction, battle_condition, special_condition) can only
+be met from the context passed to emit() by the event that fires them, e.g.
+emit(player_data, 'boss_defeated', boss=..., hp_percent=..., used=[...]).
+"""
+import logging
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from utils.game_events import register_handler
+from utils.hot_reload import register_cache_invalidator
+from utils.inventory import get_inventory, item_key
+
+logger = logging.getLogger(__name__)
+
+# (player_data, event context) -> None if met, otherwise what is missing
+Predicate = Callable[[Dict[str, Any], Dict[str, Any]], Optional[str]]
+
+# Condition type -> (compiler, events that can change it, reads cold history)
+_compilers: Dict[str, Tuple[Callable[[Dict[str, Any]], Predicate], Tuple[str, ...], bool]] = {}
+_index: Optional['UnlockIndex'] = None
+
+
+def condition(condition_type: str, events: Tuple[str, ...] = (), cold: bool = False):
+    """Register the compiler for a requirement type."""
+    def decorator(func):
+        _compilers[condition_type] = (func, events, cold)
+        return func
+    return decorator
+
+
+def _title(name: str) -> str:
+    """Format a snake_case id for messages."""
+    return name.replace('_', ' ').title()
+
+
+def _completed_quest_names(player_data: Dict[str, Any]) -> List[str]:
+    """Get the names of a player's completed quests."""
+    return [quest.get('name', '') if isinstance(quest, dict) else quest
+            for quest in player_data.get('completed_quests') or []]
+
+
+@condition('boss_defeat', events=('boss_defeated',), cold=True)
+def _boss_defeat(spec: Dict[str, Any]) -> Predicate:
+    from utils.constants import SPECIAL_BOSSES
+
+    boss = spec['boss']
+    message = f"Must defeat {_title(boss)}"
+    min_level = spec.get('min_level')
+    max_level = spec.get('player_level_max')
+    if max_level:
+        message += f" at level {max_level} or lower"
+
+    # The boss's level is fixed, so a boss_level_min that can never hold is settled now
+    boss_level = SPECIAL_BOSSES.get(boss, {}).get('level', 0)
+    if spec.get('boss_level_min') and boss_level < spec['boss_level_min']:
+        return lambda player_data, context: message
+
+    def predicate(player_data, context):
+        if min_level and player_data.get('level', 1) < min_level:
+            return f"Must be level {min_level} or higher"
+        if context.get('boss') == boss:
+            level_at_defeat = player_data.get('level', 1)
+        else:
+            defeat = (player_data.get('boss_defeats') or {}).get(boss)
+            if defeat is None:
+                return message
+            level_at_defeat = defeat.get('player_level', 999) if isinstance(defeat, dict) else 999
+        if max_level and level_at_defeat > max_level:
+            return message
+        return None
+
+    return predicate
+
+
+def record_boss_defeat(player_data: Dict[str, Any], boss: str, defeated_at: float):
+    """Record a boss kill, keeping the lowest level it was done at and the first time (for player_level_max)."""
+    defeats = player_data.get('boss_defeats') or {}
+    level = player_data.get('level', 1)
+    previous = defeats.get(boss)
+    if isinstance(previous, dict):
+        level = min(level, previous.get('player_level', level))
+        defeated_at = previous.get('defeated_at', defeated_at)
+    defeats[boss] = {'player_level': level, 'defeated_at': defeated_at}
+    player_data['boss_defeats'] = defeats
+
+
+@condition('dungeon_clear', events=('dungeon_cleared',), cold=True)
+def _dungeon_clear(spec: Dict[str, Any]) -> Predicate:
+    dungeon = spec['dungeon']
+    floors = spec.get('floors', 1)
+    message = f"Must clear {_title(dungeon)} ({floors} floors)"
+
+    def predicate(player_data, context):
+        if context.get('dungeon') == dungeon and context.get('floors', 0) >= floors:
+            return None
+        if (player_data.get('dungeon_clears') or {}).get(dungeon, 0) >= floors:
+            return None
+        return message
+
+    return predicate
+
+
+@condition('item_required', events=('item_found', 'item_purchased', 'item_crafted'))
+def _item_required(spec: Dict[str, Any]) -> Predicate:
+    key = item_key(spec['item'])
+    message = f"Must possess {_title(spec['item'])}"
+    return lambda player_data, context: None if get_inventory(player_data).get(key) else message
+
+
+@condition('class_unlock', events=('class_selected',))
+def _class_unlock(spec: Dict[str, Any]) -> Predicate:
+    required_class = spec['class']
+    message = f"Must be {_title(required_class)} class"
+    return lambda player_data, context: None if player_data.get('player_class') == required_class else message
+
+
+@condition('quest', events=('quest_completed',), cold=True)
+def _quest(spec: Dict[str, Any]) -> Predicate:
+    quest_name = spec['quest_name']
+    message = f"Must complete {_title(quest_name)} quest"
+    return lambda player_data, context: None if quest_name in _completed_quest_names(player_data) else message
+
+
+@condition('temporal_achievement')
+def _achievement(spec: Dict[str, Any]) -> Predicate:
+    achievement = spec['achievement']
+    message = f"Must earn the {_title(achievement)} achievement"
+    return lambda player_data, context: None if achievement in (player_data.get('achievements') or []) else message
+
+
+@condition('health_condition', events=('battle_won', 'boss_defeated'))
+def _health_condition(spec: Dict[str, Any]) -> Predicate:
+    max_percent = spec['max_hp_percent']
+    message = f"Must complete the challenge at {max_percent}% HP or lower"
+
+    def predicate(player_data, context):
+        hp_percent = context.get('hp_percent')
+        return None if hp_percent is not None and hp_percent <= max_percent else message
+
+    return predicate
+
+
+@condition('restriction', events=('battle_won', 'boss_defeated'))
+def _restriction(spec: Dict[str, Any]) -> Predicate:
+    banned = [kind for kind in ('buffs', 'potions', 'healing') if spec.get(f'no_{kind}')]
+    message = f"Must win without {', '.join(banned)}"
+
+    def predicate(player_data, context):
+        if 'used' not in context or any(kind in context['used'] for kind in banned):
+            return message
+        return None
+
+    return predicate
+
+
+@condition('battle_condition', events=('battle_won', 'boss_defeated'))
+def _battle_condition(spec: Dict[str, Any]) -> Predicate:
+    message = "Must win a battle with no status effects"
+
+    def predicate(player_data, context):
+        if spec.get('no_status_effects') and (not context.get('in_battle') or player_data.get('status_effects')):
+            return message
+        return None
+
+    return predicate
+
+
+@condition('special_condition', events=('world_event_survived',))
+def _special_condition(spec: Dict[str, Any]) -> Predicate:
+    name = spec['condition']
+    message = f"Must {_title(name).lower()}"
+    return lambda player_data, context: None if context.get('condition') == name else message
+
+
+class UnlockRule:
+    """A compiled list of requirements for one unlock."""
+
+    def __init__(self, name: str, kind: str, data: Dict[str, Any]):
+        self.name = name
+        self.kind = kind
+        self.description = data.get('description', '')
+        self.unlock_message = data.get('unlock_message', f"You have unlocked {name}!")
+        self.events = set()
+
+        compiled = []
+        for spec in data.get('requirements', []):
+            entry = _compilers.get(spec.get('type'))
+            if entry is None:
+                logger.warning(f"Unknown unlock requirement type '{spec.get('type')}' for {name}")
+                message = f"Requires {spec.get('type', 'an unknown condition')}"
+                compiled.append((True, lambda player_data, context, message=message: message))
+                continue
+            compiler, events, cold = entry
+            self.events.update(events)
+            compiled.append((cold, compiler(spec)))
+
+        # Hot-field checks first so a failing rule rarely touches cold sections
+        self.predicates: List[Predicate] = [predicate for cold, predicate in sorted(compiled, key=lambda c: c[0])]
+
+    def missing(self, player_data: Dict[str, Any], context: Optional[Dict[str, Any]] = None,
+                first_only: bool = False) -> List[str]:
+        """Get every requirement the player doesn't meet (only the first if first_only)."""
+        context = context or {}
+        failures = []
+        for predicate in self.predicates:
+            failure = predicate(player_data, context)
+            if failure:
+                failures.append(failure)
+                if first_only:
+                    break
+        return failures
+
+    def is_met(self, player_data: Dict[str, Any], context: Optional[Dict[str, Any]] = None) -> bool:
+        """Check every requirement, stopping at the first that fails."""
+        return not self.missing(player_data, context, first_only=True)
+
+
+class UnlockIndex:
+    """Compiled unlock rules, indexed by name and by triggering event."""
+
+    def __init__(self, weapons: Dict[str, Any], classes: Dict[str, Any]):
+        self.weapons = {name: UnlockRule(name, 'weapon', data) for name, data in weapons.items()}
+        self.classes = {name: UnlockRule(name, 'class', data) for name, data in classes.items()}
+
+        # Only weapons unlock automatically; hidden classes are claimed with $class
+        self.weapons_by_event: Dict[str, List[UnlockRule]] = {}
+        for rule in self.weapons.values():
+            for event in rule.events:
+                self.weapons_by_event.setdefault(event, []).append(rule)
+
+
+def get_unlock_index() -> UnlockIndex:
+    """Get the compiled unlock rules, compiling them on first use."""
+    global _index
+
+    if _index is None:
+        from utils.constants import WEAPON_UNLOCK_CONDITIONS, CLASS_UNLOCK_CONDITIONS
+        _index = UnlockIndex(WEAPON_UNLOCK_CONDITIONS, CLASS_UNLOCK_CONDITIONS)
+    return _index
+
+
+def invalidate_unlock_index():
+    """Drop the compiled rules so they are rebuilt from the reloaded constants."""
+    global _index
+    _index = None
+
+
+register_cache_invalidator('unlock_conditions', invalidate_unlock_index)
+
+
+def check_weapon_unlock(player_data: Dict[str, Any], weapon_name: str) -> Tuple[bool, List[str]]:
+    """Check a weapon's unlock conditions. Returns (met, missing requirements)."""
+    rule = get_unlock_index().weapons.get(weapon_name)
+    if rule is None:
+        return True, []
+    missing = rule.missing(player_data)
+    return not missing, missing
+
+
+def check_class_unlock(player_data: Dict[str, Any], class_name: str) -> Tuple[bool, List[str]]:
+    """Check a hidden class's unlock conditions. Returns (met, missing requirements)."""
+    rule = get_unlock_index().classes.get(class_name)
+    if rule is None:
+        return True, []
+    missing = rule.missing(player_data)
+    return not missing, missing
+
+
+def _check_unlocks(player_data: Dict[str, Any], event: str, amount: int, context: Dict[str, Any],
+                   result: Dict[str, List]):
+    """Award the weapons an event has just unlocked."""
+    rules = get_unlock_index().weapons_by_event.get(event)
+    if not rules:
+        return
+
+    for rule in rules:
+        if not rule.is_met(player_data, context):
+            continue
+        if rule.name in (player_data.get('unlocked_weapons') or []):
+            continue
+
+        from utils.helpers import award_weapon_unlock
+        result['unlocks'].append(award_weapon_unlock(player_data, rule.name))
+
+
+def _register_handlers():
+    """Hook the unlock check into every event a requirement type listens to."""
+    events = set()
+    for compiler, condition_events, cold in _compilers.values():
+        events.update(condition_events)
+    for event in sorted(events):
+        register_handler(event, _check_unlocks)
+
+
+_register_handlers()
@@ -0,0 +1,489 @@
+"""
+World events and raid bosses.
+
+An event is a small record (``world_event_{id}``) holding its schedule, its
+boss and status; it only changes when the event starts or ends. Attacks never
+touch it. Each worker keeps its own contribution shard in memory, a
+{user_id: damage} counter plus a running total, and flushes it every
+FLUSH_INTERVAL seconds to its own key (``world_event_{id}_shard_{worker}``), so
+any number of simultaneous attackers cost one write per worker per interval
+and no two processes ever write the same key.
+
+The boss's HP is its max HP minus the live local total and the last flushed
+totals of the other workers' shards. tick() drives the lifecycle: it flushes
+the local shards, refreshes the others, and on the leader worker (the only
+process when not clustered) starts scheduled events and ends those whose boss
+fell or whose time ran out. A short settling delay lets every worker flush its
+last hits, then the rewards are handed out in one batched pass over the
+merged contributions. Only the leader writes the schedule record, so its
+updates are never lost: other workers save the events they create and ask the
+leader to add them.
+
+Events without a boss (cheese_storm, kwami_invasion) count a contribution
+point for each adventure, won battle or job done while they are active.
+"""
+import asyncio
+import heapq
+import logging
+import time
+import uuid
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+from utils.cluster import get_cluster_id, publish_invalidation, register_invalidation_handler
+from utils.combat import Hit, combatant_from_enemy, combatant_from_profile, new_seed, raid_round
+from utils.database import get_world_event_data, update_world_event_data, get_user_rpg_data, update_user_rpg_data
+from utils.game_events import emit, is_dragon, register_handler
+from utils.storage import db
+
+logger = logging.getLogger(__name__)
+
+FLUSH_INTERVAL = 15     # Seconds between shard flushes (and lifecycle ticks)
+SETTLE_DELAY = 30       # Seconds after an event ends before rewards, so every worker flushes
+REWARD_BATCH = 50       # Profiles rewarded before yielding to the event loop
+SCHEDULE_ID = "schedule"
+
+# Gameplay events that earn a contribution point in events without a boss
+CONTRIBUTION_EVENTS = ('adventure_completed', 'battle_won', 'work_completed')
+
+
+@dataclass(slots=True)
+class WorldEvent:
+    """A scheduled, running or finished world event."""
+
+    event_id: str
+    event_type: str
+    name: str
+    starts_at: float
+    ends_at: float
+    boss: str = ""
+    max_hp: int = 0
+    seed: int = 0
+    min_players: int = 0
+    channel_id: int = 0        # Where the event's changes are announced
+    status: str = "scheduled"  # scheduled, active, ended, rewarded
+    outcome: str = ""          # defeated, expired, completed or failed once ended
+    ended_at: float = 0
+
+
+@dataclass(slots=True)
+class ContributionShard:
+    """This worker's contributions to one event."""
+
+    damage: Dict[str, int] = field(default_factory=dict)
+    attacks: Dict[str, int] = field(default_factory=dict)
+    total: int = 0
+    dirty: bool = False
+
+    def add(self, user_id: str, amount: int):
+        """Count a contribution."""
+        self.damage[user_id] = self.damage.get(user_id, 0) + amount
+        self.attacks[user_id] = self.attacks.get(user_id, 0) + 1
+        self.total += amount
+        self.dirty = True
+
+
+_events: Dict[str, WorldEvent] = {}
+_shards: Dict[str, ContributionShard] = {}
+# Other workers' shards as last flushed: event id -> worker -> {'total', 'damage'}
+_remote: Dict[str, Dict[str, Dict[str, Any]]] = {}
+# Events waiting to be added to the schedule by the leader's next tick
+_schedule_requests: List[str] = []
+
+
+def worker_id() -> str:
+    """Get the name of this worker's shards."""
+    return str(get_cluster_id() or 0)
+
+
+def is_leader() -> bool:
+    """Check if this worker runs the event lifecycle."""
+    return not get_cluster_id()
+
+
+def _shard_id(event_id: str, worker: str) -> str:
+    """Get the world event data id of a worker's shard."""
+    return f"{event_id}_shard_{worker}"
+
+
+def _save_event(event: WorldEvent):
+    """Store an event record."""
+    _events[event.event_id] = event
+    update_world_event_data(event.event_id, asdict(event))
+
+
+def _load_schedule() -> List[str]:
+    """Get the ids of every event that hasn't been rewarded."""
+    schedule = get_world_event_data(SCHEDULE_ID) or {}
+    return list(schedule.get('events', []))
+
+
+def _save_schedule(event_ids: List[str]):
+    """Store the ids of every event that hasn't been rewarded."""
+    update_world_event_data(SCHEDULE_ID, {'events': event_ids})
+
+
+def schedule_event(event_type: str, starts_at: Optional[float] = None, duration: Optional[int] = None,
+                   channel_id: int = 0) -> WorldEvent:
+    """Schedule a world event from WORLD_EVENTS (starting now by default)."""
+    from utils.constants import WORLD_EVENTS, SPECIAL_BOSSES
+
+    definition = WORLD_EVENTS[event_type]
+    effects = definition.get('effects', {})
+    starts_at = time.time() if starts_at is None else starts_at
+    boss = SPECIAL_BOSSES.get(event_type) if effects.get('global_boss') else None
+
+    event = WorldEvent(
+        event_id=uuid.uuid4().hex[:12],
+        event_type=event_type,
+        name=definition['name'],
+        starts_at=starts_at,
+        ends_at=starts_at + (duration or definition['duration']),
+        boss=event_type if boss else "",
+        max_hp=boss['hp'] if boss else 0,
+        seed=new_seed(),
+        min_players=effects.get('min_players', 0),
+        channel_id=channel_id
+    )
+    _save_event(event)
+    if is_leader():
+        _schedule_requests.append(event.event_id)
+    else:
+        publish_invalidation('world_event_schedule', event.event_id)
+    return event
+
+
+def _on_schedule_request(event_id: Any):
+    """Queue an event another worker created for the leader to schedule."""
+    if is_leader() and event_id:
+        _schedule_requests.append(event_id)
+
+
+register_invalidation_handler('world_event_schedule', _on_schedule_request)
+
+
+def get_event(event_id: str) -> Optional[WorldEvent]:
+    """Get an event that hasn't been rewarded yet."""
+    return _events.get(event_id)
+
+
+def active_events() -> List[WorldEvent]:
+    """Get the events running now."""
+    return [event for event in _events.values() if event.status == "active"]
+
+
+def upcoming_events() -> List[WorldEvent]:
+    """Get the scheduled events that haven't started."""
+    return sorted((event for event in _events.values() if event.status == "scheduled"), key=lambda e: e.starts_at)
+
+
+def active_boss_event() -> Optional[WorldEvent]:
+    """Get the running event with a boss, if any."""
+    return next((event for event in active_events() if event.boss), None)
+
+
+def total_contributed(event_id: str) -> int:
+    """Get the total damage (or points) contributed to an event across every worker."""
+    local = _shards.get(event_id)
+    remote = sum(shard.get('total', 0) for shard in _remote.get(event_id, {}).values())
+    return (local.total if local else 0) + remote
+
+
+def boss_hp(event: WorldEvent) -> int:
+    """Get a boss event's remaining HP."""
+    return max(0, event.max_hp - total_contributed(event.event_id))
+
+
+def contributions(event_id: str) -> Dict[str, int]:
+    """Merge every worker's contributions to an event."""
+    merged: Dict[str, int] = {}
+    shards = [shard.get('damage', {}) for shard in _remote.get(event_id, {}).values()]
+    if event_id in _shards:
+        shards.append(_shards[event_id].damage)
+    for damage in shards:
+        for user_id, amount in damage.items():
+            merged[user_id] = merged.get(user_id, 0) + amount
+    return merged
+
+
+def top_contributors(event_id: str, limit: int = 10) -> List[Tuple[str, int]]:
+    """Get the (user_id, contribution) pairs of an event's top contributors."""
+    return heapq.nlargest(limit, contributions(event_id).items(), key=lambda item: item[1])
+
+
+def _local_shard(event_id: str) -> ContributionShard:
+    """Get this worker's shard of an event, resuming from its last flush after a restart.
+
+    The attack counts are restored too: they number each raider's rounds, so a
+    restarted worker continues their seeded rolls instead of replaying them.
+    """
+    shard = _shards.get(event_id)
+    if shard is None:
+        shard = _resume_shard(event_id, get_world_event_data(_shard_id(event_id, worker_id())) or {})
+    return shard
+
+
+def _resume_shard(event_id: str, stored: Dict[str, Any]) -> ContributionShard:
+    """Start this worker's shard of an event from its last flushed record."""
+    shard = ContributionShard(damage=dict(stored.get('damage', {})), attacks=dict(stored.get('attacks', {})),
+                              total=stored.get('total', 0))
+    _shards[event_id] = shard
+    return shard
+
+
+def contribute(event_id: str, user_id: str, amount: int):
+    """Count a contribution in this worker's shard."""
+    _local_shard(event_id).add(user_id, amount)
+
+
+def attack_boss(event: WorldEvent, user_id: str, player_data: Dict[str, Any]) -> List[Hit]:
+    """Hit an event's boss once, taking its counterattack. Updates the player's HP in place."""
+    from utils.constants import SPECIAL_BOSSES
+
+    shard = _local_shard(event.event_id)
+    raider = combatant_from_profile(player_data, player_data.get('name', 'Raider'), user_id)
+    boss = combatant_from_enemy({**SPECIAL_BOSSES[event.boss], 'hp': boss_hp(event), 'max_hp': event.max_hp},
+                                is_boss=True)
+
+    # Each raider rolls from their own stream of the event's seed
+    round_number = shard.attacks.get(user_id, 0) + 1
+    hits = raid_round([raider], boss, event.seed + int(user_id), round_number)
+    damage = sum(hit.damage for hit in hits if hit.defender == boss.name)
+    shard.add(user_id, damage)
+    player_data['hp'] = max(0, raider.hp)
+    return hits
+
+
+def _on_gameplay_event(player_data: Dict[str, Any], event: str, amount: int, context: Dict[str, Any],
+                       result: Dict[str, List]):
+    """Count a contribution point to every running event without a boss."""
+    user_id = str(player_data.get('user_id', ''))
+    if not user_id:
+        return
+    for world_event in active_events():
+        if not world_event.boss:
+            contribute(world_event.event_id, user_id, amount)
+
+
+for _event in CONTRIBUTION_EVENTS:
+    register_handler(_event, _on_gameplay_event)
+
+
+def _take_dirty_shards() -> Dict[str, Dict[str, Any]]:
+    """Snapshot this worker's changed shards as records to write, marking them clean."""
+    records = {}
+    for event_id, shard in _shards.items():
+        if shard.dirty:
+            records[event_id] = {'total': shard.total, 'damage': dict(shard.damage), 'attacks': dict(shard.attacks)}
+            shard.dirty = False
+    return records
+
+
+def _write_shards(records: Dict[str, Dict[str, Any]]) -> List[str]:
+    """Write shard records. Returns the ids of the events whose shard failed to write."""
+    return [event_id for event_id, record in records.items()
+            if not update_world_event_data(_shard_id(event_id, worker_id()), record)]
+
+
+def _mark_unwritten(failed: List[str]):
+    """Keep shards that failed to write dirty so the next flush retries them."""
+    for event_id in failed:
+        if event_id in _shards:
+            _shards[event_id].dirty = True
+
+
+def flush_shards() -> int:
+    """Write this worker's changed shards now (used at shutdown). Returns the number written."""
+    records = _take_dirty_shards()
+    failed = _write_shards(records)
+    _mark_unwritten(failed)
+    return len(records) - len(failed)
+
+
+async def _flush_shards_off_loop():
+    """Write this worker's changed shards from a worker thread."""
+    records = _take_dirty_shards()
+    if records:
+        _mark_unwritten(await asyncio.to_thread(_write_shards, records))
+
+
+def _read_shards(event_id: str) -> Dict[str, Dict[str, Any]]:
+    """Read every worker's last flushed shard of an event, keyed by shard id."""
+    prefix = f"world_event_{_shard_id(event_id, '')}"
+    return {key[len("world_event_"):]: get_world_event_data(key[len("world_event_"):]) or {}
+            for key in db.prefix(prefix)}
+
+
+def _apply_shards(event_id: str, stored: Dict[str, Dict[str, Any]]):
+    """Keep the other workers' shards of an event, resuming ours if it isn't loaded yet."""
+    own = _shard_id(event_id, worker_id())
+    if event_id not in _shards:
+        _resume_shard(event_id, stored.get(own, {}))
+    _remote[event_id] = {shard_id: record for shard_id, record in stored.items() if shard_id != own}
+
+
+def _read_events(requests: List[str]) -> Tuple[Dict[str, WorldEvent], Dict[str, Dict[str, Dict[str, Any]]]]:
+    """Read the scheduled event records and the shards of those running or ended.
+
+    The leader first adds the requested events to the schedule. Runs in a
+    worker thread; returns (events, {event_id: {shard_id: record}}).
+    """
+    schedule = _load_schedule()
+    requested = [event_id for event_id in dict.fromkeys(requests) if event_id not in schedule]
+
+    events = {}
+    for event_id in schedule + requested:
+        record = get_world_event_data(event_id)
+        if not record:
+            continue
+        try:
+            events[event_id] = WorldEvent(**record)
+        except TypeError:
+            logger.warning(f"Skipping world event {event_id} with an unknown format")
+
+    added = [event_id for event_id in requested if event_id in events]
+    if added:
+        _save_schedule(schedule + added)
+    shards = {event_id: _read_shards(event_id) for event_id, event in events.items()
+              if event.status in ("active", "ended")}
+    return events, shards
+
+
+async def _store_event(event: WorldEvent):
+    """Store an event record from a worker thread."""
+    _events[event.event_id] = event
+    await asyncio.to_thread(update_world_event_data, event.event_id, asdict(event))
+
+
+async def tick(now: Optional[float] = None) -> List[Tuple[str, WorldEvent]]:
+    """Flush, sync and advance every event. Returns (change, event) pairs to announce.
+
+    Changes are 'started', 'ended' and 'rewarded'; only the leader makes them.
+    The database reads and writes run in worker threads.
+    """
+    now = time.time() if now is None else now
+    await _flush_shards_off_loop()
+    requests = list(_schedule_requests) if is_leader() else []
+    events, shards = await asyncio.to_thread(_read_events, requests)
+    # Only tick() takes requests and new ones are appended, so drop exactly those read
+    del _schedule_requests[:len(requests)]
+    _events.clear()
+    _events.update(events)
+    for event_id, stored in shards.items():
+        _apply_shards(event_id, stored)
+
+    changes = []
+    for event in list(_events.values()):
+        if not is_leader():
+            continue
+
+        if event.status == "scheduled" and event.starts_at <= now:
+            event.status = "active"
+            await _store_event(event)
+            changes.append(("started", event))
+        elif event.status == "active" and ((event.boss and boss_hp(event) <= 0) or event.ends_at <= now):
+            await end_event(event, now)
+            changes.append(("ended", event))
+        elif event.status == "ended" and now >= event.ended_at + SETTLE_DELAY:
+            await distribute_rewards(event)
+            changes.append(("rewarded", event))
+
+    # Drop the shards of events that are over
+    for event_id in list(_shards):
+        if event_id not in _events:
+            del _shards[event_id]
+            _remote.pop(event_id, None)
+    return changes
+
+
+async def end_event(event: WorldEvent, now: Optional[float] = None):
+    """Stop an event and decide its outcome; rewards follow once every worker has flushed."""
+    participants = len(contributions(event.event_id))
+    if event.min_players and participants < event.min_players:
+        event.outcome = "failed"
+    elif event.boss:
+        event.outcome = "defeated" if boss_hp(event) <= 0 else "expired"
+    else:
+        event.outcome = "completed"
+    event.status = "ended"
+    event.ended_at = time.time() if now is None else now
+    await _store_event(event)
+
+
+def _rewards_earned(event: WorldEvent) -> bool:
+    """Check if an ended event pays out (its boss fell, or it ran its course with enough players)."""
+    return event.outcome in ("defeated", "completed")
+
+
+async def distribute_rewards(event: WorldEvent) -> int:
+    """Reward every contributor of an ended event in batched passes. Returns the number rewarded.
+
+    Each batch of REWARD_BATCH profiles is read and written in a worker thread.
+    """
+    from utils.constants import WORLD_EVENTS
+
+    await _flush_shards_off_loop()
+    _apply_shards(event.event_id, await asyncio.to_thread(_read_shards, event.event_id))
+    ranked = sorted(contributions(event.event_id).items(), key=lambda item: item[1], reverse=True)
+    rewards = WORLD_EVENTS.get(event.event_type, {}).get('rewards', {})
+    earned = _rewards_earned(event)
+
+    rewarded = 0
+    for start in range(0, len(ranked), REWARD_BATCH):
+        rewarded += await asyncio.to_thread(_reward_batch, event, ranked[start:start + REWARD_BATCH], start + 1,
+                                            rewards if earned else None)
+
+    # The event is settled; drop it from the schedule along with its shards
+    event.status = "rewarded"
+    await _store_event(event)
+    await asyncio.to_thread(_drop_event, event.event_id)
+    _events.pop(event.event_id, None)
+
+    logger.info(f"World event {event.event_id} ({event.event_type}) {event.outcome}: rewarded {rewarded} players")
+    return rewarded if earned else 0
+
+
+def _reward_batch(event: WorldEvent, ranked: List[Tuple[str, int]], first_rank: int,
+                  rewards: Optional[Dict[str, int]]) -> int:
+    """Record a batch of contributors' results, handing out rewards unless None. Returns the number updated."""
+    from utils.inventory import store_items
+    from utils.unlock_conditions import record_boss_defeat
+
+    rewarded = 0
+    for rank, (user_id, amount) in enumerate(ranked, first_rank):
+        try:
+            player_data = get_user_rpg_data(user_id, sections=("history",))
+            if not player_data:
+                continue
+
+            history = player_data.get('world_event_contributions') or {}
+            history[event.event_id] = {
+                'event': event.event_type,
+                'contribution': amount,
+                'rank': rank,
+                'outcome': event.outcome,
+                'ended_at': event.ended_at
+            }
+            player_data['world_event_contributions'] = history
+
+            if rewards is not None:
+                store_items(user_id, player_data, rewards)
+                emit(player_data, 'world_event_survived', condition=f"survive_{event.event_type}")
+                if event.boss:
+                    record_boss_defeat(player_data, event.boss, event.ended_at)
+                    emit(player_data, 'boss_defeated', boss=event.boss)
+                    if is_dragon(event.boss):
+                        emit(player_data, 'dragon_defeated', boss=event.boss)
+
+            update_user_rpg_data(user_id, player_data)
+            rewarded += 1
+        except Exception as e:
+            logger.error(f"Error rewarding {user_id} for world event {event.event_id}: {e}")
+    return rewarded
+
+
+def _drop_event(event_id: str):
+    """Remove a rewarded event from the schedule and delete its shards (leader only)."""
+    _save_schedule([scheduled for scheduled in _load_schedule() if scheduled != event_id])
+    for key in db.prefix(f"world_event_{_shard_id(event_id, '')}"):
+        del db[key]
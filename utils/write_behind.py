@@ -0,0 +1,159 @@
+"""
+Write-behind buffer that coalesces repeated writes to the same key.
+
+put() records the latest value for a key and returns immediately; a background
+task writes entries once they have waited ``window`` seconds, so a burst of
+updates to one key costs a single write. Reads go through get() first so callers
+always see their own pending writes. Nothing waits longer than ``window`` plus
+``interval`` seconds, and flush() writes everything at shutdown.
+
+The background task runs each batch in a worker thread, since a write can be a
+network round trip. Entries stay pending until written, so put() callers must not
+mutate a value after queueing it. put() and get() may also be called from worker
+threads (code run through asyncio.to_thread); the flush task still runs on the
+bot's event loop.
+"""
+import asyncio
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class WriteBehindBuffer:
+    """Coalescing, time-bounded write buffer in front of a key-value store."""
+
+    def __init__(self, name: str, writer: Callable[[str, Any], None], window: float = 1.0,
+                 interval: float = 0.25, batch_size: int = 100):
+        self.name = name
+        self.writer = writer
+        self.window = window
+        self.interval = interval
+        self.batch_size = batch_size
+
+        self.pending: Dict[str, Any] = {}
+        self.queued_at: Dict[str, float] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        # Guards pending/queued_at, which worker threads may update too
+        self._lock = threading.Lock()
+        # Held while writing so a shutdown flush can't be overtaken by an older in-flight batch
+        self._write_lock = threading.Lock()
+
+        self.puts = 0
+        self.writes = 0
+        self.coalesced = 0
+        self.failures = 0
+        self.max_depth = 0
+        self.max_staleness = 0.0
+        self.last_flush_ms = 0.0
+
+    def __contains__(self, key: str) -> bool:
+        with self._lock:
+            return key in self.pending
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Get the pending value for a key, if a write is queued."""
+        with self._lock:
+            return self.pending.get(key, default)
+
+    def put(self, key: str, value: Any):
+        """Queue a write, replacing any queued write for the same key."""
+        with self._lock:
+            self.puts += 1
+            if key in self.pending:
+                self.coalesced += 1
+            else:
+                self.queued_at[key] = time.monotonic()
+            self.pending[key] = value
+            self.max_depth = max(self.max_depth, len(self.pending))
+
+        try:
+            self._loop = asyncio.get_running_loop()
+        except RuntimeError:
+            if self._loop is not None and self._loop.is_running():
+                # Called from a worker thread: start the flush task on the bot's loop
+                self._loop.call_soon_threadsafe(self._start)
+            else:
+                # No event loop (scripts, migrations): write through
+                self.flush()
+            return
+        self._start()
+
+    def _start(self):
+        """Start the flush task on the event loop if it isn't running."""
+        if self._task is None or self._task.done():
+            self._task = self._loop.create_task(self._run())
+
+    async def _run(self):
+        """Flush due entries until the buffer is empty, writing each batch off the event loop."""
+        while self.pending:
+            await asyncio.sleep(self.interval)
+            batch = self._take(due_only=True)
+            if batch:
+                start = time.monotonic()
+                failed = await asyncio.to_thread(self._write_batch, batch)
+                self._finish(batch, failed, start)
+
+    def flush(self, due_only: bool = False) -> int:
+        """Write queued entries (only those older than the window if due_only). Returns the number written."""
+        start = time.monotonic()
+        batch = self._take(due_only)
+        if not batch:
+            return 0
+        return self._finish(batch, self._write_batch(batch), start)
+
+    def _take(self, due_only: bool) -> List[Tuple[str, Any]]:
+        """Get the entries to write next; they stay pending until written."""
+        cutoff = time.monotonic() - self.window if due_only else float('inf')
+        with self._lock:
+            due = [key for key, queued in self.queued_at.items() if queued <= cutoff]
+            if due_only:
+                due = due[:self.batch_size]
+            return [(key, self.pending[key]) for key in due]
+
+    def _write_batch(self, batch: List[Tuple[str, Any]]) -> Set[str]:
+        """Write a batch, returning the keys that failed."""
+        failed = set()
+        with self._write_lock:
+            for key, value in batch:
+                try:
+                    self.writer(key, value)
+                except Exception as e:
+                    failed.add(key)
+                    logger.error(f"{self.name} write-behind failed for {key}: {e}")
+        return failed
+
+    def _finish(self, batch: List[Tuple[str, Any]], failed: Set[str], start: float) -> int:
+        """Drop written entries unless a newer put replaced them meanwhile. Failed ones stay queued."""
+        now = time.monotonic()
+        written = 0
+        with self._lock:
+            for key, value in batch:
+                if key in failed:
+                    self.failures += 1
+                    continue
+                written += 1
+                if key in self.pending and self.pending[key] is value:
+                    del self.pending[key]
+                    self.max_staleness = max(self.max_staleness, now - self.queued_at.pop(key))
+
+            self.writes += written
+            self.last_flush_ms = round((now - start) * 1000, 2)
+        return written
+
+    def metrics(self) -> Dict[str, Any]:
+        """Get counters describing how well writes are being coalesced."""
+        return {
+            'pending': len(self.pending),
+            'puts': self.puts,
+            'writes': self.writes,
+            'coalesced': self.coalesced,
+            'failures': self.failures,
+            'write_ratio': round(self.writes / self.puts, 3) if self.puts else None,
+            'max_depth': self.max_depth,
+            'max_staleness_ms': round(self.max_staleness * 1000, 2),
+            'last_flush_ms': self.last_flush_ms
+        }
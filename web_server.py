@@ -5,6 +5,9 @@ from threading import Thread
 import psutil
 import os
 from datetime import datetime
+from utils.startup import startup_timeline
+from utils.sharding import get_shard_stats
+from utils.database import get_profile_write_metrics
 
 logger = logging.getLogger(__name__)
 
@@ -16,7 +19,10 @@ bot_status = {
     'start_time': None,
     'guilds': 0,
     'users': 0,
-    'latency': 0
+    'latency': 0,
+    'shard_count': 1,
+    'shards': [],
+    'clusters': []
 }
 
 def update_bot_status(bot=None):
@@ -28,9 +34,27 @@ def update_bot_status(bot=None):
         bot_status['guilds'] = len(bot.guilds)
         bot_status['users'] = len(bot.users)
         bot_status['latency'] = round(bot.latency * 1000, 2)
+        bot_status['shard_count'] = bot.shard_count or 1
+        bot_status['shards'] = get_shard_stats(bot)
+        if not bot_status['start_time']:
+            bot_status['start_time'] = getattr(bot, 'start_time', None)
     else:
         bot_status['is_online'] = False
 
+def apply_cluster_health(summary):
+    """Update bot status from the cluster coordinator's aggregated worker reports."""
+    global bot_status
+
+    if not bot_status['start_time']:
+        bot_status['start_time'] = datetime.now()
+    bot_status['is_online'] = summary['is_online']
+    bot_status['guilds'] = summary['guilds']
+    bot_status['users'] = summary['users']
+    bot_status['latency'] = summary['latency']
+    bot_status['shards'] = summary['shards']
+    bot_status['shard_count'] = len(summary['shards']) or 1
+    bot_status['clusters'] = summary['clusters']
+
 @app.route('/')
 def home():
     """Health check endpoint."""
@@ -61,7 +85,10 @@ def health():
                 'guilds': bot_status['guilds'],
                 'users': bot_status['users'],
                 'latency': f"{bot_status['latency']}ms",
-                'uptime': uptime
+                'uptime': uptime,
+                'shard_count': bot_status['shard_count'],
+                'shards': bot_status['shards'],
+                'clusters': bot_status['clusters']
             },
             'system': {
                 'cpu_percent': cpu_percent,
@@ -69,6 +96,8 @@ def health():
                 'disk_percent': disk.percent,
                 'python_version': os.sys.version.split()[0]
             },
+            'startup': startup_timeline.as_dict(),
+            'profile_writes': get_profile_write_metrics(),
             'timestamp': datetime.now().isoformat()
         })
     except Exception as e:
@@ -123,6 +152,7 @@ def set_bot_offline():
     bot_status['guilds'] = 0
     bot_status['users'] = 0
     bot_status['latency'] = 0
+    bot_status['shards'] = []
 
 def run_web_server():
     """Run the web server - wrapper function for compatibility."""